@@ -0,0 +1,311 @@
+"""
+Benchmark cases for reads, writes, listings, copy, sync and, with pyarrow, parquet reads
+"""
+import os
+import random
+import shutil
+import tempfile
+
+from pyxet.file_operations import perform_copy
+from pyxet.sync import SyncCommand
+
+from harness import BenchmarkCase, timed
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyxet.arrow
+    import pyxet.parquet
+except ImportError:
+    pq = None
+
+READ_CHUNK_SIZE = 8 * 1024 * 1024
+RANDOM_READ_SIZE = 64 * 1024
+
+# Sizes of the generated data, by --scale.
+SCALES = {
+    "small": {
+        "large_file_size": 16 * 1024 * 1024,
+        "small_file_size": 4 * 1024,
+        "small_file_count": 100,
+        "random_reads": 200,
+        "wide_file_count": 500,
+        "deep_depth": 4,
+        "deep_fanout": 3,
+        "copy_file_count": 50,
+        "copy_file_size": 256 * 1024,
+        "parquet_rows": 200_000,
+    },
+    "medium": {
+        "large_file_size": 256 * 1024 * 1024,
+        "small_file_size": 4 * 1024,
+        "small_file_count": 1000,
+        "random_reads": 1000,
+        "wide_file_count": 5000,
+        "deep_depth": 6,
+        "deep_fanout": 3,
+        "copy_file_count": 500,
+        "copy_file_size": 1024 * 1024,
+        "parquet_rows": 2_000_000,
+    },
+    "large": {
+        "large_file_size": 2 * 1024 * 1024 * 1024,
+        "small_file_size": 4 * 1024,
+        "small_file_count": 10000,
+        "random_reads": 5000,
+        "wide_file_count": 50000,
+        "deep_depth": 8,
+        "deep_fanout": 3,
+        "copy_file_count": 2000,
+        "copy_file_size": 4 * 1024 * 1024,
+        "parquet_rows": 20_000_000,
+    },
+}
+
+
+class BenchmarkContext:
+    """
+    The repository, scratch branch and local scratch directory the cases run against.
+    `repo` is of the form `endpoint:user/repo`.
+    """
+
+    def __init__(self, fs, repo, branch, params):
+        self.fs = fs
+        self.repo = repo
+        self.branch = branch
+        self.params = params
+        self.local_dir = tempfile.mkdtemp(prefix="pyxet_bench_")
+        self._counter = 0
+
+    def path(self, rel):
+        return f"{self.repo}/{self.branch}/{rel}"
+
+    def url(self, rel):
+        return f"xet://{self.path(rel)}"
+
+    def unique(self, prefix):
+        self._counter += 1
+        return f"{prefix}/{self._counter}"
+
+    def cleanup(self):
+        shutil.rmtree(self.local_dir, ignore_errors=True)
+
+
+def _random_bytes(rng, size):
+    return rng.getrandbits(8 * size).to_bytes(size, "little") if size > 0 else b""
+
+
+def _write_files(fs, files, message):
+    """
+    Writes {path: data} in one transaction.
+    """
+    fs.start_transaction(message)
+    try:
+        for path, data in files.items():
+            with fs.open(path, "wb") as f:
+                f.write(data)
+    except Exception:
+        fs.cancel_transaction()
+        raise
+    fs.end_transaction()
+
+
+def _write_local_tree(root, count, size, rng):
+    total = 0
+    for i in range(count):
+        path = os.path.join(root, f"d{i % 10}", f"f{i}.bin")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(_random_bytes(rng, size))
+        total += size
+    return total
+
+
+def _deep_tree_paths(depth, fanout):
+    paths = [""]
+    for _ in range(depth):
+        paths = [f"{p}/d{i}" if p else f"d{i}" for p in paths for i in range(fanout)]
+    return [f"{p}/leaf.txt" for p in paths]
+
+
+def prepare_fixtures(ctx):
+    """
+    Writes the data the read, listing and download cases run against.
+    """
+    p = ctx.params
+    rng = random.Random(0)
+
+    large = _random_bytes(rng, min(p["large_file_size"], READ_CHUNK_SIZE))
+    ctx.fs.start_transaction("benchmark fixtures: large file")
+    try:
+        with ctx.fs.open(ctx.path("fixtures/large.bin"), "wb") as f:
+            remaining = p["large_file_size"]
+            while remaining > 0:
+                n = min(remaining, len(large))
+                f.write(large[:n])
+                remaining -= n
+    except Exception:
+        ctx.fs.cancel_transaction()
+        raise
+    ctx.fs.end_transaction()
+
+    _write_files(ctx.fs, {ctx.path(f"fixtures/wide/f{i}.txt"): b"%d" % i
+                          for i in range(p["wide_file_count"])},
+                 "benchmark fixtures: wide tree")
+    _write_files(ctx.fs, {ctx.path(f"fixtures/deep/{leaf}"): leaf.encode()
+                          for leaf in _deep_tree_paths(p["deep_depth"], p["deep_fanout"])},
+                 "benchmark fixtures: deep tree")
+
+    if pq is not None:
+        rows = p["parquet_rows"]
+        parquet_rng = random.Random(1)
+        table = pa.table({"id": pa.array(range(rows), pa.int64()),
+                          "value": pa.array((parquet_rng.random() for _ in range(rows)), pa.float64()),
+                          "label": pa.array((f"label {i % 1000}" for i in range(rows)), pa.string())})
+        ctx.fs.start_transaction("benchmark fixtures: parquet file")
+        try:
+            with ctx.fs.open(ctx.path("fixtures/table.parquet"), "wb") as f:
+                pq.write_table(table, f, row_group_size=max(rows // 20, 1))
+        except Exception:
+            ctx.fs.cancel_transaction()
+            raise
+        ctx.fs.end_transaction()
+        ctx.parquet_bytes = ctx.fs.info(ctx.path("fixtures/table.parquet"))["size"]
+
+    ctx.local_src = os.path.join(ctx.local_dir, "src")
+    ctx.local_src_bytes = _write_local_tree(ctx.local_src, p["copy_file_count"], p["copy_file_size"], rng)
+
+    # The no-op sync case compares against a target that is already up to date.
+    SyncCommand(ctx.local_src, ctx.url("fixtures/synced"), use_mtime=False,
+                message="benchmark fixtures: synced", dryrun=False, update_size=False).run()
+
+
+def make_cases(ctx):
+    p = ctx.params
+    fs = ctx.fs
+    rng = random.Random(1)
+    small_data = _random_bytes(rng, p["small_file_size"])
+    large_chunk = _random_bytes(rng, min(p["large_file_size"], READ_CHUNK_SIZE))
+    deep_file_count = p["deep_fanout"] ** p["deep_depth"]
+
+    def read_sequential(_):
+        def read():
+            with fs.open(ctx.path("fixtures/large.bin"), "rb") as f:
+                while len(f.read(READ_CHUNK_SIZE)) > 0:
+                    pass
+        return timed(read)
+
+    def read_random(_):
+        offsets = random.Random(2)
+        max_offset = max(0, p["large_file_size"] - RANDOM_READ_SIZE)
+
+        def read():
+            with fs.open(ctx.path("fixtures/large.bin"), "rb") as f:
+                for _ in range(p["random_reads"]):
+                    f.seek(offsets.randint(0, max_offset))
+                    f.read(RANDOM_READ_SIZE)
+        return timed(read)
+
+    def write_small_files(_):
+        prefix = ctx.unique("write_small")
+        files = {ctx.path(f"{prefix}/f{i}.bin"): small_data for i in range(p["small_file_count"])}
+        return timed(_write_files, fs, files, "benchmark: small files")
+
+    def write_large_file(_):
+        path = ctx.path(ctx.unique("write_large") + ".bin")
+
+        def write():
+            fs.start_transaction("benchmark: large file")
+            with fs.open(path, "wb") as f:
+                remaining = p["large_file_size"]
+                while remaining > 0:
+                    n = min(remaining, len(large_chunk))
+                    f.write(large_chunk[:n])
+                    remaining -= n
+            fs.end_transaction()
+        return timed(write)
+
+    def commit_setup():
+        fs.start_transaction("benchmark: commit latency")
+        with fs.open(ctx.path(ctx.unique("commit") + ".bin"), "wb") as f:
+            f.write(small_data)
+
+    def commit_latency(_):
+        return timed(fs.end_transaction)
+
+    def ls_wide(_):
+        return timed(fs.ls, ctx.path("fixtures/wide"), detail=True)
+
+    def find_deep(_):
+        return timed(fs.find, ctx.path("fixtures/deep"), detail=True)
+
+    def copy_upload(_):
+        dest = ctx.url(ctx.unique("copy_upload"))
+        return timed(perform_copy, [ctx.local_src], dest, "benchmark: copy upload", recursive=True)
+
+    def copy_download_setup():
+        return os.path.join(ctx.local_dir, ctx.unique("download").replace("/", "_"))
+
+    def copy_download(dest):
+        return timed(perform_copy, [ctx.url("fixtures/wide")], dest, "benchmark: copy download",
+                     recursive=True)
+
+    def remove_local(path):
+        shutil.rmtree(path, ignore_errors=True)
+
+    def sync_upload(_):
+        cmd = SyncCommand(ctx.local_src, ctx.url(ctx.unique("sync")), use_mtime=False,
+                          message="benchmark: sync", dryrun=False, update_size=False)
+        return timed(cmd.run)
+
+    def sync_noop(_):
+        cmd = SyncCommand(ctx.local_src, ctx.url("fixtures/synced"), use_mtime=False,
+                          message="benchmark: sync no-op", dryrun=False, update_size=False)
+        return timed(cmd.run)
+
+    def arrow_read_parquet(_):
+        arrow_fs = pyxet.arrow.filesystem(fs.endpoint)
+        return timed(pq.read_table, ctx.path("fixtures/table.parquet"), filesystem=arrow_fs)
+
+    def parquet_read_batched(_):
+        def read():
+            # A new cache each time, so the footer is fetched as in the arrow case.
+            with pyxet.parquet.XetParquetFile(ctx.url("fixtures/table.parquet"), fs,
+                                              footer_cache=pyxet.parquet.FooterCache()) as pf:
+                pf.read()
+        return timed(read)
+
+    parquet_cases = []
+    if pq is not None:
+        parquet_cases = [
+            BenchmarkCase("arrow_read_parquet", arrow_read_parquet, bytes=ctx.parquet_bytes,
+                          description="pyarrow.parquet.read_table of one file through pyxet.arrow"),
+            BenchmarkCase("parquet_read_batched", parquet_read_batched, bytes=ctx.parquet_bytes,
+                          description="XetParquetFile.read of one file with batched chunk reads"),
+        ]
+
+    return [
+        BenchmarkCase("read_sequential", read_sequential, bytes=p["large_file_size"],
+                      description="Sequential 8MB reads of one large file"),
+        BenchmarkCase("read_random", read_random, bytes=p["random_reads"] * RANDOM_READ_SIZE,
+                      ops=p["random_reads"], description="Random 64KB reads of one large file"),
+        BenchmarkCase("write_small_files", write_small_files,
+                      bytes=p["small_file_count"] * p["small_file_size"], ops=p["small_file_count"],
+                      description="Write many small files in one transaction, including commit"),
+        BenchmarkCase("write_large_file", write_large_file, bytes=p["large_file_size"],
+                      description="Write one large file, including commit"),
+        BenchmarkCase("commit_latency", commit_latency, setup=commit_setup, ops=1,
+                      description="Commit a transaction holding one small file"),
+        BenchmarkCase("ls_wide", ls_wide, ops=p["wide_file_count"],
+                      description="ls of one directory holding many files"),
+        BenchmarkCase("find_deep", find_deep, ops=deep_file_count,
+                      description="find over a deep directory tree"),
+        BenchmarkCase("copy_upload", copy_upload, bytes=ctx.local_src_bytes, ops=p["copy_file_count"],
+                      description="perform_copy of a local tree into the repo"),
+        BenchmarkCase("copy_download", copy_download, setup=copy_download_setup, teardown=remove_local,
+                      ops=p["wide_file_count"], description="perform_copy of a repo directory to local disk"),
+        BenchmarkCase("sync_upload", sync_upload, bytes=ctx.local_src_bytes, ops=p["copy_file_count"],
+                      description="SyncCommand.run of a local tree into an empty target"),
+        BenchmarkCase("sync_noop", sync_noop, ops=p["copy_file_count"],
+                      description="SyncCommand.run against an up to date target"),
+    ] + parquet_cases
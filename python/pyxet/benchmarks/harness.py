@@ -0,0 +1,171 @@
+"""
+Timing, result storage and baseline comparison for the pyxet benchmarks
+"""
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+from tabulate import tabulate
+
+# A case is reported as a regression if its median time grows by more than this fraction.
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+RESULTS_FORMAT_VERSION = 1
+
+
+class BenchmarkCase:
+    """
+    A single benchmark.  `run(state)` is called once per repetition and returns
+    the elapsed seconds of the measured region.  `setup()` and `teardown(state)`,
+    if given, are called around each repetition and are not timed; `state` is
+    the return value of setup, or None.  `bytes` and `ops` are the amount of
+    data and number of operations covered by one repetition, used to derive
+    throughput.
+    """
+
+    def __init__(self, name, run, setup=None, teardown=None, bytes=0, ops=0, description=""):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.teardown = teardown
+        self.bytes = bytes
+        self.ops = ops
+        self.description = description
+
+
+def timed(fn, *args, **kwargs):
+    """
+    Calls fn and returns the elapsed wall clock seconds.
+    """
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def run_case(case, repeat, warmup=0):
+    """
+    Runs a case `warmup + repeat` times and summarizes the timed repetitions.
+    """
+    times = []
+    for i in range(warmup + repeat):
+        state = case.setup() if case.setup is not None else None
+        try:
+            elapsed = case.run(state)
+        finally:
+            if case.teardown is not None:
+                case.teardown(state)
+        if i >= warmup:
+            times.append(elapsed)
+    return summarize(case, times)
+
+
+def summarize(case, times):
+    times = sorted(times)
+    median = statistics.median(times)
+    result = {
+        "description": case.description,
+        "seconds": times,
+        "min": times[0],
+        "median": median,
+        "mean": statistics.mean(times),
+        "p90": times[min(len(times) - 1, int(round(0.9 * (len(times) - 1))))],
+        "bytes": case.bytes,
+        "ops": case.ops,
+    }
+    if case.bytes and median > 0:
+        result["mb_per_s"] = case.bytes / (1024 * 1024) / median
+    if case.ops and median > 0:
+        result["ops_per_s"] = case.ops / median
+    return result
+
+
+def environment_metadata(endpoint, params):
+    try:
+        from pyxet.version import __version__ as pyxet_version
+    except ImportError:
+        pyxet_version = "unknown"
+    return {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "pyxet_version": pyxet_version,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "endpoint": endpoint,
+        "params": params,
+    }
+
+
+def save_results(path, metadata, results):
+    dirname = os.path.dirname(path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"metadata": metadata, "results": results}, f, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("metadata", {}).get("format_version") != RESULTS_FORMAT_VERSION:
+        raise ValueError(f"{path} is not a benchmark results file of version {RESULTS_FORMAT_VERSION}")
+    return data
+
+
+def compare_results(baseline, current, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """
+    Compares the median times of each case against a baseline.
+    Returns a list of rows (case, baseline median, current median, change, status),
+    where status is "regression", "improvement", "ok", "new" or "missing".
+    """
+    rows = []
+    base_results = baseline["results"]
+    cur_results = current["results"]
+    for name in sorted(set(base_results) | set(cur_results)):
+        if name not in cur_results:
+            rows.append((name, base_results[name]["median"], None, None, "missing"))
+            continue
+        if name not in base_results:
+            rows.append((name, None, cur_results[name]["median"], None, "new"))
+            continue
+
+        base = base_results[name]["median"]
+        cur = cur_results[name]["median"]
+        change = (cur - base) / base if base > 0 else 0.0
+        if change > threshold:
+            status = "regression"
+        elif change < -threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append((name, base, cur, change, status))
+    return rows
+
+
+def format_results(results):
+    rows = []
+    for name, r in results.items():
+        rows.append((name, f"{r['median']:.4f}", f"{r['p90']:.4f}",
+                     f"{r['mb_per_s']:.1f}" if "mb_per_s" in r else "",
+                     f"{r['ops_per_s']:.1f}" if "ops_per_s" in r else ""))
+    return tabulate(rows, headers=["case", "median (s)", "p90 (s)", "MB/s", "ops/s"])
+
+
+def format_comparison(rows, baseline_metadata=None):
+    lines = []
+    if baseline_metadata is not None:
+        lines.append(f"Baseline: pyxet {baseline_metadata.get('pyxet_version')} "
+                     f"at {baseline_metadata.get('timestamp')} on {baseline_metadata.get('endpoint')}")
+    table = []
+    for name, base, cur, change, status in rows:
+        table.append((name,
+                      "" if base is None else f"{base:.4f}",
+                      "" if cur is None else f"{cur:.4f}",
+                      "" if change is None else f"{change * 100:+.1f}%",
+                      status))
+    lines.append(tabulate(table, headers=["case", "baseline (s)", "current (s)", "change", "status"]))
+    return "\n".join(lines)
@@ -0,0 +1,122 @@
+"""
+Runs the pyxet benchmarks and compares the results against a stored baseline.
+
+Against the local stand-in backend (no credentials needed):
+
+    python benchmarks/run_benchmarks.py --output benchmarks/baselines/local.json
+
+Against a real endpoint, using a scratch branch of an existing repository:
+
+    python benchmarks/run_benchmarks.py --repo xethub.com:user/repo --baseline benchmarks/baselines/xethub.json
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+
+import pyxet
+from pyxet.local_backend import LOCAL_BACKEND_ENDPOINT, LOCAL_BACKEND_ROOT_ENV
+from pyxet.url_parsing import parse_url
+
+from cases import SCALES, BenchmarkContext, prepare_fixtures, make_cases
+from harness import (DEFAULT_REGRESSION_THRESHOLD, run_case, environment_metadata, save_results,
+                     load_results, compare_results, format_results, format_comparison)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Run the pyxet benchmarks.")
+    parser.add_argument("--repo", default=None,
+                        help="Repository to benchmark against, as <endpoint>:<user>/<repo>. "
+                             f"Defaults to a new repository on the {LOCAL_BACKEND_ENDPOINT} backend.")
+    parser.add_argument("--base-branch", default="main",
+                        help="Branch the scratch branch is created from.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small",
+                        help="Size of the generated data.")
+    parser.add_argument("--cases", default=None,
+                        help="Comma separated list of cases to run. Defaults to all.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per case.")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed repetitions per case.")
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this path.")
+    parser.add_argument("--baseline", default=None, help="Compare the results against this JSON baseline.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Fractional slowdown of the median reported as a regression.")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 if any case regressed against the baseline.")
+    parser.add_argument("--keep-branch", action="store_true",
+                        help="Do not delete the scratch branch afterwards.")
+    return parser.parse_args(argv)
+
+
+def _setup_repo(args):
+    """
+    Returns (fs, repo, local_root).  Without --repo, a repository is created on
+    the local backend; if XET_LOCAL_BACKEND_ROOT is unset, it is kept in a
+    temporary directory returned as local_root.
+    """
+    if args.repo is None:
+        local_root = None
+        if LOCAL_BACKEND_ROOT_ENV not in os.environ:
+            local_root = os.environ[LOCAL_BACKEND_ROOT_ENV] = tempfile.mkdtemp(prefix="pyxet_bench_repos_")
+        fs = pyxet.XetFS(LOCAL_BACKEND_ENDPOINT)
+        repo = f"{LOCAL_BACKEND_ENDPOINT}:{fs.get_username()}/bench_{uuid.uuid4().hex[:8]}"
+        fs.make_repo(f"xet://{repo}")
+        return fs, repo, local_root
+
+    repo_info = parse_url(args.repo, expect_branch=False)
+    fs = pyxet.XetFS(repo_info.endpoint)
+    return fs, f"{repo_info.endpoint}:{repo_info.user}/{repo_info.repo}", None
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    params = dict(SCALES[args.scale])
+
+    fs, repo, local_root = _setup_repo(args)
+    branch = f"bench-{uuid.uuid4().hex[:8]}"
+    fs.make_branch(repo, args.base_branch, branch)
+    print(f"Benchmarking against xet://{repo}/{branch}", file=sys.stderr)
+
+    ctx = BenchmarkContext(fs, repo, branch, params)
+    results = {}
+    try:
+        prepare_fixtures(ctx)
+        cases = make_cases(ctx)
+        if args.cases is not None:
+            selected = set(args.cases.split(","))
+            unknown = selected - {c.name for c in cases}
+            if unknown:
+                raise ValueError(f"Unknown benchmark cases: {', '.join(sorted(unknown))}")
+            cases = [c for c in cases if c.name in selected]
+
+        for case in cases:
+            print(f"Running {case.name}", file=sys.stderr)
+            results[case.name] = run_case(case, args.repeat, args.warmup)
+    finally:
+        ctx.cleanup()
+        if local_root is not None:
+            shutil.rmtree(local_root, ignore_errors=True)
+        elif not args.keep_branch:
+            fs.delete_branch(repo, branch)
+
+    params.update(scale=args.scale, repeat=args.repeat, warmup=args.warmup)
+    metadata = environment_metadata(fs.endpoint, params)
+    print(format_results(results))
+
+    if args.output is not None:
+        save_results(args.output, metadata, results)
+        print(f"Results written to {args.output}")
+
+    if args.baseline is not None:
+        baseline = load_results(args.baseline)
+        rows = compare_results(baseline, {"metadata": metadata, "results": results}, args.threshold)
+        print()
+        print(format_comparison(rows, baseline["metadata"]))
+        if args.fail_on_regression and any(row[4] == "regression" for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
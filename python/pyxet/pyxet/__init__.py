@@ -2,6 +2,7 @@ from .file_system import open, login, XetFS, XetFSOpenFlags
 from .version import __version__
 from .cli import PyxetCLI, BranchCLI, RepoCLI
 from .commit_transaction import MultiCommitTransaction
+from .stats import stats, reset_stats, set_progress_callback
 
 """
 PyXet
@@ -0,0 +1,423 @@
+"""
+Provides an asyncio interface to xet repositories
+"""
+import asyncio
+import contextlib
+import contextvars
+import datetime
+import json
+import os
+
+from fsspec.asyn import AsyncFileSystem
+
+from .commit_transaction import _validate_repo_info_for_transaction, repo_info_key, TRANSACTION_FILE_LIMIT
+from .file_system import _repo_manager, XetFS
+from .url_parsing import parse_url, get_default_endpoint
+from .util import CHUNK_SIZE
+
+
+# The implicit transaction of an AsyncXetFS write, inherited by the tasks it
+# spawns (e.g. the per-file writes of _pipe) but not by concurrent writes.
+_implicit_transaction = contextvars.ContextVar("pyxet_implicit_transaction", default=None)
+
+
+async def _call(obj, method, *args):
+    """
+    Awaits the native async version of `method` when the bindings provide one,
+    and otherwise runs the blocking version in the default executor.
+    """
+    fn = getattr(obj, method + "_async", None)
+    if fn is not None:
+        return await fn(*args)
+    return await asyncio.get_running_loop().run_in_executor(None, getattr(obj, method), *args)
+
+
+def _entry_info(name, attr):
+    return {"name": name,
+            "size": attr.size,
+            "type": attr.ftype,
+            "last_modified": None if len(attr.last_modified) == 0 else attr.last_modified,
+            "content_hash": None if len(attr.content_hash) == 0 else attr.content_hash}
+
+
+class AsyncXetFile:
+    """
+    An async handle to a file in a Xet repo, returned by `XetClient.open()`.
+
+    Reads are positional on the Rust side, so many reads of one file, or of
+    many files, can be in flight at once without a thread each.
+    """
+
+    def __init__(self, handle, write_handle=None):
+        self.handle = handle
+        self.write_handle = write_handle
+        self._pos = 0
+        self._size = None
+        if write_handle is None:
+            self._size = handle.seek(0, 2)
+            handle.seek(0, 0)
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def closed(self):
+        return self.handle.is_closed()
+
+    def readable(self):
+        return self.write_handle is None
+
+    def writable(self):
+        return self.write_handle is not None
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=0):
+        if not self.readable():
+            raise RuntimeError("Seek not supported")
+        if whence == 0:
+            pos = offset
+        elif whence == 1:
+            pos = self._pos + offset
+        elif whence == 2:
+            pos = self._size + offset
+        else:
+            raise ValueError("Invalid Seek Whence")
+        self._pos = min(max(pos, 0), self._size)
+        return self._pos
+
+    async def read_at(self, offset, size):
+        """
+        Reads up to `size` bytes at `offset` without moving the file position.
+        """
+        if not self.readable():
+            raise RuntimeError("Read not supported")
+        return await _call(self.handle, "read_at", offset, size)
+
+    async def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._size - self._pos
+        data = await self.read_at(self._pos, size)
+        self._pos += len(data)
+        return data
+
+    async def write(self, data):
+        if not self.writable():
+            raise ValueError("File not in write mode")
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        await _call(self.handle, "write", data)
+
+    async def close(self):
+        if not self.closed:
+            await _call(self.handle, "close")
+        if self.write_handle is not None:
+            write_handle, self.write_handle = self.write_handle, None
+            await _call(write_handle, "close")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class AsyncTransaction:
+    """
+    An async commit transaction across any number of repository branches.
+    Use through `XetClient.transaction()`::
+
+        async with client.transaction("add files"):
+            async with await client.open('user/repo/main/hello.txt', 'wb') as f:
+                await f.write(b'hello world')
+
+    Each branch written is committed when the context exits without an
+    exception, and canceled otherwise.  As with `fs.transaction`, a branch is
+    also committed each time TRANSACTION_FILE_LIMIT files have been written to it.
+    """
+
+    def __init__(self, client, commit_message=None):
+        self.client = client
+        if commit_message is None:
+            commit_message = "Commit " + datetime.datetime.now().isoformat()
+        self.commit_message = commit_message
+        self._transaction_pool = {}
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        if self.client._transaction is not None:
+            raise RuntimeError("Transaction already in progress")
+        self.client._transaction = self
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.complete(commit=exc_type is None)
+
+    async def _access_token(self, repo_info):
+        _validate_repo_info_for_transaction(repo_info)
+        async with self._lock:
+            key = repo_info_key(repo_info)
+            tr = self._transaction_pool.get(key)
+            if tr is None:
+                repo = await self.client._get_repo(repo_info.remote())
+                tr = await _call(repo, "begin_write_transaction", repo_info.branch, self.commit_message)
+                self._transaction_pool[key] = tr
+            elif await _call(tr, "transaction_size") >= TRANSACTION_FILE_LIMIT:
+                await _call(tr, "commit_and_restart")
+            return tr.create_access_token()
+
+    async def open_for_write(self, repo_info):
+        token = await self._access_token(repo_info)
+        handle = await _call(token, "open_for_write", repo_info.path)
+        return AsyncXetFile(handle, write_handle=token)
+
+    async def complete(self, commit=True):
+        """
+        Commits, or cancels, the changes to every branch written.
+        """
+        async with self._lock:
+            pool = self._transaction_pool
+            self._transaction_pool = {}
+            if self.client._transaction is self:
+                self.client._transaction = None
+            results = await asyncio.gather(*[_call(tr, "complete", commit) for tr in pool.values()],
+                                           return_exceptions=True)
+        for e in results:
+            if isinstance(e, BaseException):
+                raise e
+
+
+class XetClient:
+    """
+    An asyncio interface to the repositories on a xet endpoint::
+
+        client = pyxet.aio.XetClient('xethub.com')
+        entries = await client.ls('XetHub/Flickr30k/main')
+        async with await client.open('XetHub/Flickr30k/main/results.csv') as f:
+            data = await f.read()
+
+    The calls do not block the event loop or occupy a thread while in flight,
+    so thousands of them can run concurrently on one loop.
+    """
+
+    def __init__(self, endpoint=None):
+        if endpoint is None:
+            endpoint = get_default_endpoint()
+        self.endpoint = endpoint
+        self._transaction = None
+
+    def __repr__(self):
+        return f"XetClient(endpoint = {self.endpoint})"
+
+    @property
+    def _manager(self):
+        return _repo_manager(self.endpoint)
+
+    async def _get_repo(self, remote):
+        return await _call(self._manager, "get_repo", remote)
+
+    async def _api_query(self, remote, op, http_command, body):
+        return json.loads(bytes(await _call(self._manager, "api_query", remote, op, http_command, body)))
+
+    async def info(self, url):
+        """
+        Returns information about a path `user/repo/branch/[path]`
+        or `xet://[endpoint:]<user>/<repo>/<branch>/[path]`
+        """
+        url_path = parse_url(url, self.endpoint, expect_branch=True)
+        attr = await _call(self._manager, "stat", url_path.remote(), url_path.branch, url_path.path)
+        if attr is None:
+            raise FileNotFoundError(f"File not found {url}")
+        return _entry_info(url_path.name(), attr)
+
+    async def exists(self, url):
+        try:
+            await self.info(url)
+            return True
+        except FileNotFoundError:
+            return False
+
+    async def ls(self, url, detail=True):
+        """
+        Lists the repos of a user, the branches of a repo or the entries of a
+        directory, with the same results as `XetFS.ls`.
+        """
+        url_path = parse_url(url, self.endpoint, expect_branch=None, expect_repo=None)
+
+        if url_path.repo == "":
+            res = await self._api_query(url_path.remote(endpoint_only=True), "", "get", "")
+            names = [f['full_name'] for f in res]
+            if url_path.user != "":
+                names = [n for n in names if n.startswith(url_path.user)]
+            ret = [{'name': url_path.endpoint + ":" + n, 'type': 'repo'} for n in names]
+        elif url_path.branch == "":
+            res = await self._api_query(url_path.remote(), "branches", "get", "")
+            ret = [{'name': url_path.base_path() + r['name'], 'type': 'branch'} for r in res]
+        else:
+            files, file_info = await _call(self._manager, "listdir",
+                                           url_path.remote(), url_path.branch, url_path.path)
+            ret = [_entry_info(url_path.base_path() + "/" + fname, finfo)
+                   for fname, finfo in zip(files, file_info)]
+
+        if detail:
+            return ret
+        return [r['name'] for r in ret]
+
+    async def open(self, url, mode="rb"):
+        """
+        Opens a file for reading, or for writing within a transaction.
+        Returns an `AsyncXetFile`.
+        """
+        url_path = parse_url(url, self.endpoint)
+        if mode.startswith('r'):
+            repo = await self._get_repo(url_path.remote())
+            handle = await _call(repo, "open_for_read", url_path.branch, url_path.path)
+            return AsyncXetFile(handle)
+        elif mode.startswith('w'):
+            if self._transaction is None:
+                raise RuntimeError("Write only allowed in the context of a commit transaction."
+                                   "Use `async with client.transaction([commit_message]):` to enable write access.")
+            return await self._transaction.open_for_write(url_path)
+        else:
+            raise ValueError(f"Mode '{mode}' not supported.")
+
+    async def cat(self, url):
+        """
+        Returns the contents of a file.
+        """
+        async with await self.open(url) as f:
+            return await f.read()
+
+    def transaction(self, commit_message=None):
+        """
+        Returns an `AsyncTransaction` to use with `async with`; writes made
+        within it are committed together when it exits.
+        """
+        return AsyncTransaction(self, commit_message)
+
+
+class AsyncXetFS(AsyncFileSystem):
+    """
+    An fsspec async file system over xet repositories, built on `XetClient`.
+
+    fsspec's batched operations run concurrently on it, so for example
+    `fs.cat(list_of_paths)`, `fs.get(...)` and Dask or xarray batch fetches
+    issue their requests together instead of one after another::
+
+        fs = pyxet.aio.AsyncXetFS('xethub.com')
+        contents = fs.cat(['XetHub/Flickr30k/main/a.json', 'XetHub/Flickr30k/main/b.json'])
+
+    `pipe` and `put` commit everything they write in one commit, or add it
+    to the client's active transaction.  Files can be opened for reading only;
+    use `XetFS` to write through file handles.
+    """
+    protocol = "xet"
+    sep = "/"
+    root_marker = "/"
+
+    def __init__(self, endpoint=None, **kwargs):
+        super().__init__(**kwargs)
+        self.client = XetClient(endpoint)
+        self.endpoint = self.client.endpoint
+
+    def __repr__(self):
+        return f"AsyncXetFS(endpoint = {self.endpoint})"
+
+    @classmethod
+    def _strip_protocol(cls, path):
+        return XetFS._strip_protocol(path)
+
+    def unstrip_protocol(self, name):
+        return 'xet://' + name.lstrip('/')
+
+    @contextlib.asynccontextmanager
+    async def _write_transaction(self, message):
+        """
+        Uses the transaction of the enclosing write or the client's active
+        transaction, or else one of its own which is committed on exit.
+        Concurrent writes outside a transaction each get their own.
+        """
+        tr = _implicit_transaction.get() or self.client._transaction
+        if tr is not None:
+            yield tr
+            return
+
+        tr = AsyncTransaction(self.client, message)
+        token = _implicit_transaction.set(tr)
+        try:
+            yield tr
+        except BaseException:
+            await tr.complete(commit=False)
+            raise
+        else:
+            await tr.complete(commit=True)
+        finally:
+            _implicit_transaction.reset(token)
+
+    async def _ls(self, path, detail=True, **kwargs):
+        return await self.client.ls(path, detail=detail)
+
+    async def _info(self, path, **kwargs):
+        return await self.client.info(path)
+
+    async def _isdir(self, path):
+        try:
+            return (await self._info(path))["type"] in ("directory", "branch")
+        except OSError:
+            return False
+
+    async def _makedirs(self, path, exist_ok=False):
+        """Noop. Empty directories cannot be created"""
+        pass
+
+    async def _cat_file(self, path, start=None, end=None, **kwargs):
+        async with await self.client.open(path) as f:
+            size = f.size
+            start = 0 if start is None else (max(size + start, 0) if start < 0 else start)
+            end = size if end is None else (max(size + end, 0) if end < 0 else min(end, size))
+            if start >= end:
+                return b""
+            return await f.read_at(start, end - start)
+
+    async def _pipe_file(self, path, value, **kwargs):
+        async with self._write_transaction(f"pipe {path}") as tr:
+            async with await tr.open_for_write(parse_url(path, self.endpoint)) as f:
+                await f.write(value)
+
+    async def _pipe(self, path, value=None, **kwargs):
+        paths = [path] if isinstance(path, str) else list(path)
+        async with self._write_transaction(f"pipe {len(paths)} files"):
+            return await super()._pipe(path, value, **kwargs)
+
+    async def _get_file(self, rpath, lpath, **kwargs):
+        if await self._isdir(rpath):
+            os.makedirs(lpath, exist_ok=True)
+            return
+        async with await self.client.open(rpath) as f:
+            with open(lpath, "wb") as out:
+                while True:
+                    data = await f.read(CHUNK_SIZE)
+                    if len(data) == 0:
+                        break
+                    out.write(data)
+
+    async def _put_file(self, lpath, rpath, **kwargs):
+        async with self._write_transaction(f"put {rpath}") as tr:
+            async with await tr.open_for_write(parse_url(rpath, self.endpoint)) as f:
+                with open(lpath, "rb") as src:
+                    while True:
+                        data = src.read(CHUNK_SIZE)
+                        if len(data) == 0:
+                            break
+                        await f.write(data)
+
+    async def _put(self, lpath, rpath, **kwargs):
+        async with self._write_transaction(f"put {lpath} to {rpath}"):
+            return await super()._put(lpath, rpath, **kwargs)
+
+    def _open(self, path, mode="rb", **kwargs):
+        if not mode.startswith('r'):
+            raise ValueError("AsyncXetFS opens files for reading only; use XetFS to write files.")
+        return XetFS(self.endpoint)._open(path, mode=mode, **kwargs)
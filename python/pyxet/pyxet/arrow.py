@@ -0,0 +1,242 @@
+"""
+Provides a pyarrow file system reading Xet repositories through the xet bindings
+"""
+import io
+import posixpath
+import threading
+from datetime import datetime
+
+try:
+    import pyarrow as pa
+    from pyarrow.fs import FileInfo, FileSystemHandler, FileType, PyFileSystem
+except ImportError:
+    raise ImportError("pyxet.arrow requires the pyarrow package")
+
+from .file_system import XetFS
+from .url_parsing import parse_url
+from .util import _parallel_find
+
+_FILE_TYPES = {'file': FileType.File,
+               'directory': FileType.Directory,
+               'branch': FileType.Directory,
+               'repo': FileType.Directory}
+
+
+def _mtime(info):
+    last_modified = info.get('last_modified')
+    if not last_modified:
+        return None
+    try:
+        return datetime.fromisoformat(last_modified.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def _file_info(path, info):
+    ftype = _FILE_TYPES.get(info['type'], FileType.Unknown)
+    size = info.get('size') if ftype == FileType.File else None
+    return FileInfo(path, ftype, mtime=_mtime(info), size=size)
+
+
+class XetRandomAccessFile:
+    """
+    A read-only, seekable file over a xet read handle, served by positional
+    reads so that a seek costs nothing.  `read_at` is safe to call from
+    several threads at once, but pyarrow.PythonFile, which wraps this file
+    for Arrow, serializes its reads with a lock and seek + read.
+    """
+
+    def __init__(self, handle):
+        self._handle = handle
+        self._size = handle.seek(0, io.SEEK_END)
+        self._pos = 0
+        self._lock = threading.Lock()
+
+    @property
+    def closed(self):
+        return self._handle.is_closed()
+
+    def close(self):
+        if not self.closed:
+            self._handle.close()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def writable(self):
+        return False
+
+    def size(self):
+        return self._size
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError("Unexpected value for whence")
+        if pos < 0:
+            raise ValueError("Negative seek position")
+        self._pos = pos
+        return pos
+
+    def read_at(self, offset, size):
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        return self._handle.read_at(offset, size)
+
+    def read(self, size=-1):
+        with self._lock:
+            if size is None or size < 0:
+                size = max(self._size - self._pos, 0)
+            data = self.read_at(self._pos, size)
+            self._pos += len(data)
+            return data
+
+    def readall(self):
+        return self.read(-1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class XetFileSystemHandler(FileSystemHandler):
+    """
+    A pyarrow.fs.FileSystemHandler for Xet repositories, for use through
+    `pyarrow.fs.PyFileSystem` or `pyxet.arrow.filesystem()`.
+
+    Reads go directly to the xet bindings rather than through the fsspec
+    file wrapper, and recursive listings of a directory are split across
+    threads.  Arrow reads different files concurrently, but reads of one
+    file are serialized by pyarrow.PythonFile; `pyxet.parquet` fetches the
+    column chunks of one file concurrently.  Writes, deletes, moves and
+    copies go through `fs` and must be made within its transaction.
+    """
+
+    def __init__(self, fs):
+        super().__init__()
+        self.fs = fs
+
+    def __eq__(self, other):
+        if isinstance(other, XetFileSystemHandler):
+            return self.fs.endpoint == other.fs.endpoint
+        return NotImplemented
+
+    def __ne__(self, other):
+        if isinstance(other, XetFileSystemHandler):
+            return self.fs.endpoint != other.fs.endpoint
+        return NotImplemented
+
+    def get_type_name(self):
+        return "xet"
+
+    def normalize_path(self, path):
+        return self.fs._strip_protocol(path)
+
+    def get_file_info(self, paths):
+        infos = []
+        for path in paths:
+            try:
+                infos.append(_file_info(path, self.fs.info(path)))
+            except FileNotFoundError:
+                infos.append(FileInfo(path, FileType.NotFound))
+        return infos
+
+    def get_file_info_selector(self, selector):
+        base = selector.base_dir.rstrip('/')
+        try:
+            base_info = self.fs.info(base)
+        except FileNotFoundError:
+            if selector.allow_not_found:
+                return []
+            raise FileNotFoundError(f"Directory not found {selector.base_dir}")
+        if _FILE_TYPES.get(base_info['type']) != FileType.Directory:
+            raise NotADirectoryError(f"Not a directory {selector.base_dir}")
+
+        if not selector.recursive:
+            return [_file_info(info['name'], info) for info in self.fs.ls(base, detail=True)]
+
+        # Xet has no empty directories, so every directory is the parent of a file.
+        infos = []
+        dirs = set()
+        for path, info in _parallel_find(self.fs, base):
+            infos.append(_file_info(path, info))
+            parent = posixpath.dirname(path)
+            while len(parent) > len(base) and parent not in dirs:
+                dirs.add(parent)
+                parent = posixpath.dirname(parent)
+        infos.extend(FileInfo(d, FileType.Directory) for d in sorted(dirs))
+        return infos
+
+    def create_dir(self, path, recursive):
+        # Directories exist implicitly when files are written in them.
+        pass
+
+    def _delete_tree(self, path):
+        files = [p for p, _ in _parallel_find(self.fs, path)]
+        if files:
+            self.fs.rm(files)
+
+    def delete_dir(self, path):
+        self._delete_tree(path)
+
+    def delete_dir_contents(self, path, missing_dir_ok=False):
+        if not self.fs.exists(path):
+            if missing_dir_ok:
+                return
+            raise FileNotFoundError(f"Directory not found {path}")
+        self._delete_tree(path)
+
+    def delete_root_dir_contents(self):
+        raise pa.ArrowNotImplementedError("Deleting the root of a Xet file system is not supported")
+
+    def delete_file(self, path):
+        self.fs.rm(path)
+
+    def move(self, src, dest):
+        self.fs.mv(src, dest)
+
+    def copy_file(self, src, dest):
+        self.fs.cp_file(src, dest)
+
+    def _open_for_read(self, path):
+        url_path = parse_url(path, self.fs.endpoint)
+        repo = self.fs._manager.get_repo(url_path.remote())
+        return XetRandomAccessFile(repo.open_for_read(url_path.branch, url_path.path))
+
+    def open_input_stream(self, path):
+        return pa.PythonFile(self._open_for_read(path), mode="r")
+
+    def open_input_file(self, path):
+        return pa.PythonFile(self._open_for_read(path), mode="r")
+
+    def open_output_stream(self, path, metadata):
+        return pa.PythonFile(self.fs.open(path, "wb"), mode="w")
+
+    def open_append_stream(self, path, metadata):
+        raise pa.ArrowNotImplementedError("Appending to files is not supported")
+
+
+def filesystem(endpoint=None):
+    """
+    Returns a pyarrow file system for the Xet repositories at `endpoint`::
+
+        import pyarrow.dataset as ds
+        import pyxet.arrow
+
+        dataset = ds.dataset('XetHub/titanic/main/titanic.parquet',
+                             filesystem=pyxet.arrow.filesystem('xethub.com'))
+    """
+    return PyFileSystem(XetFileSystemHandler(XetFS(endpoint)))
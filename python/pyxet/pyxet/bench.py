@@ -0,0 +1,206 @@
+"""
+Provides latency and throughput diagnostics against a xet repository for `xet bench`
+"""
+import os
+import posixpath
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .file_system import XetFS
+from .url_parsing import parse_url
+from .util import CHUNK_SIZE
+
+if 'SPHINX_BUILD' not in os.environ:
+    from .rpyxet import rpyxet
+
+BENCH_LATENCY_SAMPLES = 20
+BENCH_STREAM_COUNTS = [1, 4, 16]
+BENCH_MAX_READ_BYTES = 256 * 1024 * 1024
+BENCH_UPLOAD_BYTES = 64 * 1024 * 1024
+BENCH_UPLOAD_MODES = ['dry-run', 'scratch-branch', 'none']
+
+MB = 1024 * 1024
+
+
+def _row(test, value, unit, streams=None, detail=""):
+    return {'test': test, 'streams': streams, 'value': round(value, 3), 'unit': unit, 'detail': detail}
+
+
+def _latency_rows(test, samples, detail):
+    samples = sorted(samples)
+    p90 = samples[min(len(samples) - 1, int(round(0.9 * (len(samples) - 1))))]
+    detail = f"{len(samples)} samples{detail}"
+    return [_row(f"{test} latency (median)", statistics.median(samples) * 1000, "ms", detail=detail),
+            _row(f"{test} latency (p90)", p90 * 1000, "ms", detail=detail)]
+
+
+class XetBench:
+    """
+    Measures, against a xet path:
+
+    - round trip latency of stat and listdir calls,
+    - read throughput of a file with one stream and with several concurrent
+      streams over disjoint ranges of it,
+    - upload throughput with one or several concurrent writers, either into a
+      transaction that is not committed ('dry-run') or into a temporary branch
+      that is deleted afterwards ('scratch-branch').
+
+    `run()` returns a list of result rows.
+    """
+
+    def __init__(self, url, samples=BENCH_LATENCY_SAMPLES, streams=None,
+                 max_read_bytes=BENCH_MAX_READ_BYTES, upload_bytes=BENCH_UPLOAD_BYTES,
+                 upload_mode='dry-run'):
+        if upload_mode not in BENCH_UPLOAD_MODES:
+            raise ValueError(f"Upload mode must be one of {', '.join(BENCH_UPLOAD_MODES)}")
+        self._url = parse_url(url, expect_branch=True)
+        if len(self._url.branch) == 0:
+            raise ValueError("A branch must be specified: xet://<endpoint>:<user>/<repo>/<branch>[/path]")
+        self._repo_url = f"xet://{self._url.endpoint}:{self._url.user}/{self._url.repo}"
+        self._fs = XetFS(self._url.endpoint)
+        self._manager = self._fs._manager
+        self._samples = samples
+        self._streams = BENCH_STREAM_COUNTS if streams is None else streams
+        self._max_read_bytes = max_read_bytes
+        self._upload_bytes = upload_bytes
+        self._upload_mode = upload_mode
+
+    def run(self):
+        rows = []
+        rows.extend(self._bench_metadata())
+        rows.extend(self._bench_reads())
+        if self._upload_mode != 'none':
+            rows.extend(self._bench_uploads())
+        return rows
+
+    def _bench_metadata(self):
+        remote, branch, path = self._url.remote(), self._url.branch, self._url.path
+        attr = self._manager.stat(remote, branch, path)
+        if attr is None:
+            raise FileNotFoundError(f"{self._url.url()} not found")
+        list_path = path if attr.ftype in ('directory', 'branch') else posixpath.dirname(path)
+
+        stat_times = []
+        listdir_times = []
+        entries = 0
+        for _ in range(self._samples):
+            start = time.perf_counter()
+            self._manager.stat(remote, branch, path)
+            stat_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            names, _ = self._manager.listdir(remote, branch, list_path)
+            listdir_times.append(time.perf_counter() - start)
+            entries = len(names)
+
+        return (_latency_rows("stat", stat_times, "")
+                + _latency_rows("listdir", listdir_times, f", {entries} entries"))
+
+    def _find_read_target(self):
+        """
+        Returns (path, size) of the file to read: the given path if it is a file,
+        otherwise the largest file directly below it.
+        """
+        remote, branch, path = self._url.remote(), self._url.branch, self._url.path
+        attr = self._manager.stat(remote, branch, path)
+        if attr.ftype == 'file':
+            return path, attr.size
+
+        names, attrs = self._manager.listdir(remote, branch, path)
+        files = [(name, a.size) for name, a in zip(names, attrs) if a.ftype == 'file']
+        if len(files) == 0:
+            return None, 0
+        return max(files, key=lambda f: f[1])
+
+    def _read_range(self, path, offset, length, progress_reporter):
+        handle = self._manager.get_repo(self._url.remote()).open_for_read(self._url.branch, path)
+        try:
+            handle.seek(offset, 0)
+            remaining = length
+            while remaining > 0:
+                data = handle.read(min(remaining, CHUNK_SIZE))
+                if len(data) == 0:
+                    break
+                remaining -= len(data)
+                progress_reporter.register_progress(None, len(data))
+            return length - remaining
+        finally:
+            handle.close()
+
+    def _bench_reads(self):
+        path, size = self._find_read_target()
+        if path is None:
+            print(f"No file found at {self._url.url()}; skipping read tests", file=sys.stderr)
+            return []
+        size = min(size, self._max_read_bytes)
+        if size == 0:
+            print(f"{path} is empty; skipping read tests", file=sys.stderr)
+            return []
+
+        rows = []
+        for streams in self._streams:
+            part = (size + streams - 1) // streams
+            ranges = [(offset, min(part, size - offset)) for offset in range(0, size, part)]
+            progress_reporter = rpyxet.PyProgressReporter(f"Reading {path} with {streams} streams", 0, size)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=streams) as executor:
+                total = sum(executor.map(lambda r: self._read_range(path, r[0], r[1], progress_reporter),
+                                         ranges))
+            elapsed = time.perf_counter() - start
+            progress_reporter.finalize()
+            rows.append(_row("read throughput", total / MB / elapsed, "MB/s", streams,
+                             f"{total // MB} MB of {path}"))
+        return rows
+
+    def _bench_uploads(self):
+        branch = self._url.branch
+        scratch_branch = None
+        if self._upload_mode == 'scratch-branch':
+            scratch_branch = f"xet-bench-{uuid.uuid4().hex[:8]}"
+            self._fs.make_branch(self._repo_url, branch, scratch_branch)
+            branch = scratch_branch
+
+        rows = []
+        try:
+            for streams in self._streams:
+                # Fresh random data, so no run is deduplicated against an earlier one.
+                data = os.urandom(self._upload_bytes)
+                rows.append(self._bench_upload(branch, data, streams))
+        finally:
+            if scratch_branch is not None:
+                self._fs.delete_branch(self._repo_url, scratch_branch)
+        return rows
+
+    def _bench_upload(self, branch, data, streams):
+        prefix = f"{self._repo_url}/{branch}/xet-bench/{uuid.uuid4().hex}"
+        part = (len(data) + streams - 1) // streams
+        progress_reporter = rpyxet.PyProgressReporter(f"Uploading with {streams} streams", streams, len(data))
+
+        def write(i):
+            chunk = memoryview(data)[i * part:(i + 1) * part]
+            with self._fs.open(f"{prefix}/{i}.bin", 'wb') as f:
+                for offset in range(0, len(chunk), CHUNK_SIZE):
+                    f.write(bytes(chunk[offset:offset + CHUNK_SIZE]))
+                    progress_reporter.register_progress(None, min(CHUNK_SIZE, len(chunk) - offset))
+            progress_reporter.register_progress(1, None)
+
+        dry_run = self._upload_mode == 'dry-run'
+        start = time.perf_counter()
+        self._fs.start_transaction(f"xet bench upload with {streams} streams")
+        try:
+            with ThreadPoolExecutor(max_workers=streams) as executor:
+                list(executor.map(write, range(streams)))
+            if dry_run:
+                self._fs.transaction._set_do_not_commit()
+        except Exception:
+            self._fs.cancel_transaction()
+            raise
+        self._fs.end_transaction()
+        elapsed = time.perf_counter() - start
+        progress_reporter.finalize()
+
+        detail = f"{len(data) // MB} MB, " + ("not committed" if dry_run else f"committed to {branch}")
+        return _row("upload throughput", len(data) / MB / elapsed, "MB/s", streams, detail)
@@ -1,3 +1,4 @@
+import json
 import os
 import subprocess
 import sys
@@ -10,8 +11,10 @@ from tabulate import tabulate
 from typing_extensions import Annotated
 
 from . import util
+from .bench import XetBench, BENCH_LATENCY_SAMPLES, BENCH_MAX_READ_BYTES, BENCH_UPLOAD_BYTES
 from .file_system import XetFS
 from .sync import SyncCommand
+from .sync_watch import WatchSync, WATCH_DEBOUNCE_SECONDS, WATCH_MAX_BATCH_FILES
 from .url_parsing import parse_url
 from .util import _get_fs_and_path, CHUNK_SIZE
 from .file_operations import perform_copy
@@ -124,39 +127,65 @@ class PyxetCLI:
            message: Annotated[
                str, typer.Option("--message", "-m", help="A commit message")] = "",
            parallel: Annotated[
-               int, typer.Option("--parallel", "-p", help="Maximum amount of parallelism")] = 32):
+               int, typer.Option("--parallel", "-p", help="Maximum amount of parallelism")] = 32,
+           s3_part_size: Annotated[
+               int, typer.Option("--s3-part-size", help="Part size in MB for multipart uploads to S3")] = 64,
+           s3_concurrency: Annotated[
+               int, typer.Option("--s3-concurrency", help="Maximum number of parts of a file uploaded to S3 at once")] = 8):
         """copy files and folders"""
         if len(source) == 0:
             raise ValueError("Empty source list")
         if not message:
             message = f"copy {', '.join(source[:3])}... to {target}" if not recursive else f"copy {', '.join(source[:3])}... to {target} recursively"
         util.MAX_CONCURRENT_COPIES = threading.Semaphore(parallel)
-        perform_copy(source, target, message, recursive=recursive)
+        perform_copy(source, target, message, recursive=recursive,
+                     s3_part_size=s3_part_size * 1024 * 1024, s3_concurrency=s3_concurrency)
 
     @staticmethod
     @cli.command()
     def sync(source: Annotated[str, typer.Argument(help="Source folder to sync")],
              target: Annotated[str, typer.Argument(help="Target location of the folder")],
              use_mtime: Annotated[bool, typer.Option("--use-mtime", help="Use mtime as criteria for sync")] = False,
+             checksum: Annotated[bool, typer.Option("--checksum", help="Use content hashes as criteria for sync")] = False,
+             delete: Annotated[bool, typer.Option("--delete", help="Delete target files that do not exist in the source")] = False,
+             watch: Annotated[bool, typer.Option("--watch", help="Keep watching a local source and commit changes in batches")] = False,
+             watch_debounce: Annotated[float, typer.Option("--watch-debounce", help="Seconds without changes before a batch is committed")] = WATCH_DEBOUNCE_SECONDS,
+             watch_batch_files: Annotated[int, typer.Option("--watch-batch-files", help="Maximum number of files in one watch batch")] = WATCH_MAX_BATCH_FILES,
              message: Annotated[str, typer.Option("--message", "-m", help="A commit message")] = "",
              update_size: Annotated[bool, typer.Option("--update-size", hidden=True, help="Update Xetea with the size of the remote bucket")] = False,
              parallel: Annotated[int, typer.Option("--parallel", "-p", help="Maximum amount of parallelism")] = 32,
              dryrun: Annotated[
                  bool, typer.Option("--dryrun",
-                                    help="Displays the operations that would be performed without actually running them")] = False):
+                                    help="Displays the operations that would be performed without actually running them")] = False,
+             manifest: Annotated[str, typer.Option("--manifest",
+                                                   help="Local file recording synced entries; later syncs skip unchanged entries")] = None,
+             reconcile: Annotated[bool, typer.Option("--reconcile",
+                                                     help="With --manifest, list the target in full and rebuild the manifest")] = False,
+             streaming: Annotated[bool, typer.Option("--streaming",
+                                                     help="Compare source and target listings incrementally with bounded memory")] = False):
         """Copy changed files from source to target"""
         if not message:
             message = f"sync {source} to {target}"
         util.MAX_CONCURRENT_COPIES = threading.Semaphore(parallel)
-        cmd = SyncCommand(source, target, use_mtime, message, dryrun, update_size)
+        cmd = SyncCommand(source, target, use_mtime, message, dryrun, update_size,
+                          manifest=manifest, reconcile=reconcile, streaming=streaming, checksum=checksum,
+                          delete=delete)
         print(f"Checking sync")
         cmd.validate()
+        if watch:
+            watcher = WatchSync(cmd, debounce=watch_debounce, max_batch_files=watch_batch_files)
+            watcher.validate()
+            print(f"Watching {source}; press Ctrl-C to stop")
+            watcher.run()
+            return
         print(f"Starting sync")
         if dryrun:
             print("This is a dryrun")
         stats = cmd.run()
         if not dryrun:
             print(f"Completed sync. Copied: {stats.copied} files, ignored: {stats.ignored} files")
+            if delete:
+                print(f"Deleted: {stats.deleted} files")
             if stats.failed > 0:
                 print(f"{stats.failed} entries failed to copy")
 
@@ -283,6 +312,35 @@ class PyxetCLI:
             print(f"{e}")
             return
 
+    @staticmethod
+    @cli.command()
+    def bench(uri: Annotated[str, typer.Argument(help="A URI in format xet://<endpoint>:<user>/<repo>/<branch>[/path]. Reads use this file, or the largest file in this folder")],
+              samples: Annotated[int, typer.Option(help="Number of stat and listdir calls to time")] = BENCH_LATENCY_SAMPLES,
+              streams: Annotated[str, typer.Option(help="Comma separated numbers of concurrent streams to measure reads and uploads with")] = "1,4,16",
+              max_read_mb: Annotated[int, typer.Option(help="Maximum number of megabytes to read per measurement")] = BENCH_MAX_READ_BYTES // (1024 * 1024),
+              upload_mb: Annotated[int, typer.Option(help="Number of megabytes to upload per measurement")] = BENCH_UPLOAD_BYTES // (1024 * 1024),
+              upload: Annotated[str, typer.Option(help="'dry-run' uploads without committing, 'scratch-branch' commits to a temporary branch that is deleted afterwards, 'none' skips uploads")] = "dry-run",
+              json_output: Annotated[bool, typer.Option("--json", help="Print the results as JSON")] = False):
+        """Measures latency and throughput against a repository"""
+        try:
+            stream_counts = [int(s) for s in streams.split(",")]
+            if any(s < 1 for s in stream_counts):
+                raise ValueError("Stream counts must be positive")
+            bench = XetBench(uri, samples=samples, streams=stream_counts,
+                             max_read_bytes=max_read_mb * 1024 * 1024,
+                             upload_bytes=upload_mb * 1024 * 1024,
+                             upload_mode=upload)
+            rows = bench.run()
+        except Exception as e:
+            print(f"{e}")
+            sys.exit(1)
+
+        if json_output:
+            print(json.dumps(rows, indent=2))
+        else:
+            print(tabulate(rows, headers="keys"))
+        return rows
+
     @staticmethod
     @cli.command()
     def duplicate(source: Annotated[str, typer.Argument(help="Origin repo to fork from")],
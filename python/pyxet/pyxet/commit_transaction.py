@@ -4,6 +4,7 @@ import threading
 import fsspec
 
 from .file_interface import XetFile
+from .tracing import span
 
 TRANSACTION_FILE_LIMIT = 512
 
@@ -113,7 +114,8 @@ class MultiCommitTransaction(fsspec.transaction.Transaction):
             ret_except = None
             for k, v in self._transaction_pool.items():
                 try:
-                    v.complete(commit)
+                    with span("transaction.commit", repo=k, commit=commit):
+                        v.complete(commit)
                 except Exception as e:
                     sys.stderr.write(f"Failed to commit {k}: {e}\n")
                     sys.stderr.flush()
@@ -152,6 +154,68 @@ class MultiCommitTransaction(fsspec.transaction.Transaction):
         handler = self.get_handler_for_repo_info(repo_info)
         handler.delete(repo_info.path)
 
+    def rm_many(self, repo_infos):
+        """
+        Removes many files, issuing one batched delete per repository branch.
+        repo_infos is a list of return values of `pyxet.parse_url(url)`
+        """
+        by_branch = {}
+        for repo_info in repo_infos:
+            _validate_repo_info_for_transaction(repo_info)
+            by_branch.setdefault(repo_info_key(repo_info), []).append(repo_info)
+
+        for infos in by_branch.values():
+            for i in range(0, len(infos), TRANSACTION_FILE_LIMIT):
+                batch = infos[i:i + TRANSACTION_FILE_LIMIT]
+                handler = self.get_handler_for_repo_info(batch[0])
+                try:
+                    handler.delete_many([repo_info.path for repo_info in batch])
+                finally:
+                    handler.close()
+
+    def pipe_many(self, files):
+        """
+        Writes many whole files, given as a list of (repo_info, bytes), with
+        one batched write per repository branch.
+        repo_info is the return value of `pyxet.parse_url(url)`
+        """
+        by_branch = {}
+        for repo_info, data in files:
+            _validate_repo_info_for_transaction(repo_info)
+            by_branch.setdefault(repo_info_key(repo_info), []).append((repo_info, data))
+
+        for entries in by_branch.values():
+            # Batches of at most TRANSACTION_FILE_LIMIT, so large writes are split
+            # across commits just like files written one at a time.
+            for i in range(0, len(entries), TRANSACTION_FILE_LIMIT):
+                batch = entries[i:i + TRANSACTION_FILE_LIMIT]
+                handler = self.get_handler_for_repo_info(batch[0][0])
+                try:
+                    handler.write_many([(repo_info.path, data) for repo_info, data in batch])
+                finally:
+                    handler.close()
+
+    def put_many(self, files):
+        """
+        Uploads many local files, given as a list of (repo_info, local_path),
+        with one batched upload per repository branch.
+        repo_info is the return value of `pyxet.parse_url(url)`
+        """
+        by_branch = {}
+        for repo_info, local_path in files:
+            _validate_repo_info_for_transaction(repo_info)
+            by_branch.setdefault(repo_info_key(repo_info), []).append((repo_info, local_path))
+
+        for entries in by_branch.values():
+            for i in range(0, len(entries), TRANSACTION_FILE_LIMIT):
+                batch = entries[i:i + TRANSACTION_FILE_LIMIT]
+                handler = self.get_handler_for_repo_info(batch[0][0])
+                try:
+                    handler.write_many_from_paths([(repo_info.path, local_path)
+                                                   for repo_info, local_path in batch])
+                finally:
+                    handler.close()
+
     def _set_do_not_commit(self):
         """
         Internal method for testing purposes.
@@ -1,20 +1,99 @@
 import io
 
+from .tracing import span
+from .url_parsing import parse_url
+
+
+class _LazyReadHandle:
+    """
+    Stands in for the read handle of an unpickled XetFile, opening the file
+    at `url` on first use and seeking to `pos`.
+    """
+
+    def __init__(self, url, flags, pos):
+        self._url = url
+        self._flags = flags
+        self._pos = pos
+        self._handle = None
+        self._closed = False
+
+    def _open(self):
+        if self._handle is None:
+            if self._closed:
+                raise ValueError("I/O operation on closed file.")
+            from .file_system import _repo_manager
+            url_info = parse_url(self._url, expect_branch=True)
+            repo = _repo_manager(url_info.endpoint).get_repo(url_info.remote())
+            if self._flags is not None:
+                handle = repo.open_for_read_with_flags(url_info.branch, url_info.path, self._flags)
+            else:
+                handle = repo.open_for_read(url_info.branch, url_info.path)
+            handle.seek(self._pos, io.SEEK_SET)
+            self._handle = handle
+        return self._handle
+
+    def is_closed(self):
+        if self._handle is None:
+            return self._closed
+        return self._handle.is_closed()
+
+    def close(self):
+        if self._handle is None:
+            self._closed = True
+        else:
+            self._handle.close()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def writable(self):
+        return False
+
+    def tell(self):
+        if self._handle is None:
+            return self._pos
+        return self._handle.tell()
+
+    def __getattr__(self, name):
+        return getattr(self._open(), name)
+
+
+def _reopen_xet_file(url, flags, pos):
+    return XetFile(_LazyReadHandle(url, flags, pos), source=(url, flags))
+
 
 class XetFile:
     """
     A handle to a file in a Xet repo.  
+
+    Files opened for reading can be pickled, e.g. to pass them to
+    multiprocessing or Dask workers: only the url and position are
+    serialized, and the file is reopened on first use after unpickling.
     """
 
     def __init__(
             self,
             handle,
             write_transaction=None,
+            source=None,
     ):
         # Get pyxethandle  from path if None.
         self.handle = handle
         self.write_transaction = write_transaction
         self._do_not_write = False
+        # (url, open flags) of a file opened for reading, used for pickling.
+        self._source = source
+
+    def __reduce__(self):
+        if self._source is None or self.write_transaction is not None:
+            raise TypeError("Only files opened for reading can be pickled")
+        if self.closed:
+            raise ValueError("Cannot pickle a closed file")
+        url, flags = self._source
+        return _reopen_xet_file, (url, flags, self.handle.tell())
 
     @property
     def closed(self):
@@ -82,7 +161,10 @@ class XetFile:
             raise RuntimeError("Read not supported")
         if not isinstance(size, int):
             raise TypeError("Unexpected type for size")
-        return self.handle.read(size)
+        with span("file.read", size=size) as trace_span:
+            data = self.handle.read(size)
+            trace_span.set_attribute("bytes", len(data))
+        return data
 
     def readall(self):
         if not self.readable():
@@ -108,10 +190,12 @@ class XetFile:
             return
         if isinstance(data, str):
             data = data.encode('utf-8')
-        self.handle.write(data)
+        with span("file.write", bytes=len(data)):
+            self.handle.write(data)
 
     def read_to_path(self, path, progress_reporter = None):
-        self.handle.read_to_path(path, progress_reporter)
+        with span("file.read_to_path", path=path):
+            self.handle.read_to_path(path, progress_reporter)
 
     def __del__(self):
         self.close()
@@ -1,3 +1,4 @@
+import copy
 import os
 import posixpath
 import sys
@@ -12,14 +13,33 @@ if 'SPHINX_BUILD' not in os.environ:
 import fsspec
 
 from . import XetFS, XetFSOpenFlags
+from .tracing import span
 from .url_parsing import parse_url
 from .util import _path_split, _path_normalize, _path_join, \
   _path_dirname, _isdir, _get_fs_and_path, _rel_path, _are_same_fs, \
-  _get_normalized_path
+  _get_normalized_path, _parallel_find
 
 MAX_CONCURRENT_COPIES = threading.Semaphore(32)
 CHUNK_SIZE = 16 * 1024 * 1024
 
+# Default settings for the direct xet -> S3 multipart exporter.  Files at
+# least S3_MULTIPART_PART_SIZE bytes long are uploaded as S3 multipart uploads,
+# with up to S3_MULTIPART_CONCURRENCY parts of a single file being read from
+# xet and uploaded at once.
+S3_MULTIPART_PART_SIZE = 64 * 1024 * 1024
+S3_MULTIPART_CONCURRENCY = 8
+
+# Each part is held in memory from its read until its upload completes.  This
+# bounds the number of parts held at once across all files being copied, so
+# concurrent copies of large files stay within
+# S3_MULTIPART_MAX_BUFFERED_PARTS * part size bytes (1GB with the defaults).
+S3_MULTIPART_MAX_BUFFERED_PARTS = 16
+S3_MULTIPART_BUFFERED_PARTS = threading.Semaphore(S3_MULTIPART_MAX_BUFFERED_PARTS)
+
+# S3 limits on multipart uploads.
+S3_MIN_PART_SIZE = 5 * 1024 * 1024
+S3_MAX_PARTS = 10000
+
 
 def _validate_xet_copy(src_fs, src_path, dest_fs, dest_path):
     """
@@ -61,11 +81,23 @@ class CopyUnit:
     def __repr__(self):
         return f"[CopyUnit: {self.src_path} to {self.dest_path} (dir = {self.dest_dir}), size = {self.size}]"
 
-def _single_file_copy_impl(cp_action, src_fs, dest_fs, progress_reporter = None, buffer_size=CHUNK_SIZE):
+def _single_file_copy_impl(cp_action, src_fs, dest_fs, progress_reporter = None, buffer_size=CHUNK_SIZE,
+                           s3_part_size=None, s3_concurrency=None):
 
     src_path = _path_normalize(src_fs, cp_action.src_path, strip_trailing_slash=True, keep_relative=False)
     dest_path = _path_normalize(dest_fs, cp_action.dest_path, strip_trailing_slash=True, keep_relative=False) 
 
+    with span("copy_file", src=f"{src_fs.protocol}://{src_path}",
+              dest=f"{dest_fs.protocol}://{dest_path}", bytes=cp_action.size):
+        _single_file_copy_body(cp_action, src_fs, src_path, dest_fs, dest_path, progress_reporter, buffer_size,
+                               s3_part_size, s3_concurrency)
+
+
+def _single_file_copy_body(cp_action, src_fs, src_path, dest_fs, dest_path, progress_reporter, buffer_size,
+                           s3_part_size, s3_concurrency):
+    if s3_part_size is None:
+        s3_part_size = S3_MULTIPART_PART_SIZE
+
     if progress_reporter is None:
         print(f"Copying {src_path} to {dest_path}")
 
@@ -98,6 +130,11 @@ def _single_file_copy_impl(cp_action, src_fs, dest_fs, progress_reporter = None,
             if src_fs.protocol == "xet" and dest_fs.protocol == "file":
                 with src_fs.open(src_path, "rb", flags=XetFSOpenFlags.FILE_FLAG_NO_BUFFERING) as source_file:
                     source_file.read_to_path(dest_path, progress_reporter)
+            elif (src_fs.protocol == "xet" and dest_fs.protocol == "s3"
+                  and cp_action.size is not None and cp_action.size >= s3_part_size):
+                # Fasttrack for exporting large files to S3
+                _xet_to_s3_multipart_copy(src_fs, src_path, dest_fs, dest_path, cp_action.size,
+                                          progress_reporter, s3_part_size, s3_concurrency)
             else:
                 with src_fs.open(src_path, "rb") as source_file:
                     with dest_fs.open(dest_path, "wb", auto_mkdir=True) as dest_file:
@@ -119,7 +156,91 @@ def _single_file_copy_impl(cp_action, src_fs, dest_fs, progress_reporter = None,
         if progress_reporter:
             progress_reporter.register_progress(1, None)
 
-        
+
+
+
+def _s3_part_ranges(size, part_size):
+    """
+    Splits a file of `size` bytes into (part_number, offset, length) tuples
+    suitable for an S3 multipart upload, growing the part size if needed to
+    stay within the S3 part count limit.
+    """
+    part_size = max(part_size, S3_MIN_PART_SIZE)
+    if (size + part_size - 1) // part_size > S3_MAX_PARTS:
+        part_size = (size + S3_MAX_PARTS - 1) // S3_MAX_PARTS
+
+    return [(i + 1, offset, min(part_size, size - offset))
+            for i, offset in enumerate(range(0, size, part_size))]
+
+
+def _read_exact(handle, offset, length):
+    """
+    Reads `length` bytes starting at `offset` from a xet read handle.
+    """
+    handle.seek(offset)
+    chunks = []
+    remaining = length
+    while remaining > 0:
+        chunk = handle.read(min(remaining, CHUNK_SIZE))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    if remaining != 0:
+        raise IOError(f"Unexpected end of file reading {length} bytes at offset {offset}")
+    return b''.join(chunks)
+
+
+def _xet_to_s3_multipart_copy(src_fs, src_path, dest_fs, dest_path, size, progress_reporter=None,
+                              part_size=None, max_concurrency=None):
+    """
+    Copies a file from xet to S3 as a multipart upload, reading the parts from xet
+    with parallel range reads and uploading them concurrently.  At most
+    `max_concurrency` parts of this file, and S3_MULTIPART_MAX_BUFFERED_PARTS
+    parts of all files, are held in memory at once.
+    """
+    if part_size is None:
+        part_size = S3_MULTIPART_PART_SIZE
+    if max_concurrency is None:
+        max_concurrency = S3_MULTIPART_CONCURRENCY
+
+    bucket, key, _ = dest_fs.split_path(dest_path)
+    parts = _s3_part_ranges(size, part_size)
+
+    with src_fs.open(src_path, "rb") as source_file:
+
+        def upload_part(upload_id, part_number, offset, length):
+            # Each part gets its own copy of the read handle so the reads don't
+            # share a position.
+            with S3_MULTIPART_BUFFERED_PARTS:
+                data = _read_exact(copy.copy(source_file.handle), offset, length)
+                ret = dest_fs.call_s3("upload_part", Bucket=bucket, Key=key, UploadId=upload_id,
+                                      PartNumber=part_number, Body=data)
+            if progress_reporter:
+                progress_reporter.register_progress(None, length)
+            return {'PartNumber': part_number, 'ETag': ret['ETag']}
+
+        upload = dest_fs.call_s3("create_multipart_upload", Bucket=bucket, Key=key)
+        upload_id = upload['UploadId']
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+                futures = [executor.submit(upload_part, upload_id, *part) for part in parts]
+                try:
+                    completed_parts = [f.result() for f in futures]
+                except Exception:
+                    # Don't upload the rest of a file that is being aborted.
+                    for f in futures:
+                        f.cancel()
+                    raise
+
+            dest_fs.call_s3("complete_multipart_upload", Bucket=bucket, Key=key, UploadId=upload_id,
+                            MultipartUpload={'Parts': completed_parts})
+        except Exception:
+            dest_fs.call_s3("abort_multipart_upload", Bucket=bucket, Key=key, UploadId=upload_id)
+            raise
+
+    dest_fs.invalidate_cache(dest_path)
 
         
 def single_file_copy(src_fs, src_path, dest_fs, dest_path, size_hint = None):
@@ -282,8 +403,8 @@ def _build_cp_action_list_impl(src_fs, src_path, dest_fs, dest_path, recursive,
                     progress_reporter.update_target(1, None)
                 yield CopyUnit(src_path=src_path, dest_path=dest_dir, dest_dir=None, size=None)
                                  
-            # If recursive, use find; this returns recursively.
-            src_listing = src_fs.find(src_path, detail=True).items()
+            # If recursive, list the source recursively, with subtrees listed in parallel.
+            src_listing = _parallel_find(src_fs, src_path)
 
         else:
             # This is not recursive, so the src was specified as src_dir/<pattern>, e.g. src_dir/*.
@@ -352,9 +473,13 @@ def build_cp_action_list(source, destination, recursive=False):
         src_fs, src_path, dest_fs, dest_path, recursive, progress_reporter=None))
     
 
-def perform_copy(source_list, destination, message = None, recursive=False, ):
+def perform_copy(source_list, destination, message = None, recursive=False,
+                 s3_part_size=None, s3_concurrency=None):
     """
     Performs a copy operation. 
+
+    `s3_part_size` and `s3_concurrency` override S3_MULTIPART_PART_SIZE and
+    S3_MULTIPART_CONCURRENCY for files exported from xet to S3.
     """
 
     if not isinstance(source_list, list):
@@ -378,39 +503,43 @@ def perform_copy(source_list, destination, message = None, recursive=False, ):
     
     _validate_xet_copy(src_fs, src_path, dest_fs, dest_path)
     
-    if destproto_is_xet:
-        dest_fs.start_transaction(message)
+    with span("perform_copy", sources=len(source_list), destination=destination,
+              recursive=recursive) as trace_span:
+        if destproto_is_xet:
+            dest_fs.start_transaction(message)
 
-    any_copied = False
+        any_copied = False
 
-    try:
+        try:
 
-        # Get the list of everything to copy.
+            # Get the list of everything to copy.
 
-        # Now, go through and do all the actual copying.
-        futures = []
-        opt_future = None
-        with ThreadPoolExecutor() as executor:
-            for source in source_list:
-                src_path = _get_normalized_path(source, src_fs)
-                for cp_action in _build_cp_action_list_impl(
-                    src_fs, src_path, dest_fs, dest_path, recursive, progress_reporter):
+            # Now, go through and do all the actual copying.
+            futures = []
+            opt_future = None
+            with ThreadPoolExecutor() as executor:
+                for source in source_list:
+                    src_path = _get_normalized_path(source, src_fs)
+                    for cp_action in _build_cp_action_list_impl(
+                        src_fs, src_path, dest_fs, dest_path, recursive, progress_reporter):
 
-                    any_copied = True
+                        any_copied = True
 
-                    futures.append(executor.submit(_single_file_copy_impl, cp_action,
-                                src_fs, dest_fs, progress_reporter))
+                        futures.append(executor.submit(_single_file_copy_impl, cp_action,
+                                    src_fs, dest_fs, progress_reporter,
+                                    s3_part_size=s3_part_size, s3_concurrency=s3_concurrency))
 
-        for future in futures:
-            future.result()
+            trace_span.set_attribute("files", len(futures))
+            for future in futures:
+                future.result()
 
-        if opt_future is not None:
-            # Head scratch -- will this actually cancel it when it's running in rust?
-            opt_future.cancel()
+            if opt_future is not None:
+                # Head scratch -- will this actually cancel it when it's running in rust?
+                opt_future.cancel()
 
-    finally:
-        if destproto_is_xet:
-            dest_fs.end_transaction()
+        finally:
+            if destproto_is_xet:
+                dest_fs.end_transaction()
 
-        if any_copied:
-            progress_reporter.finalize()
+            if any_copied:
+                progress_reporter.finalize()
@@ -1,13 +1,18 @@
 import json
+import posixpath
 import sys
 from urllib.parse import urlparse
 from enum import IntEnum
 
 import fsspec
 import os
+from fsspec.callbacks import _DEFAULT_CALLBACK
+from fsspec.implementations.local import make_path_posix, trailing_sep
+from fsspec.spec import has_magic
 
 from .commit_transaction import MultiCommitTransaction
 from .file_interface import XetFile
+from .local_backend import LocalRepoManager, LOCAL_BACKEND_ENDPOINT
 from .url_parsing import parse_url, XetPathInfo, normalize_endpoint, set_default_endpoint, get_default_endpoint
 
 if 'SPHINX_BUILD' not in os.environ:
@@ -16,6 +21,10 @@ if 'SPHINX_BUILD' not in os.environ:
 __repo_managers = {}
 __login_credentials = {}
 
+# Number of files handed to the bindings per call by get and put; the fsspec
+# callback is updated after each batch.
+TRANSFER_BATCH_SIZE = 256
+
 def _repo_manager(endpoint):
     global __repo_managers
     global __login_credentials
@@ -27,7 +36,10 @@ def _repo_manager(endpoint):
     except KeyError:
         pass
 
-    repo = rpyxet.PyRepoManager(endpoint)
+    if endpoint == LOCAL_BACKEND_ENDPOINT:
+        repo = LocalRepoManager()
+    else:
+        repo = rpyxet.PyRepoManager(endpoint)
     __login_credentials
     if endpoint in __login_credentials:
         repo.override_login_config(*__login_credentials[endpoint])
@@ -38,6 +50,16 @@ def _repo_manager(endpoint):
     return repo
 
 
+def _reset_repo_managers_after_fork():
+    # The repo managers hold connections served by the parent's runtime, which
+    # does not exist in a forked child; new ones are created on first use.
+    __repo_managers.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_repo_managers_after_fork)
+
+
 def login(user, token, email=None, host=None):
     """
     Sets the active login credentials used to authenticate against Xethub.
@@ -230,7 +252,8 @@ class XetFS(fsspec.spec.AbstractFileSystem):
         return {"name": url_path.name(),
                 "size": attr.size,
                 "type": attr.ftype,
-                "last_modified": None if len(attr.last_modified) == 0 else attr.last_modified}
+                "last_modified": None if len(attr.last_modified) == 0 else attr.last_modified,
+                "content_hash": None if len(attr.content_hash) == 0 else attr.content_hash}
         
 
     def make_repo(self, dest_path, private=False, **kwargs):
@@ -409,7 +432,9 @@ class XetFS(fsspec.spec.AbstractFileSystem):
         if detail:
             ret = [{"name": url_path.base_path() + "/" + fname, 
                      "size": finfo.size,
-                     "type": finfo.ftype}
+                     "type": finfo.ftype,
+                     "last_modified": None if len(finfo.last_modified) == 0 else finfo.last_modified,
+                     "content_hash": None if len(finfo.content_hash) == 0 else finfo.content_hash}
                     for fname, finfo in zip(files, file_info)]
         else:
             ret = [url_path.base_path() + "/" + fname for fname in files]
@@ -448,16 +473,153 @@ class XetFS(fsspec.spec.AbstractFileSystem):
         if mode.startswith('r'):
             repo_handle = self._manager.get_repo(url_path.remote())
             branch = url_path.branch
-            if "flags" in kwargs:
-                handle = repo_handle.open_for_read_with_flags(branch, url_path.path, kwargs["flags"])
+            flags = kwargs.get("flags")
+            if flags is not None:
+                handle = repo_handle.open_for_read_with_flags(branch, url_path.path, flags)
             else:
                 handle = repo_handle.open_for_read(branch, url_path.path)
-            return XetFile(handle)
+            return XetFile(handle, source=(url_path.url(), flags))
         elif mode.startswith('w'):
             return self._transaction.open_for_write(url_path)
         else:
             raise ValueError("Mode '%s' not supported.", mode)
 
+    def cat(self, path, recursive=False, on_error="raise", **kwargs):
+        """
+        Fetch the contents of one or more files.  Many files are opened and read
+        concurrently in one call to the bindings, so reading thousands of small
+        files does not pay a round trip per file.
+
+        Returns bytes for a single file, or a dict of path -> bytes, following
+        `fsspec.AbstractFileSystem.cat`.
+        """
+        if len(kwargs) > 0:
+            # Byte ranges are read file by file.
+            return super().cat(path, recursive=recursive, on_error=on_error, **kwargs)
+        paths = self.expand_path(path, recursive=recursive)
+        if len(paths) == 1 and not isinstance(path, list) and paths[0] == self._strip_protocol(path):
+            return self.cat_file(paths[0])
+
+        url_paths = [parse_url(p, self.endpoint, expect_branch=True) for p in paths]
+        results = self._manager.cat_many([(u.remote(), u.branch, u.path) for u in url_paths])
+
+        out = {}
+        for p, res in zip(paths, results):
+            if isinstance(res, Exception):
+                if on_error == "raise":
+                    raise res
+                if on_error == "return":
+                    out[p] = res
+            else:
+                out[p] = res
+        return out
+
+    def pipe(self, path, value=None, **kwargs):
+        """
+        Write the contents of one file, or of many given as a dict of
+        path -> bytes.  The files are written into the active transaction with
+        one batched write per repository branch.
+        """
+        if self._transaction is None or not self.intrans:
+            raise RuntimeError(
+                "Write access to files is only allowed within a commit transaction.")
+        if isinstance(path, str):
+            path = {path: value}
+        self._transaction.pipe_many([(parse_url(p, self.endpoint, expect_branch=True),
+                                      v if isinstance(v, bytes) else bytes(v))
+                                     for p, v in path.items()])
+
+    def get(self, rpath, lpath, recursive=False, callback=_DEFAULT_CALLBACK, maxdepth=None, **kwargs):
+        """
+        Copy a file, or with `recursive` a directory tree, to a local path.
+        If lpath is an existing directory or ends with "/", the source is
+        copied into it.
+
+        The tree is listed once and the files are downloaded concurrently by
+        the bindings, straight to their local paths.  Lists of paths, globs
+        and maxdepth are handled by the generic fsspec implementation.
+        """
+        if not isinstance(rpath, str) or not isinstance(lpath, str) or has_magic(rpath) \
+                or maxdepth is not None or len(kwargs) > 0:
+            return super().get(rpath, lpath, recursive=recursive, callback=callback,
+                               maxdepth=maxdepth, **kwargs)
+
+        from .util import _parallel_find
+
+        lpath = make_path_posix(lpath)
+        dest_is_dir = trailing_sep(lpath) or os.path.isdir(lpath)
+        source_is_dir = trailing_sep(rpath)
+        rpath = self._strip_protocol(rpath).rstrip('/')
+
+        if source_is_dir or self.isdir(rpath):
+            if not recursive:
+                return
+            # Like fsspec, a directory copied into an existing directory keeps its name.
+            lroot = posixpath.join(lpath, posixpath.basename(rpath)) \
+                if dest_is_dir and not source_is_dir else lpath
+            prefix = rpath + '/'
+            pairs = [(name, posixpath.join(lroot, name[len(prefix):]))
+                     for name, _ in _parallel_find(self, rpath)]
+        else:
+            pairs = [(rpath, posixpath.join(lpath, posixpath.basename(rpath)) if dest_is_dir else lpath)]
+
+        for d in {os.path.dirname(lp) for _, lp in pairs}:
+            if d:
+                os.makedirs(d, exist_ok=True)
+
+        callback.set_size(len(pairs))
+        for i in range(0, len(pairs), TRANSFER_BATCH_SIZE):
+            batch = pairs[i:i + TRANSFER_BATCH_SIZE]
+            items = []
+            for name, lp in batch:
+                url_path = parse_url(name, self.endpoint, expect_branch=True)
+                items.append((url_path.remote(), url_path.branch, url_path.path, lp))
+            self._manager.read_many_to_paths(items, None)
+            callback.relative_update(len(batch))
+
+    def put(self, lpath, rpath, recursive=False, callback=_DEFAULT_CALLBACK, maxdepth=None, **kwargs):
+        """
+        Copy a local file, or with `recursive` a local directory tree, into
+        the active transaction.  If rpath is an existing directory or ends
+        with "/", the source is copied into it.
+
+        The files are uploaded concurrently by the bindings, streaming from
+        their local paths.  Lists of paths, globs and maxdepth are handled by
+        the generic fsspec implementation.
+        """
+        if self._transaction is None or not self.intrans:
+            raise RuntimeError(
+                "Write access to files is only allowed within a commit transaction.")
+        if not isinstance(lpath, str) or not isinstance(rpath, str) or has_magic(lpath) \
+                or maxdepth is not None or len(kwargs) > 0:
+            return super().put(lpath, rpath, recursive=recursive, callback=callback,
+                               maxdepth=maxdepth, **kwargs)
+
+        dest_is_dir = trailing_sep(rpath) or self.isdir(rpath)
+        source_is_dir = trailing_sep(lpath)
+        lpath = make_path_posix(lpath).rstrip('/')
+        rpath = self._strip_protocol(rpath).rstrip('/')
+
+        if os.path.isdir(lpath):
+            if not recursive:
+                return
+            rroot = posixpath.join(rpath, posixpath.basename(lpath)) \
+                if dest_is_dir and not source_is_dir else rpath
+            pairs = []
+            for root, _, files in os.walk(lpath):
+                rel = os.path.relpath(root, lpath)
+                rdir = rroot if rel == '.' else posixpath.join(rroot, rel.replace(os.sep, '/'))
+                pairs.extend((os.path.join(root, f), posixpath.join(rdir, f)) for f in files)
+        else:
+            pairs = [(lpath, posixpath.join(rpath, posixpath.basename(lpath)) if dest_is_dir else rpath)]
+
+        callback.set_size(len(pairs))
+        for i in range(0, len(pairs), TRANSFER_BATCH_SIZE):
+            batch = pairs[i:i + TRANSFER_BATCH_SIZE]
+            self._transaction.put_many([(parse_url(rp, self.endpoint, expect_branch=True), lp)
+                                        for lp, rp in batch])
+            callback.relative_update(len(batch))
+
     def set_commit_message(self, message):
         """
         Sets the commit message on the active transaction
@@ -468,10 +630,11 @@ class XetFS(fsspec.spec.AbstractFileSystem):
 
     def rm(self, path, *args, **kwargs):
         """
-        Delete a file.
+        Delete a file, or a list of files.
 
         Deletions must be performed within the context of a transaction 
         which must be scoped to within a single repository branch.
+        A list of files is deleted as one batch per branch.
         """
         transaction = self._transaction
 
@@ -484,13 +647,18 @@ class XetFS(fsspec.spec.AbstractFileSystem):
         if len(kwargs) > 0:
             print(f"rm arguments {kwargs} ignored", file=sys.stderr)
 
-        path = parse_url(path, self.endpoint, expect_repo = None)
-        if len(path.path) == 0 and len(path.branch) > 0:
-            raise ValueError("Cannot delete branches with 'rm'")
-        if len(path.path) == 0 and len(path.branch) == 0:
-            raise ValueError("Cannot delete repositories with 'rm'")
+        paths = [parse_url(p, self.endpoint, expect_repo = None)
+                 for p in (path if isinstance(path, list) else [path])]
+        for p in paths:
+            if len(p.path) == 0 and len(p.branch) > 0:
+                raise ValueError("Cannot delete branches with 'rm'")
+            if len(p.path) == 0 and len(p.branch) == 0:
+                raise ValueError("Cannot delete repositories with 'rm'")
 
-        transaction.rm(path)
+        if isinstance(path, list):
+            transaction.rm_many(paths)
+        else:
+            transaction.rm(paths[0])
 
     def is_repo(self, path):
         """
@@ -0,0 +1,729 @@
+"""
+Provides a local, directory backed stand-in for a XetHub endpoint
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+# Endpoint name that selects the local backend, e.g. xet://localhost-fs:user/repo/main/file.txt
+LOCAL_BACKEND_ENDPOINT = "localhost-fs"
+# Environment variable holding the directory the local backend stores its repos in.
+LOCAL_BACKEND_ROOT_ENV = "XET_LOCAL_BACKEND_ROOT"
+LOCAL_BACKEND_DEFAULT_ROOT = "~/.xet/localhost-fs"
+LOCAL_BACKEND_DEFAULT_USER = "local"
+
+# Matches the format of last_modified in xet listings.
+LOCAL_MTIME_FORMAT = '%Y-%m-%dT%H:%M:%S%z'
+
+REPO_METADATA_FILE = "repo.json"
+BRANCHES_DIR = "branches"
+STAGING_DIR = "staging"
+COMMITS_DIR = "commits"
+
+
+def local_backend_root():
+    """
+    Returns the directory used by the local backend, from XET_LOCAL_BACKEND_ROOT
+    or ~/.xet/localhost-fs if unset.
+    """
+    return os.path.expanduser(os.environ.get(LOCAL_BACKEND_ROOT_ENV, LOCAL_BACKEND_DEFAULT_ROOT))
+
+
+def _link_or_copy(src, dest):
+    """
+    Hard links src to dest, falling back to a copy.  Files in a branch are only
+    ever replaced, never modified in place, so sharing them between branches is safe.
+    """
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    if os.path.lexists(dest):
+        os.remove(dest)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+
+def _clone_tree(src, dest):
+    shutil.copytree(src, dest, copy_function=_link_or_copy)
+
+
+def _remove_empty_parents(path, stop):
+    path = os.path.dirname(path)
+    while path != stop and path.startswith(stop):
+        try:
+            os.rmdir(path)
+        except OSError:
+            return
+        path = os.path.dirname(path)
+
+
+class LocalFileAttributes:
+    """
+    Mirrors rpyxet.FileAttributes.  Content hashes are not computed by the
+    local backend, so content_hash is always empty and `xet sync --checksum`
+    falls back to comparing by size and mtime, with a warning.
+    """
+    __slots__ = ['ftype', 'size', 'last_modified', 'content_hash']
+
+    def __init__(self, ftype, size, last_modified="", content_hash=""):
+        self.ftype = ftype
+        self.size = size
+        self.last_modified = last_modified
+        self.content_hash = content_hash
+
+    @staticmethod
+    def from_path(path):
+        st = os.stat(path)
+        last_modified = datetime.fromtimestamp(st.st_mtime, timezone.utc).strftime(LOCAL_MTIME_FORMAT)
+        if os.path.isdir(path):
+            return LocalFileAttributes("directory", 0, last_modified)
+        return LocalFileAttributes("file", st.st_size, last_modified)
+
+
+class LocalRepoManager:
+    """
+    A stand-in for rpyxet.PyRepoManager that keeps repositories as plain
+    directories under `root`, laid out as::
+
+        <root>/<user>/<repo>/repo.json
+        <root>/<user>/<repo>/branches/<branch>/<files>
+        <root>/<user>/<repo>/commits/<branch>.jsonl
+
+    It implements listing, stat, reads, write transactions, branches and the
+    api_query calls used by XetFS, so the copy, sync and transaction paths can
+    be tested and benchmarked without a XetHub endpoint.
+    """
+
+    def __init__(self, root=None):
+        self.root = os.path.abspath(local_backend_root() if root is None else os.path.expanduser(root))
+        os.makedirs(self.root, exist_ok=True)
+        self._user = LOCAL_BACKEND_DEFAULT_USER
+        self._lock = threading.Lock()
+        self._repo_locks = {}
+
+    def _parse_remote(self, remote):
+        """
+        Splits a remote of the form http[s]://localhost-fs/user[/repo] into (user, repo).
+        """
+        path = remote.split("://", 1)[-1]
+        components = [c for c in path.split("/")[1:] if c]
+        if len(components) == 0:
+            return "", ""
+        if len(components) == 1:
+            return components[0], ""
+        return components[0], components[1]
+
+    def _repo_dir(self, user, repo):
+        return os.path.join(self.root, user, repo)
+
+    def _branch_dir(self, user, repo, branch):
+        return os.path.join(self._repo_dir(user, repo), BRANCHES_DIR, branch)
+
+    def _repo_lock(self, user, repo):
+        with self._lock:
+            return self._repo_locks.setdefault((user, repo), threading.Lock())
+
+    def _is_repo(self, user, repo):
+        return os.path.isfile(os.path.join(self._repo_dir(user, repo), REPO_METADATA_FILE))
+
+    def _check_repo(self, user, repo):
+        if not user or not repo or not self._is_repo(user, repo):
+            raise FileNotFoundError(f"Repository {user}/{repo} not found")
+
+    def _check_branch(self, user, repo, branch):
+        self._check_repo(user, repo)
+        if not os.path.isdir(self._branch_dir(user, repo, branch)):
+            raise FileNotFoundError(f"Branch {branch} not found in {user}/{repo}")
+
+    def _resolve(self, user, repo, branch, path):
+        """
+        Returns the local path of `path` in a branch, refusing paths that escape it.
+        """
+        branch_dir = self._branch_dir(user, repo, branch)
+        local_path = os.path.normpath(os.path.join(branch_dir, path.strip("/")))
+        if local_path != branch_dir and not local_path.startswith(branch_dir + os.sep):
+            raise ValueError(f"Invalid path {path}")
+        return local_path
+
+    def _read_metadata(self, user, repo):
+        with open(os.path.join(self._repo_dir(user, repo), REPO_METADATA_FILE)) as f:
+            return json.load(f)
+
+    def _write_metadata(self, user, repo, metadata):
+        path = os.path.join(self._repo_dir(user, repo), REPO_METADATA_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(metadata, f)
+        os.replace(path + ".tmp", path)
+
+    def _repo_json(self, user, repo):
+        metadata = self._read_metadata(user, repo)
+        return {'name': repo,
+                'full_name': f"{user}/{repo}",
+                'private': metadata.get('private', False),
+                'permissions': {'admin': True, 'push': True, 'pull': True},
+                **metadata.get('attributes', {})}
+
+    def _branch_head(self, user, repo, branch):
+        log_path = os.path.join(self._repo_dir(user, repo), COMMITS_DIR, branch + ".jsonl")
+        try:
+            with open(log_path, "rb") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None
+        return json.loads(lines[-1]) if lines else None
+
+    def _record_commit(self, user, repo, branch, message):
+        parent = self._branch_head(user, repo, branch)
+        commit = {'message': message,
+                  'timestamp': time.time(),
+                  'parent': parent['id'] if parent else None}
+        commit['id'] = hashlib.sha1(json.dumps(commit, sort_keys=True).encode() + uuid.uuid4().bytes).hexdigest()
+        commits_dir = os.path.join(self._repo_dir(user, repo), COMMITS_DIR)
+        os.makedirs(commits_dir, exist_ok=True)
+        with open(os.path.join(commits_dir, branch + ".jsonl"), "a") as f:
+            f.write(json.dumps(commit) + "\n")
+        return commit
+
+    def _create_repo(self, user, repo, private):
+        if self._is_repo(user, repo):
+            raise RuntimeError(f"Repository {user}/{repo} already exists")
+        os.makedirs(self._branch_dir(user, repo, "main"))
+        os.makedirs(os.path.join(self._repo_dir(user, repo), STAGING_DIR))
+        self._write_metadata(user, repo, {'private': private, 'attributes': {}})
+        self._record_commit(user, repo, "main", "Initial commit")
+        return self._repo_json(user, repo)
+
+    def _copy_repo(self, user, repo, dest_user, dest_repo):
+        self._check_repo(user, repo)
+        if self._is_repo(dest_user, dest_repo):
+            raise RuntimeError(f"Repository {dest_user}/{dest_repo} already exists")
+        os.makedirs(os.path.join(self.root, dest_user), exist_ok=True)
+        _clone_tree(self._repo_dir(user, repo), self._repo_dir(dest_user, dest_repo))
+        return self._repo_json(dest_user, dest_repo)
+
+    def get_inferred_username(self, remote):
+        return self._user
+
+    def override_login_config(self, user, token=None, email=None, host=None):
+        if user:
+            self._user = user
+
+    def listdir(self, remote, branch, path):
+        """
+        Lists a directory in a branch, returning (names, attributes) like
+        rpyxet.PyRepoManager.listdir.
+        """
+        user, repo = self._parse_remote(remote)
+        self._check_branch(user, repo, branch)
+        path = path.strip("/")
+        local_path = self._resolve(user, repo, branch, path)
+        if os.path.isfile(local_path):
+            return [path], [LocalFileAttributes.from_path(local_path)]
+        if not os.path.isdir(local_path):
+            raise FileNotFoundError(f"Path {path} not found in {user}/{repo}/{branch}")
+
+        names = []
+        attrs = []
+        for name in sorted(os.listdir(local_path)):
+            names.append(f"{path}/{name}" if path else name)
+            attrs.append(LocalFileAttributes.from_path(os.path.join(local_path, name)))
+        return names, attrs
+
+    def stat(self, remote, branch, path):
+        """
+        Returns the attributes of a path, or None if it does not exist.
+        """
+        user, repo = self._parse_remote(remote)
+        if not self._is_repo(user, repo):
+            return None
+        branch_dir = self._branch_dir(user, repo, branch)
+        if not os.path.isdir(branch_dir):
+            return None
+        if len(path.strip("/")) == 0:
+            return LocalFileAttributes("branch", 0)
+        local_path = self._resolve(user, repo, branch, path)
+        if not os.path.exists(local_path):
+            return None
+        return LocalFileAttributes.from_path(local_path)
+
+    def get_repo(self, remote):
+        user, repo = self._parse_remote(remote)
+        self._check_repo(user, repo)
+        return LocalRepo(self, user, repo)
+
+    def cat_many(self, paths):
+        """
+        Reads whole files given as (remote, branch, path), returning the contents
+        or the exception raised for each, like rpyxet.PyRepoManager.cat_many.
+        """
+        ret = []
+        for remote, branch, path in paths:
+            try:
+                user, repo = self._parse_remote(remote)
+                self._check_branch(user, repo, branch)
+                with io.open(self._resolve(user, repo, branch, path), "rb") as f:
+                    ret.append(f.read())
+            except Exception as e:
+                ret.append(e)
+        return ret
+
+    def read_many_to_paths(self, items, progress_reporter=None):
+        """
+        Downloads files given as (remote, branch, path, local_path), like
+        rpyxet.PyRepoManager.read_many_to_paths.
+        """
+        for remote, branch, path, local_path in items:
+            f = self.get_repo(remote).open_for_read(branch, path)
+            try:
+                f.read_to_path(local_path, progress_reporter)
+            finally:
+                f.close()
+
+    def api_query(self, remote, op, http_command, body):
+        """
+        Serves the subset of the XetHub API used by XetFS.  Returns the
+        JSON response as bytes.
+        """
+        user, repo = self._parse_remote(remote)
+        http_command = http_command.lower()
+        query = json.loads(body) if body else {}
+
+        if not repo and op == "" and http_command == "get":
+            return self._api_list_repos(user)
+        if not repo and op == "" and http_command == "post":
+            ret = self._create_repo(query['owner'], query['name'], query.get('private', False))
+            return json.dumps(ret).encode()
+
+        self._check_repo(user, repo)
+        with self._repo_lock(user, repo):
+            ret = self._api_repo_query(user, repo, op, http_command, query)
+        return json.dumps(ret).encode()
+
+    def _api_list_repos(self, user):
+        ret = []
+        users = [user] if user else sorted(os.listdir(self.root))
+        for u in users:
+            user_dir = os.path.join(self.root, u)
+            if not os.path.isdir(user_dir):
+                continue
+            for r in sorted(os.listdir(user_dir)):
+                if self._is_repo(u, r):
+                    ret.append(self._repo_json(u, r))
+        return json.dumps(ret).encode()
+
+    def _api_repo_query(self, user, repo, op, http_command, query):
+        branches_dir = os.path.join(self._repo_dir(user, repo), BRANCHES_DIR)
+
+        if op == "" and http_command == "patch":
+            if 'name' in query and query['name'] != repo:
+                if self._is_repo(user, query['name']):
+                    raise RuntimeError(f"Repository {user}/{query['name']} already exists")
+                os.rename(self._repo_dir(user, repo), self._repo_dir(user, query['name']))
+                return self._repo_json(user, query['name'])
+            metadata = self._read_metadata(user, repo)
+            metadata.setdefault('attributes', {}).update(query)
+            self._write_metadata(user, repo, metadata)
+            return self._repo_json(user, repo)
+
+        if op == "forks" and http_command == "post":
+            return self._copy_repo(user, repo, self._user, query['name'])
+
+        if op == "duplicate" and http_command == "post":
+            dest_repo = f"{repo}-duplicate"
+            i = 1
+            while self._is_repo(self._user, dest_repo):
+                i += 1
+                dest_repo = f"{repo}-duplicate-{i}"
+            return self._copy_repo(user, repo, self._user, dest_repo)
+
+        if op == "branches" and http_command == "get":
+            return [{'name': b} for b in sorted(os.listdir(branches_dir))]
+
+        if op == "branches" and http_command == "post":
+            old_branch = query['old_branch_name']
+            new_branch = query['new_branch_name']
+            self._check_branch(user, repo, old_branch)
+            if os.path.exists(self._branch_dir(user, repo, new_branch)):
+                raise RuntimeError(f"Branch {new_branch} already exists")
+            _clone_tree(self._branch_dir(user, repo, old_branch), self._branch_dir(user, repo, new_branch))
+            self._record_commit(user, repo, new_branch, f"Create branch {new_branch} from {old_branch}")
+            return {'name': new_branch}
+
+        if op.startswith("branches/") and http_command == "delete":
+            branch = op[len("branches/"):]
+            self._check_branch(user, repo, branch)
+            shutil.rmtree(self._branch_dir(user, repo, branch))
+            try:
+                os.remove(os.path.join(self._repo_dir(user, repo), COMMITS_DIR, branch + ".jsonl"))
+            except FileNotFoundError:
+                pass
+            return {}
+
+        if op.startswith("git/refs/") and http_command == "get":
+            ref = op[len("git/refs/"):]
+            branch = ref[len("heads/"):] if ref.startswith("heads/") else ref
+            head = self._branch_head(user, repo, branch)
+            if head is None:
+                raise RuntimeError(f"Ref {ref} not found")
+            return {'ref': f"refs/heads/{branch}",
+                    'object': {'type': 'commit', 'sha': head['id']}}
+
+        if op == "remote_size" and http_command == "post":
+            metadata = self._read_metadata(user, repo)
+            metadata.setdefault('remote_size', {})[query.get('branch', 'main')] = query.get('size')
+            self._write_metadata(user, repo, metadata)
+            return {}
+
+        raise RuntimeError(f"Unsupported API query {http_command.upper()} '{op}' on {user}/{repo}")
+
+
+class LocalRepo:
+    """
+    A stand-in for rpyxet.PyRepo.
+    """
+
+    def __init__(self, manager, user, repo):
+        self._manager = manager
+        self.user = user
+        self.repo = repo
+
+    def open_for_read(self, branch, path):
+        local_path = self._manager._resolve(self.user, self.repo, branch, path)
+        if not os.path.isfile(local_path):
+            raise FileNotFoundError(f"File {path} not found in {self.user}/{self.repo}/{branch}")
+        return LocalRFile(local_path)
+
+    def open_for_read_with_flags(self, branch, path, flags):
+        return self.open_for_read(branch, path)
+
+    def begin_write_transaction(self, branch, commit_message):
+        self._manager._check_branch(self.user, self.repo, branch)
+        return LocalWriteTransaction(self._manager, self.user, self.repo, branch, commit_message)
+
+    def fetch_hinted_shards_for_dedup(self, file_paths, min_dedup_byte_threshhold):
+        pass
+
+
+class LocalRFile:
+    """
+    A stand-in for rpyxet.PyRFile reading a file in a branch.
+    """
+
+    def __init__(self, path, pos=0):
+        self._path = path
+        self._file = io.open(path, "rb")
+        self._file.seek(pos)
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+            self.closed = True
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def writable(self):
+        return False
+
+    def tell(self):
+        return self._file.tell()
+
+    def seek(self, offset, whence=0):
+        return self._file.seek(offset, whence)
+
+    def readline(self, size):
+        return self._file.readline(size)
+
+    def readlines(self, num_lines):
+        return self._file.readlines(num_lines)
+
+    def read(self, size):
+        return self._file.read(size)
+
+    def readall(self):
+        return self._file.read()
+
+    def readinto(self, b):
+        return self._file.readinto(b)
+
+    def readinto1(self, b):
+        return self._file.readinto1(b)
+
+    def read_at(self, offset, size):
+        # A separate handle, so concurrent reads don't share a position.
+        with io.open(self._path, "rb") as f:
+            f.seek(offset)
+            return f.read(size)
+
+    def read_ranges(self, ranges):
+        return [self.read_at(offset, size) for offset, size in ranges]
+
+    def read_to_path(self, path, progress_reporter=None):
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        shutil.copyfile(self._path, path)
+        if progress_reporter is not None:
+            progress_reporter.register_progress(None, os.path.getsize(path))
+
+    def write(self, b):
+        raise RuntimeError("File not open for write")
+
+    def __copy__(self):
+        return LocalRFile(self._path, self._file.tell())
+
+    def __deepcopy__(self, memo=None):
+        return self.__copy__()
+
+
+class LocalWriteTransaction:
+    """
+    A stand-in for rpyxet.PyWriteTransaction.
+
+    New files are written into a staging directory; on commit, the recorded
+    operations are applied to the branch in order under the repository lock
+    and a commit entry is appended to the branch log.
+    """
+
+    def __init__(self, manager, user, repo, branch, commit_message):
+        self._manager = manager
+        self._user = user
+        self._repo = repo
+        self._branch = branch
+        self._commit_message = commit_message
+        self._lock = threading.Lock()
+        self._do_not_commit = False
+        self._error_on_commit = False
+        self._cancelled = False
+        self._start()
+
+    def _start(self):
+        self._staging_dir = os.path.join(self._manager._repo_dir(self._user, self._repo),
+                                         STAGING_DIR, uuid.uuid4().hex)
+        os.makedirs(self._staging_dir)
+        self._operations = []
+        self._new_files = []
+        self._copies = []
+        self._deletes = []
+        self._moves = []
+        self._completed = False
+
+    def _check_active(self):
+        if self._completed:
+            raise RuntimeError("Transaction operation attempted after transaction completed.")
+
+    def _staging_path(self):
+        return os.path.join(self._staging_dir, uuid.uuid4().hex)
+
+    def _add_operation(self, op, *args):
+        with self._lock:
+            self._check_active()
+            self._operations.append((op,) + args)
+            if op == 'write':
+                self._new_files.append(args[0])
+            elif op == 'copy':
+                self._copies.append((f"{args[0]}/{args[1]}", args[2]))
+            elif op == 'delete':
+                self._deletes.append(args[0])
+            elif op == 'move':
+                self._moves.append((args[0], args[1]))
+
+    def _apply(self):
+        resolve = self._manager._resolve
+        user, repo, branch = self._user, self._repo, self._branch
+        branch_dir = self._manager._branch_dir(user, repo, branch)
+        for op in self._operations:
+            if op[0] == 'write':
+                target = resolve(user, repo, branch, op[1])
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(op[2], target)
+            elif op[0] == 'copy':
+                src = resolve(user, repo, op[1], op[2])
+                target = resolve(user, repo, branch, op[3])
+                if os.path.isdir(src):
+                    if os.path.exists(target):
+                        shutil.rmtree(target)
+                    _clone_tree(src, target)
+                else:
+                    _link_or_copy(src, target)
+            elif op[0] == 'delete':
+                target = resolve(user, repo, branch, op[1])
+                if os.path.isdir(target):
+                    shutil.rmtree(target)
+                elif os.path.lexists(target):
+                    os.remove(target)
+                _remove_empty_parents(target, branch_dir)
+            elif op[0] == 'move':
+                src = resolve(user, repo, branch, op[1])
+                target = resolve(user, repo, branch, op[2])
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(src, target)
+                _remove_empty_parents(src, branch_dir)
+
+    def _complete(self, commit):
+        with self._lock:
+            if self._completed:
+                return
+            self._completed = True
+            try:
+                if commit and not self._cancelled and len(self._operations) > 0:
+                    if self._error_on_commit:
+                        raise RuntimeError("Error on commit requested.")
+                    if not self._do_not_commit:
+                        with self._manager._repo_lock(self._user, self._repo):
+                            self._apply()
+                            self._manager._record_commit(self._user, self._repo, self._branch,
+                                                         self._commit_message)
+            finally:
+                shutil.rmtree(self._staging_dir, ignore_errors=True)
+
+    def complete(self, commit):
+        self._complete(commit)
+
+    def commit_and_restart(self):
+        self._complete(True)
+        self._start()
+
+    def create_access_token(self):
+        self._check_active()
+        return LocalWriteTransactionAccessToken(self)
+
+    def transaction_size(self):
+        return len(self._operations)
+
+    def set_cancel_flag(self):
+        self._cancelled = True
+
+    def set_do_not_commit(self):
+        self._do_not_commit = True
+
+    def set_error_on_commit(self):
+        self._error_on_commit = True
+
+    @property
+    def new_files(self):
+        return list(self._new_files)
+
+    @property
+    def copies(self):
+        return list(self._copies)
+
+    @property
+    def deletes(self):
+        return list(self._deletes)
+
+    @property
+    def moves(self):
+        return list(self._moves)
+
+
+class LocalWriteTransactionAccessToken:
+    """
+    A stand-in for rpyxet.PyWriteTransactionAccessToken.
+    """
+
+    def __init__(self, transaction):
+        self._transaction = transaction
+
+    def close(self):
+        self._transaction = None
+
+    def _active_transaction(self):
+        if self._transaction is None:
+            raise RuntimeError("Transaction access token used after close.")
+        return self._transaction
+
+    def open_for_write(self, path):
+        transaction = self._active_transaction()
+        transaction._check_active()
+        return LocalWFile(transaction, path, transaction._staging_path())
+
+    def delete(self, path):
+        self._active_transaction()._add_operation('delete', path)
+
+    def delete_many(self, paths):
+        for path in paths:
+            self.delete(path)
+
+    def write_many(self, files):
+        for path, data in files:
+            f = self.open_for_write(path)
+            try:
+                f.write(data)
+            finally:
+                f.close()
+
+    def write_many_from_paths(self, files):
+        for path, local_path in files:
+            f = self.open_for_write(path)
+            try:
+                with io.open(local_path, "rb") as src:
+                    while True:
+                        buf = src.read(1024 * 1024)
+                        if not buf:
+                            break
+                        f.write(buf)
+            finally:
+                f.close()
+
+    def copy(self, src_branch, src_path, target_path):
+        self._active_transaction()._add_operation('copy', src_branch, src_path, target_path)
+
+    def mv(self, src_path, target_path):
+        self._active_transaction()._add_operation('move', src_path, target_path)
+
+    def __copy__(self):
+        return LocalWriteTransactionAccessToken(self._transaction)
+
+    def __deepcopy__(self, memo=None):
+        return self.__copy__()
+
+
+class LocalWFile:
+    """
+    A stand-in for rpyxet.PyWFile.  Data is written to a staging file that
+    is added to the transaction when the file is closed.
+    """
+
+    def __init__(self, transaction, path, staging_path):
+        self._transaction = transaction
+        self._path = path
+        self._staging_path = staging_path
+        self._file = io.open(staging_path, "wb")
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+            self.closed = True
+            self._transaction._add_operation('write', self._path, self._staging_path)
+
+    def write(self, b):
+        if self._transaction._cancelled:
+            raise RuntimeError("Write terminated as transaction was canceled.")
+        self._file.write(b)
+
+    def readable(self):
+        return False
+
+    def seekable(self):
+        return False
+
+    def writable(self):
+        return True
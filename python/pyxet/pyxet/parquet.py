@@ -0,0 +1,317 @@
+"""
+Provides cached parquet footers and batched column chunk reads for parquet files in Xet repositories
+"""
+import bisect
+import collections
+import io
+import json
+import re
+import struct
+import threading
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    raise ImportError("pyxet.parquet requires the pyarrow package")
+
+from .file_system import XetFS
+from .url_parsing import parse_url
+
+# Number of parquet footers kept by the footer cache.
+FOOTER_CACHE_SIZE = 1024
+
+# Bytes read from the end of a file to get its footer in one request; larger
+# footers take a second read.
+FOOTER_READ_SIZE = 64 * 1024
+
+# Ranges closer than this are fetched as one range, trading a few unused bytes
+# for fewer requests.
+RANGE_COALESCE_GAP = 64 * 1024
+
+# Coalesced ranges are not grown beyond this size.
+MAX_COALESCED_RANGE = 64 * 1024 * 1024
+
+PARQUET_MAGIC = b"PAR1"
+
+_COMMIT_ID = re.compile(r"[0-9a-f]{40}")
+
+
+class FooterCache:
+    """
+    A thread-safe LRU cache of parquet file metadata keyed by (version, path),
+    where the version is the content hash of the file when known, otherwise
+    the commit the url is pinned to or the commit at the head of its branch.
+    Footers of files that have not changed are never fetched twice; files
+    with no known version, e.g. under a tag, are not cached.
+    """
+
+    def __init__(self, max_entries=FOOTER_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            except KeyError:
+                return None
+
+    def put(self, key, metadata):
+        with self._lock:
+            self._entries[key] = metadata
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_footer_cache = FooterCache()
+
+
+def clear_footer_cache():
+    """
+    Drops all cached parquet footers.
+    """
+    _footer_cache.clear()
+
+
+def _file_version(fs, url_path, info):
+    """
+    Returns the version of the file, or None if it cannot be told.
+    """
+    if info.get('content_hash'):
+        return info['content_hash']
+    if _COMMIT_ID.fullmatch(url_path.branch):
+        return url_path.branch
+    try:
+        ref = fs._manager.api_query(url_path.remote(), f"git/refs/heads/{url_path.branch}", "get", "")
+    except RuntimeError:
+        # Not a branch
+        return None
+    return json.loads(bytes(ref))['object']['sha']
+
+
+def _read_footer(handle, size):
+    """
+    Reads and parses the footer of a parquet file of `size` bytes.
+    """
+    tail = handle.read_at(max(size - FOOTER_READ_SIZE, 0), FOOTER_READ_SIZE)
+    if len(tail) < 8 or tail[-4:] != PARQUET_MAGIC:
+        raise ValueError("Not a parquet file")
+    footer_len = struct.unpack("<I", tail[-8:-4])[0]
+    if footer_len + 8 > len(tail):
+        if footer_len + 8 > size:
+            raise ValueError("Corrupt parquet footer")
+        tail = handle.read_at(size - footer_len - 8, footer_len + 8)
+    return pq.read_metadata(pa.BufferReader(tail))
+
+
+def _column_chunk_range(column):
+    start = column.data_page_offset
+    if column.has_dictionary_page and 0 < column.dictionary_page_offset < start:
+        start = column.dictionary_page_offset
+    return start, column.total_compressed_size
+
+
+def _selected_row_groups(metadata, row_groups):
+    if row_groups is None:
+        return list(range(metadata.num_row_groups))
+    if callable(row_groups):
+        return [i for i in range(metadata.num_row_groups) if row_groups(metadata.row_group(i))]
+    return list(row_groups)
+
+
+def _column_selected(path_in_schema, columns):
+    return columns is None or any(path_in_schema == c or path_in_schema.startswith(c + ".") for c in columns)
+
+
+def plan_ranges(metadata, columns=None, row_groups=None):
+    """
+    Returns the sorted (offset, size) byte ranges of the column chunks needed
+    to read `columns` of `row_groups` from a file with this metadata.
+
+    `columns` are column names, a nested column selecting all of its leaves;
+    None selects every column.  `row_groups` is a list of row group indices,
+    or a predicate called with the metadata of each row group; None selects
+    every row group.
+    """
+    ranges = []
+    for i in _selected_row_groups(metadata, row_groups):
+        row_group = metadata.row_group(i)
+        for j in range(row_group.num_columns):
+            column = row_group.column(j)
+            if _column_selected(column.path_in_schema, columns):
+                ranges.append(_column_chunk_range(column))
+    return sorted(ranges)
+
+
+def coalesce_ranges(ranges, gap=RANGE_COALESCE_GAP, max_size=MAX_COALESCED_RANGE):
+    """
+    Merges sorted (offset, size) ranges that overlap or are less than `gap`
+    bytes apart, as long as the merged range is at most `max_size` bytes.
+    """
+    ret = []
+    for offset, size in ranges:
+        if ret:
+            last_offset, last_size = ret[-1]
+            end = max(last_offset + last_size, offset + size)
+            if offset <= last_offset + last_size + gap and end - last_offset <= max_size:
+                ret[-1] = (last_offset, end - last_offset)
+                continue
+        ret.append((offset, size))
+    return ret
+
+
+class _PrefetchedFile:
+    """
+    A read-only file serving reads from prefetched byte ranges, falling back
+    to a positional read of the xet file for anything not prefetched.
+    """
+
+    def __init__(self, handle, size, ranges, buffers):
+        self._handle = handle
+        self._size = size
+        self._starts = [offset for offset, _ in ranges]
+        self._buffers = buffers
+        self._pos = 0
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def writable(self):
+        return False
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self._size + offset
+        else:
+            raise ValueError("Unexpected value for whence")
+        return self._pos
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._size - self._pos
+        size = max(min(size, self._size - self._pos), 0)
+        i = bisect.bisect_right(self._starts, self._pos) - 1
+        if i >= 0:
+            start = self._starts[i]
+            buf = self._buffers[i]
+            if self._pos + size <= start + len(buf):
+                data = buf[self._pos - start:self._pos - start + size]
+                self._pos += size
+                return data
+        data = self._handle.read_at(self._pos, size)
+        self._pos += len(data)
+        return data
+
+
+class XetParquetFile:
+    """
+    A parquet file in a Xet repository whose footer is cached across opens,
+    and whose column chunks are fetched in one batched, concurrent request
+    per read::
+
+        pf = XetParquetFile('xet://xethub.com:XetHub/titanic/main/titanic.parquet')
+        table = pf.read(columns=['Name', 'Age'],
+                        row_groups=lambda rg: rg.num_rows > 0)
+
+    `info` may be passed from a prior detailed listing to skip the stat of
+    the file.
+    """
+
+    def __init__(self, url, fs=None, info=None, footer_cache=None):
+        url_path = parse_url(url, fs.endpoint if fs is not None else None, expect_branch=True)
+        if fs is None:
+            fs = XetFS(url_path.endpoint)
+        if info is None:
+            info = fs.info(url)
+        self.fs = fs
+        self.url_path = url_path
+        self.size = info['size']
+        self._handle = None
+
+        cache = _footer_cache if footer_cache is None else footer_cache
+        version = _file_version(fs, url_path, info)
+        metadata = cache.get((version, url_path.url())) if version is not None else None
+        if metadata is None:
+            metadata = _read_footer(self._reader, self.size)
+            # The version is read apart from the footer, so the file may have
+            # changed in between; cache the footer only if it did not.
+            if version is not None and _file_version(fs, url_path, fs.info(url)) == version:
+                cache.put((version, url_path.url()), metadata)
+        self.metadata = metadata
+
+    @property
+    def _reader(self):
+        # Opened on first read, so a cached footer costs no open.
+        if self._handle is None:
+            repo = self.fs._manager.get_repo(self.url_path.remote())
+            self._handle = repo.open_for_read(self.url_path.branch, self.url_path.path)
+        return self._handle
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def plan(self, columns=None, row_groups=None):
+        """
+        Returns the coalesced byte ranges read by `read()` with these arguments.
+        """
+        return coalesce_ranges(plan_ranges(self.metadata, columns, row_groups))
+
+    def prefetch(self, columns=None, row_groups=None):
+        """
+        Fetches the column chunks of `columns` and `row_groups` in one batched
+        request and returns a pyarrow.parquet.ParquetFile reading from them.
+        """
+        ranges = self.plan(columns, row_groups)
+        buffers = self._reader.read_ranges(ranges) if ranges else []
+        source = _PrefetchedFile(self._reader, self.size, ranges, buffers)
+        return pq.ParquetFile(source, metadata=self.metadata)
+
+    def read(self, columns=None, row_groups=None, use_threads=True):
+        """
+        Reads `columns` of `row_groups` as a pyarrow Table; see `plan_ranges`
+        for the arguments.
+        """
+        selected = _selected_row_groups(self.metadata, row_groups)
+        pf = self.prefetch(columns, selected)
+        return pf.read_row_groups(selected, columns=columns, use_threads=use_threads)
+
+
+def read_metadata(url, fs=None, info=None):
+    """
+    Returns the pyarrow FileMetaData of a parquet file, from the footer cache
+    when the file has not changed since it was last read.
+    """
+    with XetParquetFile(url, fs, info) as pf:
+        return pf.metadata
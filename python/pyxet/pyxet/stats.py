@@ -0,0 +1,136 @@
+"""
+Provides per-operation latency and throughput metrics recorded by the xet bindings
+"""
+import atexit
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+if 'SPHINX_BUILD' not in os.environ:
+    from .rpyxet import rpyxet
+
+PROMETHEUS_METRIC_PREFIX = "pyxet"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Default seconds between calls of the progress callback.
+PROGRESS_CALLBACK_INTERVAL = 1.0
+
+_progress_atexit_lock = threading.Lock()
+_progress_atexit_registered = False
+
+
+def stats():
+    """
+    Returns a snapshot of the metrics recorded for every operation made through
+    the xet bindings (listdir, stat, api_query, get_repo, open_for_read, read,
+    write and commit) since the process started or since `reset_stats()`::
+
+        {'read': {'count': 120, 'errors': 0, 'bytes': 1006632960,
+                  'total_seconds': 3.2, 'mean_seconds': 0.027,
+                  'latency_buckets': [(0.0001, 0), (0.00025, 3), ..., (inf, 0)]},
+         ...}
+
+    `latency_buckets` holds the number of calls whose latency fell at or below
+    each bound, and above the previous one.
+    """
+    ret = rpyxet.get_stats()
+    for op in ret.values():
+        op['mean_seconds'] = op['total_seconds'] / op['count'] if op['count'] > 0 else 0.0
+    return ret
+
+
+def reset_stats():
+    """
+    Resets all recorded metrics to zero.
+    """
+    rpyxet.reset_stats()
+
+
+def set_progress_callback(fn, interval=PROGRESS_CALLBACK_INTERVAL):
+    """
+    Calls `fn` every `interval` seconds, from a background thread, with the
+    aggregate progress of all transfers made through the xet bindings::
+
+        {'elapsed_seconds': 12.0,
+         'bytes_read': 805306368, 'bytes_written': 0,
+         'read_bytes_per_second': 67108864.0, 'write_bytes_per_second': 0.0,
+         'files_completed': 96, 'files_total': 200,
+         'bytes_completed': 805306368, 'bytes_total': 1677721600,
+         'in_flight': 16, 'eta_seconds': 13.0, 'seconds_since_progress': 0.0}
+
+    `files_*` and `bytes_*` cover the copies and syncs in progress; a copy
+    leaves them once it finishes.  `eta_seconds` is None while unknown, and
+    `seconds_since_progress` grows while transfers are stalled.
+    Transfers only update counters, so the overhead does not depend on the
+    number of chunks.  Exceptions raised by `fn` are printed and ignored.
+
+    Replaces any previous callback; `set_progress_callback(None)` stops it.
+    """
+    global _progress_atexit_registered
+    rpyxet.set_progress_callback(fn, interval)
+    if fn is not None:
+        with _progress_atexit_lock:
+            if not _progress_atexit_registered:
+                # Stop the callback thread before the interpreter shuts down.
+                atexit.register(_clear_progress_callback)
+                _progress_atexit_registered = True
+
+
+def _clear_progress_callback():
+    rpyxet.set_progress_callback(None, PROGRESS_CALLBACK_INTERVAL)
+
+
+def prometheus_text(snapshot=None):
+    """
+    Formats a metrics snapshot, by default the current one, in the Prometheus
+    text exposition format.
+    """
+    if snapshot is None:
+        snapshot = stats()
+
+    p = PROMETHEUS_METRIC_PREFIX
+    lines = [f"# HELP {p}_operations_total Number of xet operations.",
+             f"# TYPE {p}_operations_total counter"]
+    lines.extend(f'{p}_operations_total{{op="{op}"}} {m["count"]}' for op, m in snapshot.items())
+    lines.extend([f"# HELP {p}_operation_errors_total Number of failed xet operations.",
+                  f"# TYPE {p}_operation_errors_total counter"])
+    lines.extend(f'{p}_operation_errors_total{{op="{op}"}} {m["errors"]}' for op, m in snapshot.items())
+    lines.extend([f"# HELP {p}_operation_bytes_total Bytes transferred by xet operations.",
+                  f"# TYPE {p}_operation_bytes_total counter"])
+    lines.extend(f'{p}_operation_bytes_total{{op="{op}"}} {m["bytes"]}' for op, m in snapshot.items())
+
+    lines.extend([f"# HELP {p}_operation_duration_seconds Latency of xet operations.",
+                  f"# TYPE {p}_operation_duration_seconds histogram"])
+    for op, m in snapshot.items():
+        cumulative = 0
+        for bound, count in m['latency_buckets']:
+            cumulative += count
+            le = "+Inf" if bound == float('inf') else repr(bound)
+            lines.append(f'{p}_operation_duration_seconds_bucket{{op="{op}",le="{le}"}} {cumulative}')
+        lines.append(f'{p}_operation_duration_seconds_sum{{op="{op}"}} {m["total_seconds"]}')
+        lines.append(f'{p}_operation_duration_seconds_count{{op="{op}"}} {m["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+class _PrometheusHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_prometheus(port, addr=""):
+    """
+    Serves the metrics in the Prometheus text format over HTTP from a daemon
+    thread.  Returns the server; call `shutdown()` on it to stop serving.
+    """
+    server = ThreadingHTTPServer((addr, port), _PrometheusHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
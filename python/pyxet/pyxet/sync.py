@@ -1,17 +1,30 @@
+import os
 from abc import ABC, abstractmethod
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from functools import partial
 
-from pyxet.util import _get_fs_and_path, _isdir, _rel_path, _path_join, _path_split, _path_dirname, _is_illegal_subdirectory_file_name
+from pyxet.util import _get_fs_and_path, _isdir, _rel_path, _path_join, _path_split, _path_dirname, _is_illegal_subdirectory_file_name, \
+    _parallel_find
 from pyxet.file_operations import _single_file_copy_impl, CopyUnit
+from pyxet.sync_manifest import SyncManifest
+from pyxet.tracing import span
+
+if 'SPHINX_BUILD' not in os.environ:
+    from pyxet.rpyxet import rpyxet
 
 XET_MTIME_FORMAT = '%Y-%m-%dT%H:%M:%S%z'
 
+# In streaming mode, the maximum number of sync tasks queued before
+# waiting on the oldest one.  This bounds memory use for very large trees.
+SYNC_STREAMING_MAX_PENDING = 4096
+
 
 class SyncCommand:
 
-    def __init__(self, source, destination, use_mtime, message, dryrun, update_size):
+    def __init__(self, source, destination, use_mtime, message, dryrun, update_size,
+                 manifest=None, reconcile=False, streaming=False, checksum=False, delete=False):
         self._message = message
         self._dryrun = dryrun
         self._source = source
@@ -20,11 +33,34 @@ class SyncCommand:
         self._dest_fs, self._dest_proto, self._dest_root = _get_normalized_fs_protocol_and_path(destination)
         self._use_mtime = use_mtime
         self._update_size = update_size
-        if use_mtime:
+        if checksum:
+            self._cmp = ChecksumSyncComparator(self._src_proto, self._dest_proto)
+            for proto in (self._src_proto, self._dest_proto):
+                if proto not in CONTENT_HASH_PROTOCOLS:
+                    print(f"{proto} files have no content hash; comparing them by size and mtime")
+        elif use_mtime:
             self._cmp = MTimeSyncComparator(self._src_proto, self._dest_proto)
         else:
             self._cmp = SizeOnlySyncComparator()
 
+        # If given, the manifest records the source entries that are up to date at the
+        # destination, so later runs only need to examine entries whose source metadata
+        # has changed.  With reconcile set, the destination is listed in full and the
+        # manifest rebuilt.
+        self._manifest = None
+        if manifest is not None:
+            self._manifest = SyncManifest(manifest,
+                                          f"{self._src_proto}://{self._src_root}",
+                                          f"{self._dest_proto}://{self._dest_root}")
+        self._reconcile = reconcile
+
+        # In streaming mode, the source and destination are walked in sorted order and
+        # merge-joined, so memory use does not grow with the size of the trees.
+        self._streaming = streaming
+
+        # If set, destination files that do not exist in the source are removed.
+        self._delete = delete
+
     def validate(self):
         """
         Performs early validation for the source and destination paths of
@@ -34,17 +70,24 @@ class SyncCommand:
         Raises exceptions on failure
         """
 
-        if self._dest_proto != 'xet':
-            raise ValueError(f"Unsupported destination protocol: {self._dest_proto}, only xet:// targets are supported")
         if self._src_proto == 'xet':
-            raise ValueError(f"Unsupported source protocol: {self._src_proto}, only non-xet sources are supported")
+            # Downloading a xet source
+            if self._dest_proto != 'file':
+                raise ValueError(f"Unsupported destination protocol: {self._dest_proto}, "
+                                 "only local targets are supported for xet:// sources")
+        elif self._dest_proto != 'xet':
+            raise ValueError(f"Unsupported destination protocol: {self._dest_proto}, only xet:// targets are supported")
 
-        # check that the destination specifies an existing branch
-        # TODO: we may want to be able to sync remote location to a new branch?
-        try:
-            self._dest_fs.ls(self._dest_root)
-        except Exception as e:
-            raise ValueError(f"Destination {self._destination} does not exist or unable to access ({e}).")
+        if self._dest_proto == 'xet':
+            # check that the destination specifies an existing branch
+            # TODO: we may want to be able to sync remote location to a new branch?
+            try:
+                self._dest_fs.ls(self._dest_root)
+            except Exception as e:
+                raise ValueError(f"Destination {self._destination} does not exist or unable to access ({e}).")
+        elif self._dest_fs.exists(self._dest_root) and not self._dest_fs.isdir(self._dest_root) \
+                and _isdir(self._src_fs, self._src_root):
+            raise ValueError(f"Destination {self._destination} is not a directory.")
         
         # s3 needs a bucket
         if self._src_proto == 's3' and (self._src_root == '/' or self._src_root == ''):
@@ -65,67 +108,232 @@ class SyncCommand:
         Runs this Sync command, returning SyncStats containing the number of files copied
         during the sync.
         """
+        with span("sync", source=self._source, destination=self._destination,
+                  dryrun=self._dryrun) as trace_span:
+            sync_stats = self._run()
+            trace_span.set_attribute("copied", sync_stats.copied)
+            trace_span.set_attribute("ignored", sync_stats.ignored)
+            trace_span.set_attribute("failed", sync_stats.failed)
+            trace_span.set_attribute("deleted", sync_stats.deleted)
+        return sync_stats
+
+    def _run(self):
         sync_stats = SyncStats()
+        self._stats = sync_stats
+        self._manifest_active = self._manifest is not None and not self._reconcile \
+            and not self._manifest.is_empty()
+        if self._manifest is not None and self._reconcile:
+            self._manifest.clear()
+        if self._manifest_active:
+            # The manifest is read in bulk rather than queried once per entry; in
+            # streaming mode it is merge-joined with the sorted source listing.
+            if self._streaming:
+                self._manifest_entries = _SortedManifestLookup(self._manifest.sorted_entries())
+            else:
+                self._manifest_entries = self._manifest.entries()
 
         srcpath_is_dir = _isdir(self._src_fs, self._src_root)
-        if not self._dryrun:
+        dest_is_xet = self._dest_proto == 'xet'
+        in_transaction = not self._dryrun and dest_is_xet
+        if in_transaction:
             self._dest_fs.start_transaction(self._message)
-        with ThreadPoolExecutor() as executor:
-            futures = []
-            # if src is a single file, we always use sync_with_info
-            if self._use_mtime or srcpath_is_dir == False:
-                self._sync_with_info(executor, futures, self._src_root, self._dest_root)
+        try:
+            with ThreadPoolExecutor() as executor:
+                futures = deque()
+                # if src is a single file, we always use sync_with_info
+                if srcpath_is_dir == False:
+                    self._sync_with_info(executor, futures, self._src_root, self._dest_root)
+                elif self._streaming:
+                    self._sync_with_merge_join(executor, futures, self._src_root, self._dest_root)
+                else:
+                    self._sync_with_ls(executor, futures, self._src_root, self._dest_root)
+
+                # Waiting for all copy jobs to complete
+                for future in futures:
+                    self._record_result(future)
+
+            if in_transaction:
+                self._dest_fs.end_transaction()
+        except BaseException:
+            # Nothing of a failed or interrupted sync may be recorded in the
+            # manifest, or the next run would skip entries that were never committed.
+            if in_transaction and self._dest_fs.intrans:
+                self._dest_fs.cancel_transaction()
+            if self._manifest is not None:
+                self._manifest.discard()
+            raise
+
+        if self._delete and self._manifest_active:
+            print("Target was not listed as the manifest was used; no files deleted. Use --reconcile to delete files.")
+
+        if self._manifest is not None:
+            if self._dryrun:
+                self._manifest.discard()
             else:
-                self._sync_with_ls(executor, futures, self._src_root, self._dest_root)
-
-            # Waiting for all copy jobs to complete
-            for future in futures:
-                try:
-                    was_copied = future.result()
-                    if was_copied:
-                        sync_stats.copied += 1
-                    else:
-                        sync_stats.ignored += 1
-                except Exception as e:
-                    print(f"Error: {e}")
-                    sync_stats.failed += 1
-
-        if not self._dryrun:
-            self._dest_fs.end_transaction()
+                self._manifest.commit()
 
         return sync_stats
 
+    def _record_result(self, future):
+        """
+        Waits for a sync task to complete and counts its outcome in the stats.
+        """
+        try:
+            was_copied = future.result()
+            if was_copied:
+                self._stats.copied += 1
+            else:
+                self._stats.ignored += 1
+        except Exception as e:
+            print(f"Error: {e}")
+            self._stats.failed += 1
+
+    def _skip_unchanged(self, relpath, src_info):
+        """
+        Returns True, and counts the entry as ignored, if the manifest shows the source
+        entry is unchanged since it was last synced.
+        """
+        if not self._manifest_active:
+            return False
+        if self._manifest_entries.get(relpath) == _get_sync_signature(self._src_proto, src_info):
+            self._stats.ignored += 1
+            return True
+        return False
+
     def _sync_with_ls(self, executor, futures, src_path, dest_path):
         """
         Sync the src_path to the dest_path using ls calls on both paths and comparing the
         two.
 
-        Note that ls on xet-fs doesn't return an mtime and thus, will not be able to compare
-        on that field.
+        Listings on xet-fs include the last modified time, so mtime comparisons don't need
+        an info call per file.
+
+        If a manifest from a previous run is available, the destination is not listed.
+        Entries unchanged since the last run are skipped and the destination is only
+        queried for the entries that changed.
         """
         # This only syncs folders. single files should always go to sync_with_info
-        try:
-            dest_files = self._dest_fs.find(dest_path, detail=True)
-        except RuntimeError:
-            dest_files = {}
+        if self._manifest_active:
+            dest_files = None
+        else:
+            try:
+                dest_files = dict(_parallel_find(self._dest_fs, dest_path))
+            except (FileNotFoundError, RuntimeError):
+                dest_files = {}
         total_size = 0
-        for abs_path, src_info in self._src_fs.find(src_path, detail=True).items():
+        for abs_path, src_info in _parallel_find(self._src_fs, src_path):
             relpath = _rel_path(abs_path, src_path)
 
             if _is_illegal_subdirectory_file_name(relpath):
                 print(f"{abs_path} is an invalid file (not copied).")
                 continue
 
+            total_size += src_info.get('size', 0)
             dest_for_this_path = _path_join(self._dest_fs, dest_path, relpath)
-            dest_info = dest_files.get(dest_for_this_path)
+            if dest_files is not None and self._delete:
+                # Whatever remains in dest_files afterwards exists only at the destination.
+                dest_info = dest_files.pop(dest_for_this_path, None)
+            elif dest_files is not None:
+                dest_info = dest_files.get(dest_for_this_path)
 
-            partial_func = partial(self._sync_file_task, abs_path, src_info, dest_for_this_path, dest_info)
+            if self._skip_unchanged(relpath, src_info):
+                continue
+
+            if dest_files is None:
+                partial_func = partial(self._sync_with_mtime_task, abs_path, dest_for_this_path, src_info, relpath)
+            else:
+                partial_func = partial(self._sync_file_task, abs_path, src_info, dest_for_this_path, dest_info,
+                                       relpath)
             futures.append(executor.submit(partial_func))
+
+        if self._delete and dest_files:
+            self._delete_dest_files([(_rel_path(p, dest_path), p) for p in dest_files.keys()])
+
+        if self._update_size:
+            self._update_remote_size(total_size)
+
+    def _sync_with_merge_join(self, executor, futures, src_path, dest_path):
+        """
+        Sync the src_path to the dest_path by walking both trees in sorted order and
+        merge-joining the two listings.  Copy tasks are issued as entries are found, and
+        at most SYNC_STREAMING_MAX_PENDING tasks are outstanding at once, so memory use
+        is bounded by the size of the largest directory rather than the whole tree.
+        """
+        src_entries = _sorted_walk(self._src_fs, src_path)
+        if self._manifest_active:
+            # Only entries that changed since the last run are checked against the destination.
+            dest_entries = iter(())
+        else:
+            dest_entries = _sorted_walk(self._dest_fs, dest_path)
+        dest_entry = next(dest_entries, None)
+
+        total_size = 0
+        dest_only = []
+        for relpath, abs_path, src_info in src_entries:
+            # Advance past any destination entries that are not in the source.
+            while dest_entry is not None and dest_entry[0] < relpath:
+                dest_only.append(dest_entry[:2])
+                dest_entry = next(dest_entries, None)
+            if len(dest_only) >= SYNC_STREAMING_MAX_PENDING:
+                self._delete_dest_files(dest_only)
+                dest_only = []
+
+            dest_info = None
+            if dest_entry is not None and dest_entry[0] == relpath:
+                dest_info = dest_entry[2]
+                dest_entry = next(dest_entries, None)
+
             total_size += src_info.get('size', 0)
+            if self._skip_unchanged(relpath, src_info):
+                continue
+
+            dest_for_this_path = _path_join(self._dest_fs, dest_path, relpath)
+            if self._manifest_active:
+                partial_func = partial(self._sync_with_mtime_task, abs_path, dest_for_this_path, src_info, relpath)
+            else:
+                partial_func = partial(self._sync_file_task, abs_path, src_info, dest_for_this_path, dest_info,
+                                       relpath)
+            futures.append(executor.submit(partial_func))
+
+            if len(futures) >= SYNC_STREAMING_MAX_PENDING:
+                self._record_result(futures.popleft())
+
+        # Anything left in the destination listing is not in the source.
+        while dest_entry is not None:
+            dest_only.append(dest_entry[:2])
+            dest_entry = next(dest_entries, None)
+        self._delete_dest_files(dest_only)
 
         if self._update_size:
             self._update_remote_size(total_size)
 
+    def _delete_dest_files(self, entries):
+        """
+        Deletes destination files that do not exist in the source, if deletion is enabled.
+        entries is a list of (relpath, dest_path) tuples.
+        """
+        if not self._delete or len(entries) == 0:
+            return
+
+        if self._dest_proto == 'xet':
+            # Never remove the repository's own attributes file.
+            entries = [e for e in entries if _path_split(self._dest_fs, e[1])[-1] != '.gitattributes']
+
+        paths = [p for _, p in entries]
+        self._stats.deleted += len(paths)
+        if len(paths) == 0:
+            return
+        if self._dryrun:
+            for p in paths:
+                print(f"Deleting {p}")
+        else:
+            # For xet targets this is one batched delete in the write transaction.
+            self._dest_fs.rm(paths)
+
+        if self._manifest is not None:
+            for relpath, _ in entries:
+                self._manifest.remove(relpath)
+
     def _sync_with_info(self, executor, futures, src_path, dest_path):
         """
         Sync the src_path to the dest_path by calling `info` on the destination for files
@@ -139,11 +347,11 @@ class SyncCommand:
             fname = _path_split(self._src_fs, abs_path)[-1]
             # Tack it on to the end of the dest path to make the output name
             dest_for_this_path = _path_join(self._dest_fs, dest_path, fname)
-            partial_func = partial(self._sync_with_mtime_task, abs_path, dest_for_this_path, src_info)
+            partial_func = partial(self._sync_with_mtime_task, abs_path, dest_for_this_path, src_info, fname)
             futures.append(executor.submit(partial_func))
             total_size += src_info.get('size', 0)
         else:
-            for abs_path, src_info in self._src_fs.find(src_path, detail=True).items():
+            for abs_path, src_info in _parallel_find(self._src_fs, src_path):
                 relpath = _rel_path(abs_path, src_path)
 
                 if _is_illegal_subdirectory_file_name(relpath):
@@ -152,14 +360,17 @@ class SyncCommand:
 
                 dest_for_this_path = _path_join(self._dest_fs, dest_path, relpath)
                 if src_info['type'] != 'directory':
-                    partial_func = partial(self._sync_with_mtime_task, abs_path, dest_for_this_path, src_info)
-                    futures.append(executor.submit(partial_func))
                     total_size += src_info.get('size', 0)
+                    if self._skip_unchanged(relpath, src_info):
+                        continue
+                    partial_func = partial(self._sync_with_mtime_task, abs_path, dest_for_this_path, src_info,
+                                           relpath)
+                    futures.append(executor.submit(partial_func))
 
         if self._update_size:
             self._update_remote_size(total_size)
 
-    def _sync_with_mtime_task(self, src_path, dest_path, src_info):
+    def _sync_with_mtime_task(self, src_path, dest_path, src_info, relpath=None):
         """
         Fetch info for the dest_path from remote and use that to sync the file
         """
@@ -167,20 +378,27 @@ class SyncCommand:
             dest_info = self._dest_fs.info(dest_path)
         except FileNotFoundError:
             dest_info = None
-        return self._sync_file_task(src_path, src_info, dest_path, dest_info)
+        return self._sync_file_task(src_path, src_info, dest_path, dest_info, relpath)
 
-    def _sync_file_task(self, src_path, src_info, dest_path, dest_info):
+    def _sync_file_task(self, src_path, src_info, dest_path, dest_info, relpath=None):
         """
         Task to sync the src to the dest using self's SyncComparator to determine if the files
         should be copied.
 
-        Will return whether the file was copied or not.
+        Will return whether the file was copied or not.  If a manifest is in use, the
+        entry is recorded in it under relpath once it is up to date.
         """
+        if dest_info is not None and self._use_mtime and self._dest_proto == 'xet' \
+                and _get_last_modified(self._dest_proto, dest_info) is None:
+            # Older listings may not carry the modification time; fall back to info.
+            dest_info = self._dest_fs.info(dest_path)
+
         if dest_info is not None and src_info['type'] != dest_info['type']:
             print(f"Copy failed: {src_path} is a {src_info['type']}, {dest_path} is a {dest_info['type']}")
             raise ValueError(f"{src_path} and {dest_path} are not the same type of entry")
 
         size = src_info.get('size', None)
+        copied = False
         if dest_info is None or self._cmp.should_sync(src_info, dest_info):
             if not self._dryrun:
                 dest_dir = _path_dirname(self._dest_fs, dest_path)
@@ -188,9 +406,11 @@ class SyncCommand:
                 _single_file_copy_impl(cp_copy, self._src_fs, self._dest_fs)
             else:
                 print(f"Copying {src_path} to {dest_path}")
-            return True
-        # ignored
-        return False
+            copied = True
+
+        if self._manifest is not None and relpath is not None:
+            self._manifest.record(relpath, _get_sync_signature(self._src_proto, src_info))
+        return copied
 
     def _update_remote_size(self, size):
         """
@@ -217,10 +437,64 @@ def _get_normalized_fs_protocol_and_path(uri):
     return fs, fs.protocol, path
 
 
+class _SortedManifestLookup:
+    """
+    Looks up the manifest signatures of paths requested in lexicographic order,
+    such as those yielded by _sorted_walk, reading the manifest in order alongside.
+    """
+
+    def __init__(self, entries):
+        self._entries = entries
+        self._entry = next(entries, None)
+
+    def get(self, path):
+        while self._entry is not None and self._entry[0] < path:
+            self._entry = next(self._entries, None)
+        if self._entry is not None and self._entry[0] == path:
+            return self._entry[1]
+        return None
+
+
+def _sorted_walk(fs, root):
+    """
+    Yields (relpath, path, info) for every file under root, in lexicographic order of
+    relpath, listing one directory at a time.  Relative paths always use '/' as the
+    separator so that listings from different file systems can be merged.
+
+    A root that does not exist yields nothing.
+    """
+    try:
+        listing = fs.ls(root, detail=True)
+    except (FileNotFoundError, RuntimeError):
+        return
+    yield from _sorted_walk_entries(fs, listing, "")
+
+
+def _sorted_walk_entries(fs, listing, rel_dir):
+    entries = []
+    for info in listing:
+        name = info['name'].rstrip('/').rsplit('/', 1)[-1]
+        if _is_illegal_subdirectory_file_name(name):
+            continue
+        is_dir = info['type'] == 'directory'
+        # Sorting directories as 'name/' places all of their contents exactly where
+        # their relative paths fall in lexicographic order.
+        entries.append((name + '/' if is_dir else name, name, is_dir, info))
+    entries.sort(key=lambda e: e[0])
+
+    for _, name, is_dir, info in entries:
+        relpath = rel_dir + '/' + name if rel_dir else name
+        if is_dir:
+            yield from _sorted_walk_entries(fs, fs.ls(info['name'], detail=True), relpath)
+        else:
+            yield relpath, info['name'], info
+
+
 def _get_last_modified(protocol: str, info: dict) -> float:
     if protocol == 'xet':
-        mod_time = info['last_modified']  # str
-        mod_time = datetime.strptime(mod_time, XET_MTIME_FORMAT).timestamp()
+        mod_time = info.get('last_modified')  # str
+        if mod_time is not None:
+            mod_time = datetime.strptime(mod_time, XET_MTIME_FORMAT).timestamp()
     elif protocol == 's3':
         mod_time = info['LastModified']  # datetime
         mod_time = mod_time.timestamp()
@@ -233,6 +507,18 @@ def _get_last_modified(protocol: str, info: dict) -> float:
     return mod_time
 
 
+def _get_sync_signature(protocol: str, info: dict) -> tuple:
+    """
+    Returns the (size, mtime, etag) signature of an entry, as stored in a SyncManifest.
+    """
+    try:
+        mod_time = _get_last_modified(protocol, info)
+    except (KeyError, TypeError, ValueError):
+        mod_time = None
+    etag = info.get('ETag', info.get('etag'))
+    return info.get('size'), mod_time, etag
+
+
 class SyncComparator(ABC):
     @abstractmethod
     def should_sync(self, src_info, dest_info):
@@ -270,7 +556,62 @@ class MTimeSyncComparator(SyncComparator):
             and src_mtime > dest_mtime
 
 
+# Protocols whose entries have a xet merkle hash, stored or computed.
+CONTENT_HASH_PROTOCOLS = ('xet', 'file')
+
+
+def _get_content_hash(protocol: str, info: dict):
+    """
+    Returns the xet merkle hash of an entry, computing it for local files,
+    or None if it is not available.
+    """
+    if protocol == 'xet':
+        return info.get('content_hash')
+    elif protocol == 'file':
+        return rpyxet.compute_file_hash(info['name'])
+    else:
+        return None
+
+
+class ChecksumSyncComparator(SyncComparator):
+    """
+    Compare info by size and xet content hash.
+    Local files are hashed with the same merkle hash
+    that xet computes for the files it stores.
+    We should sync if the sizes or the hashes differ.
+    If a hash is not available for either side, e.g.
+    for S3 sources, we compare by size and mtime instead.
+    """
+    def __init__(self, src_proto, dest_proto):
+        self._src_proto = src_proto
+        self._dest_proto = dest_proto
+        self._mtime_cmp = MTimeSyncComparator(src_proto, dest_proto)
+        self._warned = False
+
+    def _fall_back(self, protocol, info, src_info, dest_info):
+        # Protocols without hashes are reported once by SyncCommand; entries
+        # missing a hash they should have (e.g. on the localhost-fs backend)
+        # are reported here, once per comparator.
+        if protocol in CONTENT_HASH_PROTOCOLS and not self._warned:
+            self._warned = True
+            print(f"WARN: {info['name']} has no content hash; comparing files without one by size and mtime")
+        return self._mtime_cmp.should_sync(src_info, dest_info)
+
+    def should_sync(self, src_info, dest_info):
+        if src_info['size'] != dest_info['size']:
+            return True
+
+        dest_hash = _get_content_hash(self._dest_proto, dest_info)
+        if dest_hash is None:
+            return self._fall_back(self._dest_proto, dest_info, src_info, dest_info)
+        src_hash = _get_content_hash(self._src_proto, src_info)
+        if src_hash is None:
+            return self._fall_back(self._src_proto, src_info, src_info, dest_info)
+        return src_hash != dest_hash
+
+
 class SyncStats:
     copied = 0
     ignored = 0
     failed = 0
+    deleted = 0
@@ -0,0 +1,211 @@
+"""
+Provides a local manifest of previously synced entries for xet sync
+"""
+import os
+import sqlite3
+import threading
+
+MANIFEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    source TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER,
+    mtime REAL,
+    etag TEXT,
+    PRIMARY KEY (source, destination, path)
+)
+"""
+
+# Updates not yet committed are staged in temporary tables of the connection,
+# so they can be dropped by discard() without being held in memory.
+PENDING_SCHEMA = """
+CREATE TEMP TABLE IF NOT EXISTS pending_records (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime REAL,
+    etag TEXT
+);
+CREATE TEMP TABLE IF NOT EXISTS pending_removals (
+    path TEXT PRIMARY KEY
+);
+"""
+
+# Number of pending updates buffered in memory before they are staged.
+MANIFEST_FLUSH_SIZE = 4096
+
+# Number of entries read per query by sorted_entries().
+MANIFEST_READ_BATCH = 4096
+
+
+class SyncManifest:
+    """
+    A local SQLite index of the (path, size, mtime, etag) of every source entry
+    that a previous sync from `source` to `destination` left up to date.
+
+    A sync consults the manifest to skip entries whose source metadata has not
+    changed since the last run, without listing or querying the destination
+    for them.  Updates are buffered and only written by `commit()`, which
+    should be called once the sync transaction has been committed, or dropped
+    by `discard()` if it fails.
+    """
+
+    def __init__(self, path, source, destination):
+        path = os.path.expanduser(path)
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+
+        self._source = source
+        self._destination = destination
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(MANIFEST_SCHEMA)
+        self._conn.executescript(PENDING_SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._pending_records = []
+        self._pending_removals = []
+        self._clear_on_commit = False
+
+    def is_empty(self):
+        """
+        Returns True if there is no record of a previous sync between
+        this source and destination.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM entries WHERE source = ? AND destination = ? LIMIT 1",
+                (self._source, self._destination)).fetchone()
+        return row is None
+
+    def get(self, path):
+        """
+        Returns the recorded (size, mtime, etag) signature of `path`,
+        or None if the path is not in the manifest.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime, etag FROM entries WHERE source = ? AND destination = ? AND path = ?",
+                (self._source, self._destination, path)).fetchone()
+        return None if row is None else tuple(row)
+
+    def is_unchanged(self, path, signature):
+        """
+        Returns True if `path` was recorded with exactly this signature.
+        """
+        return self.get(path) == tuple(signature)
+
+    def entries(self):
+        """
+        Returns a dict of the recorded (size, mtime, etag) signature of every
+        path, read in one query.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size, mtime, etag FROM entries WHERE source = ? AND destination = ?",
+                (self._source, self._destination)).fetchall()
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def sorted_entries(self, batch_size=None):
+        """
+        Yields (path, signature) for every recorded path in lexicographic order
+        of path, reading `batch_size` (default MANIFEST_READ_BATCH) entries per query.
+        """
+        if batch_size is None:
+            batch_size = MANIFEST_READ_BATCH
+        last = None
+        while True:
+            with self._lock:
+                if last is None:
+                    rows = self._conn.execute(
+                        "SELECT path, size, mtime, etag FROM entries WHERE source = ? AND destination = ? "
+                        "ORDER BY path LIMIT ?", (self._source, self._destination, batch_size)).fetchall()
+                else:
+                    rows = self._conn.execute(
+                        "SELECT path, size, mtime, etag FROM entries WHERE source = ? AND destination = ? "
+                        "AND path > ? ORDER BY path LIMIT ?",
+                        (self._source, self._destination, last, batch_size)).fetchall()
+            for row in rows:
+                yield row[0], tuple(row[1:])
+            if len(rows) < batch_size:
+                return
+            last = rows[-1][0]
+
+    def record(self, path, signature):
+        """
+        Records that `path` is up to date at the destination with the given
+        (size, mtime, etag) signature.  Thread safe.
+        """
+        with self._lock:
+            self._pending_records.append((path,) + tuple(signature))
+            if len(self._pending_records) >= MANIFEST_FLUSH_SIZE:
+                self._flush_pending()
+
+    def remove(self, path):
+        """
+        Removes `path` from the manifest.  Thread safe.
+        """
+        with self._lock:
+            self._pending_removals.append((path,))
+            if len(self._pending_removals) >= MANIFEST_FLUSH_SIZE:
+                self._flush_pending()
+
+    def _flush_pending(self):
+        # Called with the lock held.
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pending_records (path, size, mtime, etag) VALUES (?, ?, ?, ?)",
+                self._pending_records)
+            self._conn.executemany("INSERT OR REPLACE INTO pending_removals (path) VALUES (?)",
+                                   self._pending_removals)
+        self._pending_records = []
+        self._pending_removals = []
+
+    def _clear_pending(self):
+        # Called with the lock held.
+        with self._conn:
+            self._conn.execute("DELETE FROM pending_records")
+            self._conn.execute("DELETE FROM pending_removals")
+        self._pending_records = []
+        self._pending_removals = []
+        self._clear_on_commit = False
+
+    def clear(self):
+        """
+        Drops all existing entries for this source and destination on the next commit,
+        so the manifest is rebuilt from the entries recorded in this run.
+        """
+        with self._lock:
+            self._clear_on_commit = True
+
+    def commit(self):
+        """
+        Writes all pending updates to the manifest.
+        """
+        with self._lock:
+            self._flush_pending()
+            with self._conn:
+                if self._clear_on_commit:
+                    self._conn.execute("DELETE FROM entries WHERE source = ? AND destination = ?",
+                                       (self._source, self._destination))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (source, destination, path, size, mtime, etag) "
+                    "SELECT ?, ?, path, size, mtime, etag FROM pending_records",
+                    (self._source, self._destination))
+                self._conn.execute(
+                    "DELETE FROM entries WHERE source = ? AND destination = ? "
+                    "AND path IN (SELECT path FROM pending_removals)",
+                    (self._source, self._destination))
+                self._conn.execute("DELETE FROM pending_records")
+                self._conn.execute("DELETE FROM pending_removals")
+            self._clear_on_commit = False
+
+    def discard(self):
+        """
+        Drops all pending updates, e.g. if the sync transaction failed.
+        """
+        with self._lock:
+            self._clear_pending()
+
+    def close(self):
+        self._conn.close()
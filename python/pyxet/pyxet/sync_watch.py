@@ -0,0 +1,373 @@
+"""
+Provides continuous watch-mode sync of a local directory to a xet repository
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pyxet.commit_transaction import TRANSACTION_FILE_LIMIT
+from pyxet.util import _path_join, _path_dirname, _rel_path, _is_illegal_subdirectory_file_name
+from pyxet.file_operations import _single_file_copy_impl, CopyUnit
+from pyxet.sync import _get_sync_signature
+
+# inotify event flags, from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+INOTIFY_EVENT_HEADER = struct.Struct('iIII')
+
+# Defaults for how changes are batched into commits.
+WATCH_DEBOUNCE_SECONDS = 2.0
+WATCH_MAX_BATCH_SECONDS = 60.0
+# A transaction commits every TRANSACTION_FILE_LIMIT files, so a larger batch
+# would land as several commits.
+WATCH_MAX_BATCH_FILES = TRANSACTION_FILE_LIMIT
+WATCH_MAX_BATCH_BYTES = 10 * 1024 * 1024 * 1024
+WATCH_POLL_INTERVAL_SECONDS = 5.0
+
+
+class WatchChanges:
+    """
+    The changes reported by a watcher since it was last polled.
+    Paths are absolute.  If rescan is set, changes may have been lost
+    and the whole tree needs to be compared again.
+    """
+    __slots__ = ['changed', 'deleted', 'deleted_dirs', 'rescan']
+
+    def __init__(self):
+        self.changed = set()
+        self.deleted = set()
+        self.deleted_dirs = set()
+        self.rescan = False
+
+    def __bool__(self):
+        return bool(self.changed or self.deleted or self.deleted_dirs or self.rescan)
+
+
+class InotifyWatcher:
+    """
+    Watches a directory tree for changes with Linux inotify.
+    """
+
+    def __init__(self, root):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._libc = libc
+        self._root = root
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches = {}
+        self._add_tree(root, None)
+
+    @staticmethod
+    def is_supported():
+        return sys.platform.startswith('linux')
+
+    def _add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_add_watch failed on {path}: {os.strerror(errno)}")
+        self._watches[wd] = path
+
+    def _add_tree(self, root, changes):
+        """
+        Watches root and every directory below it.  If changes is given,
+        every file found is reported as changed.
+        """
+        for dirpath, _, filenames in os.walk(root):
+            self._add_watch(dirpath)
+            if changes is not None:
+                changes.changed.update(os.path.join(dirpath, f) for f in filenames)
+
+    def poll(self, timeout):
+        changes = WatchChanges()
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return changes
+
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            self._parse_events(buf, changes)
+        return changes
+
+    def _parse_events(self, buf, changes):
+        offset = 0
+        while offset < len(buf):
+            wd, mask, _, name_len = INOTIFY_EVENT_HEADER.unpack_from(buf, offset)
+            offset += INOTIFY_EVENT_HEADER.size
+            name = os.fsdecode(buf[offset:offset + name_len].rstrip(b'\0'))
+            offset += name_len
+
+            if mask & IN_Q_OVERFLOW:
+                changes.rescan = True
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+
+            dirpath = self._watches.get(wd)
+            if dirpath is None or not name:
+                continue
+            path = os.path.join(dirpath, name)
+
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_tree(path, changes)
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    changes.deleted_dirs.add(path)
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                changes.changed.add(path)
+                changes.deleted.discard(path)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                changes.deleted.add(path)
+                changes.changed.discard(path)
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """
+    Watches a directory tree for changes by comparing the size and mtime of
+    every file against the previous scan, scanning at most every `interval`
+    seconds.
+    """
+
+    def __init__(self, root, interval=WATCH_POLL_INTERVAL_SECONDS):
+        self._root = root
+        self._interval = interval
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _scan(self):
+        snapshot = {}
+        for dirpath, _, filenames in os.walk(self._root):
+            for f in filenames:
+                path = os.path.join(dirpath, f)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                snapshot[path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def poll(self, timeout):
+        changes = WatchChanges()
+        wait = self._next_scan - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return changes
+        time.sleep(max(wait, 0))
+        self._next_scan = time.monotonic() + self._interval
+        snapshot = self._scan()
+        for path, stat in snapshot.items():
+            if self._snapshot.get(path) != stat:
+                changes.changed.add(path)
+        changes.deleted = set(self._snapshot.keys() - snapshot.keys())
+        self._snapshot = snapshot
+        return changes
+
+    def close(self):
+        pass
+
+
+class WatchSync:
+    """
+    Continuously syncs a local directory to a xet destination.
+
+    Changed paths are collected from the watcher and debounced into batches.
+    A batch is committed once no change has arrived for `debounce` seconds, or
+    once it has been open for `max_batch_seconds`, holds `max_batch_files`
+    files or `max_batch_bytes` bytes.  Each batch is committed through one
+    write transaction, which commits every TRANSACTION_FILE_LIMIT files, so
+    a `max_batch_files` above that limit splits a batch into several commits.
+    """
+
+    def __init__(self, sync_command, debounce=WATCH_DEBOUNCE_SECONDS,
+                 max_batch_seconds=WATCH_MAX_BATCH_SECONDS,
+                 max_batch_files=WATCH_MAX_BATCH_FILES,
+                 max_batch_bytes=WATCH_MAX_BATCH_BYTES,
+                 use_polling=False):
+        self._cmd = sync_command
+        self._src_root = sync_command._src_root
+        self._dest_fs = sync_command._dest_fs
+        self._dest_root = sync_command._dest_root
+        self._message = sync_command._message
+        self._delete = sync_command._delete
+        self._debounce = debounce
+        self._max_batch_seconds = max_batch_seconds
+        self._max_batch_files = max_batch_files
+        self._max_batch_bytes = max_batch_bytes
+        self._use_polling = use_polling or not InotifyWatcher.is_supported()
+
+    def validate(self):
+        if self._cmd._dryrun:
+            raise ValueError("--watch does not support --dryrun")
+        if self._cmd._src_proto != 'file':
+            raise ValueError("--watch is only supported for local sources")
+        if self._cmd._dest_proto != 'xet':
+            raise ValueError("--watch is only supported for xet:// targets")
+
+    def _make_watcher(self):
+        if not self._use_polling:
+            try:
+                return InotifyWatcher(self._src_root)
+            except OSError as e:
+                print(f"inotify unavailable ({e}), falling back to polling")
+        return PollingWatcher(self._src_root)
+
+    def run(self, stop_event=None):
+        """
+        Watches the source and commits batches until interrupted or, if given,
+        until stop_event is set.  Changes made before the watch started are
+        picked up by a regular sync first.
+        """
+        watcher = self._make_watcher()
+        self._cmd.run()
+
+        pending = WatchChanges()
+        pending_bytes = 0
+        batch_start = None
+        last_change = None
+        try:
+            while stop_event is None or not stop_event.is_set():
+                changes = watcher.poll(self._debounce)
+                now = time.monotonic()
+                if changes:
+                    if batch_start is None:
+                        batch_start = now
+                    last_change = now
+                    pending_bytes += _merge_changes(pending, changes)
+
+                if batch_start is None:
+                    continue
+
+                if (now - last_change >= self._debounce
+                        or now - batch_start >= self._max_batch_seconds
+                        or len(pending.changed) + len(pending.deleted) >= self._max_batch_files
+                        or pending_bytes >= self._max_batch_bytes):
+                    self._commit_batch(pending)
+                    pending = WatchChanges()
+                    pending_bytes = 0
+                    batch_start = None
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if pending:
+                self._commit_batch(pending)
+            watcher.close()
+
+    def _dest_path(self, path):
+        return _path_join(self._dest_fs, self._dest_root, _rel_path(path, self._src_root).replace(os.sep, '/'))
+
+    def _commit_batch(self, changes):
+        """
+        Commits one batch of changes through a single write transaction.
+        """
+        if changes.rescan:
+            print("Watch events were lost; running a full sync")
+            self._cmd.run()
+            return
+
+        copies = []
+        deletes = []
+        for path in changes.changed:
+            relpath = _rel_path(path, self._src_root)
+            if _is_illegal_subdirectory_file_name(relpath):
+                continue
+            if os.path.isfile(path):
+                dest_path = self._dest_path(path)
+                copies.append((relpath, CopyUnit(src_path=path, dest_path=dest_path,
+                                                 dest_dir=_path_dirname(self._dest_fs, dest_path),
+                                                 size=os.path.getsize(path))))
+            elif not os.path.exists(path):
+                deletes.append((relpath, self._dest_path(path)))
+
+        if self._delete:
+            deletes.extend((_rel_path(p, self._src_root), self._dest_path(p))
+                           for p in changes.deleted if not os.path.exists(p))
+            for d in changes.deleted_dirs:
+                if not os.path.exists(d):
+                    try:
+                        deletes.extend((_rel_path(p, self._dest_root), p)
+                                       for p in self._dest_fs.find(self._dest_path(d)))
+                    except (FileNotFoundError, RuntimeError):
+                        pass
+        else:
+            deletes = []
+
+        if len(copies) == 0 and len(deletes) == 0:
+            return
+
+        manifest = self._cmd._manifest
+        print(f"Committing {len(copies)} changed and {len(deletes)} deleted files")
+        self._dest_fs.start_transaction(self._message)
+        try:
+            with ThreadPoolExecutor() as executor:
+                futures = [(relpath, cp, executor.submit(_single_file_copy_impl, cp, self._cmd._src_fs,
+                                                         self._dest_fs))
+                           for relpath, cp in copies]
+            for relpath, cp, future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Error: {e}")
+                    continue
+                if manifest is not None:
+                    manifest.record(relpath, _get_sync_signature('file', self._cmd._src_fs.info(cp.src_path)))
+            if len(deletes) > 0:
+                self._dest_fs.rm([p for _, p in deletes])
+                if manifest is not None:
+                    for relpath, _ in deletes:
+                        manifest.remove(relpath)
+            self._dest_fs.end_transaction()
+        except BaseException:
+            # A half-written batch is never committed; its changes stay in the
+            # source and are picked up by the next sync.
+            if self._dest_fs.intrans:
+                self._dest_fs.cancel_transaction()
+            if manifest is not None:
+                manifest.discard()
+            raise
+        if manifest is not None:
+            manifest.commit()
+
+
+def _merge_changes(pending, changes):
+    """
+    Merges newly reported changes into the pending batch, returning the
+    number of bytes added to it.
+    """
+    added_bytes = 0
+    for path in changes.changed:
+        if path not in pending.changed:
+            try:
+                added_bytes += os.path.getsize(path)
+            except OSError:
+                pass
+        pending.changed.add(path)
+        pending.deleted.discard(path)
+    for path in changes.deleted:
+        pending.deleted.add(path)
+        pending.changed.discard(path)
+    pending.deleted_dirs.update(changes.deleted_dirs)
+    pending.rescan = pending.rescan or changes.rescan
+    return added_bytes
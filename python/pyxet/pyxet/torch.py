@@ -0,0 +1,222 @@
+"""
+Provides PyTorch datasets reading files from Xet repositories
+"""
+import collections
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from fsspec.spec import has_magic
+
+try:
+    import torch.distributed
+    from torch.utils.data import Dataset, IterableDataset, get_worker_info
+except ImportError:
+    raise ImportError("pyxet.torch requires the torch package")
+
+from .file_system import XetFS
+from .url_parsing import parse_url
+
+# Number of files read ahead of the one being consumed by each worker.
+READ_AHEAD = 8
+
+# Bytes of file contents kept in memory by each XetDataset worker.
+CACHE_SIZE = 256 * 1024 * 1024
+
+
+def _filesystem(urls, endpoint):
+    """
+    Returns the XetFS for `endpoint`, by default the endpoint of the first url.
+    """
+    if endpoint is None:
+        first = urls if isinstance(urls, str) else urls[0]
+        endpoint = parse_url(first, expect_repo=None).endpoint
+    return XetFS(endpoint)
+
+
+def _resolve_files(fs, urls):
+    """
+    Expands a glob, a directory or a file, or a list of them, to the sorted
+    list of files they match.
+    """
+    if isinstance(urls, str):
+        urls = [urls]
+    files = set()
+    for url in urls:
+        if has_magic(url):
+            files.update(p for p, info in fs.glob(url, detail=True).items() if info['type'] == 'file')
+        else:
+            files.update(fs.find(url))
+    if not files:
+        raise ValueError(f"No files found matching {urls}")
+    return sorted(files)
+
+
+def _default_transform(path, data):
+    return path, data
+
+
+def _distributed_rank():
+    if torch.distributed.is_available() and torch.distributed.is_initialized():
+        return torch.distributed.get_rank(), torch.distributed.get_world_size()
+    return 0, 1
+
+
+def _worker():
+    """
+    Returns the id of this DataLoader worker and the number of workers.
+    """
+    worker = get_worker_info()
+    if worker is None:
+        return 0, 1
+    return worker.id, worker.num_workers
+
+
+class XetIterableDataset(IterableDataset):
+    """
+    Streams the files matching `urls`, a glob or a list of globs, directories
+    or files, as `transform(path, data)`; by default `(path, data)` with the
+    contents as bytes::
+
+        ds = XetIterableDataset('xet://xethub.com:XetHub/Flickr30k/main/images/*.jpg',
+                                transform=decode, shuffle_buffer=1024)
+        loader = torch.utils.data.DataLoader(ds, batch_size=64, num_workers=8)
+
+    The files are split between the DataLoader workers of every rank, so each
+    file is read once per epoch.  Each worker reads up to `read_ahead` files
+    concurrently ahead of the one it yields.
+
+    With `shuffle_buffer` > 0 the order of files is shuffled every epoch and
+    the items pass through a buffer of that size from which they are drawn at
+    random.  Call `set_epoch()` before each epoch for a different order;
+    `seed` must be the same on every rank.
+    """
+
+    def __init__(self, urls, endpoint=None, transform=None, shuffle_buffer=0, seed=0,
+                 read_ahead=READ_AHEAD, rank=None, world_size=None):
+        super().__init__()
+        if read_ahead < 1:
+            raise ValueError("read_ahead must be at least 1")
+        self.fs = _filesystem(urls, endpoint)
+        self.files = _resolve_files(self.fs, urls)
+        self.transform = transform or _default_transform
+        self.shuffle_buffer = shuffle_buffer
+        self.seed = seed
+        self.epoch = 0
+        self.read_ahead = read_ahead
+        self.rank = rank
+        self.world_size = world_size
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def _shard(self):
+        """
+        Returns the files read by this worker.
+        """
+        rank, world_size = _distributed_rank()
+        if self.rank is not None:
+            rank = self.rank
+        if self.world_size is not None:
+            world_size = self.world_size
+
+        worker_id, num_workers = _worker()
+
+        files = list(self.files)
+        if self.shuffle_buffer > 0:
+            # Seeded identically on every rank and worker, so the shards stay disjoint.
+            random.Random(f"{self.seed}-{self.epoch}").shuffle(files)
+        return files[rank * num_workers + worker_id::world_size * num_workers]
+
+    def _read(self, files):
+        """
+        Yields (path, data) for `files` in order, keeping `read_ahead` reads
+        in flight.
+        """
+        with ThreadPoolExecutor(self.read_ahead) as executor:
+            pending = collections.deque()
+            try:
+                for path in files:
+                    pending.append((path, executor.submit(self.fs.cat_file, path)))
+                    if len(pending) >= self.read_ahead:
+                        path, data = pending.popleft()
+                        yield path, data.result()
+                while pending:
+                    path, data = pending.popleft()
+                    yield path, data.result()
+            finally:
+                for _, data in pending:
+                    data.cancel()
+
+    def __iter__(self):
+        items = (self.transform(path, data) for path, data in self._read(self._shard()))
+        if self.shuffle_buffer <= 0:
+            yield from items
+            return
+
+        rng = random.Random(f"{self.seed}-{self.epoch}-{_worker()[0]}")
+        buffer = []
+        for item in items:
+            if len(buffer) < self.shuffle_buffer:
+                buffer.append(item)
+                continue
+            i = rng.randrange(len(buffer))
+            yield buffer[i]
+            buffer[i] = item
+        rng.shuffle(buffer)
+        yield from buffer
+
+
+class XetDataset(Dataset):
+    """
+    Random access to the files matching `urls`, a glob or a list of globs,
+    directories or files, sorted by path.  Item `i` is
+    `transform(path, data)`; by default `(path, data)` with the contents as
+    bytes::
+
+        ds = XetDataset('xet://xethub.com:XetHub/Flickr30k/main/images/*.jpg', transform=decode)
+        loader = torch.utils.data.DataLoader(ds, batch_size=64, shuffle=True, num_workers=8)
+
+    Each worker keeps the most recently read files in memory, up to
+    `cache_size` bytes, so items revisited within an epoch or across epochs
+    are not fetched again.
+    """
+
+    def __init__(self, urls, endpoint=None, transform=None, cache_size=CACHE_SIZE):
+        super().__init__()
+        self.fs = _filesystem(urls, endpoint)
+        self.files = _resolve_files(self.fs, urls)
+        self.transform = transform or _default_transform
+        self.cache_size = cache_size
+        self._cache = collections.OrderedDict()
+        self._cached_bytes = 0
+
+    def __len__(self):
+        return len(self.files)
+
+    def _read(self, path):
+        try:
+            self._cache.move_to_end(path)
+            return self._cache[path]
+        except KeyError:
+            pass
+
+        with self.fs.open(path) as f:
+            data = f.read()
+        if len(data) <= self.cache_size:
+            self._cache[path] = data
+            self._cached_bytes += len(data)
+            while self._cached_bytes > self.cache_size:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted)
+        return data
+
+    def __getitem__(self, index):
+        path = self.files[index]
+        return self.transform(path, self._read(path))
+
+    def __getstate__(self):
+        # Workers start with an empty cache rather than a copy of the parent's.
+        state = self.__dict__.copy()
+        state['_cache'] = collections.OrderedDict()
+        state['_cached_bytes'] = 0
+        return state
@@ -0,0 +1,170 @@
+"""
+Provides tracing spans for copy, sync, transaction and file operations
+"""
+import atexit
+import json
+import os
+import threading
+import time
+
+# If set, tracing starts on import and the Chrome trace is written to this path at exit.
+TRACE_FILE_ENV = "PYXET_TRACE_FILE"
+
+
+class _Tracer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.enabled = False
+        self.events = []
+        self.path = None
+        self.otel_tracer = None
+
+
+_tracer = _Tracer()
+
+
+class Span:
+    """
+    A timed region of work with attributes.  Use through `span()`.
+    """
+    __slots__ = ['name', 'attributes', '_start', '_otel_cm', '_otel_span']
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self._otel_cm = None
+        self._otel_span = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+        if self._otel_span is not None:
+            self._otel_span.set_attribute(key, _otel_value(value))
+
+    def __enter__(self):
+        otel_tracer = _tracer.otel_tracer
+        if otel_tracer is not None:
+            self._otel_cm = otel_tracer.start_as_current_span(
+                self.name, attributes={k: _otel_value(v) for k, v in self.attributes.items()})
+            self._otel_span = self._otel_cm.__enter__()
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attributes['error'] = repr(exc_val)
+        event = {'name': self.name,
+                 'ph': 'X',
+                 'ts': self._start / 1000,
+                 'dur': (end - self._start) / 1000,
+                 'pid': os.getpid(),
+                 'tid': threading.get_ident(),
+                 'args': {k: _json_value(v) for k, v in self.attributes.items()}}
+        with _tracer.lock:
+            if _tracer.enabled:
+                _tracer.events.append(event)
+        if self._otel_cm is not None:
+            self._otel_cm.__exit__(exc_type, exc_val, exc_tb)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = []
+
+    def set_attribute(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _json_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def _otel_value(value):
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def span(name, **attributes):
+    """
+    Returns a context manager timing the enclosed work as a span named `name`
+    with the given attributes.  When tracing is off this is a shared no-op.
+
+        with span("copy_file", src=src, dest=dest) as s:
+            ...
+            s.set_attribute("bytes", n)
+    """
+    if not _tracer.enabled:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def is_tracing():
+    return _tracer.enabled
+
+
+def start_tracing(path=None, use_opentelemetry=False):
+    """
+    Starts recording spans in process.  If `path` is given, the Chrome trace is
+    written there by `stop_tracing()`; it can be loaded in chrome://tracing or
+    https://ui.perfetto.dev.
+
+    With `use_opentelemetry`, spans are also reported through the OpenTelemetry
+    tracer provider configured by the application, which requires the
+    `opentelemetry-api` package.
+    """
+    otel_tracer = None
+    if use_opentelemetry:
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError("use_opentelemetry requires the opentelemetry-api package")
+        otel_tracer = trace.get_tracer("pyxet")
+
+    with _tracer.lock:
+        _tracer.events = []
+        _tracer.path = path
+        _tracer.otel_tracer = otel_tracer
+        _tracer.enabled = True
+
+
+def stop_tracing():
+    """
+    Stops recording spans, writes the Chrome trace if a path was given to
+    `start_tracing()`, and returns the recorded events.
+    """
+    with _tracer.lock:
+        _tracer.enabled = False
+        _tracer.otel_tracer = None
+        events = _tracer.events
+        path = _tracer.path
+        _tracer.events = []
+        _tracer.path = None
+
+    if path is not None:
+        write_chrome_trace(path, events)
+    return events
+
+
+def write_chrome_trace(path, events):
+    """
+    Writes span events as a Chrome trace JSON file.
+    """
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+if os.environ.get(TRACE_FILE_ENV):
+    start_tracing(os.environ[TRACE_FILE_ENV])
+    atexit.register(stop_tracing)
@@ -2,7 +2,7 @@ import os
 import posixpath
 import sys
 import threading
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import fsspec
 
@@ -12,6 +12,11 @@ from .url_parsing import parse_url
 MAX_CONCURRENT_COPIES = threading.Semaphore(32)
 CHUNK_SIZE = 16 * 1024 * 1024
 
+# Number of subtrees of a source listed concurrently by _parallel_find.
+LISTING_PARALLELISM = 16
+# How many directory levels _parallel_find descends looking for enough subtrees to shard on.
+LISTING_MAX_SHARD_DEPTH = 2
+
 def _should_load_aws_credentials():
     """
     Determines if AWS credentials should be loaded for s3 API by checking if credentials are available
@@ -128,4 +133,38 @@ def _path_normalize(fs, path, strip_trailing_slash = True, keep_relative = False
         return path
 
 def _is_illegal_subdirectory_file_name(path):
-    return path == '.' or path == '' or path == '..'
\ No newline at end of file
+    return path == '.' or path == '' or path == '..'
+
+def _parallel_find(fs, path, max_workers=None):
+    """
+    Recursively lists the files under path, like `fs.find(path, detail=True).items()`,
+    but shards the listing by subdirectory and lists the shards concurrently.
+
+    The top levels are listed with `ls`, which for S3 is a delimiter-based listing
+    of the prefixes below path.  Each subtree is then listed with `find`, and
+    (path, info) pairs are yielded as each shard completes, so callers can start
+    work before the whole listing is done.
+    """
+    if max_workers is None:
+        max_workers = LISTING_PARALLELISM
+
+    shards = [path]
+    for _ in range(LISTING_MAX_SHARD_DEPTH):
+        if len(shards) >= max_workers:
+            break
+        next_shards = []
+        for shard in shards:
+            for info in fs.ls(shard, detail=True):
+                if info['type'] == 'directory':
+                    next_shards.append(info['name'])
+                else:
+                    yield info['name'], info
+        shards = next_shards
+
+    if len(shards) == 0:
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(fs.find, shard, detail=True) for shard in shards]
+        for future in as_completed(futures):
+            yield from future.result().items()
@@ -0,0 +1,159 @@
+"""
+Provides a Zarr store over a directory of a Xet repository with batched chunk reads and writes
+"""
+import contextlib
+import posixpath
+
+try:
+    from numcodecs.compat import ensure_bytes
+    from zarr.storage import Store
+except ImportError:
+    raise ImportError("pyxet.zarr requires the zarr package, version 2")
+
+from .file_system import XetFS
+from .url_parsing import parse_url
+
+
+class XetStore(Store):
+    """
+    A Zarr store over the directory at `url`, of the form
+    `xet://<endpoint>:<user>/<repo>/<branch>/<path>`::
+
+        store = XetStore('xet://xethub.com:<user>/<repo>/main/data.zarr')
+        z = zarr.open_array(store, mode='r')
+        block = z[0:1000, 0:1000]
+
+    Zarr reads the chunks of a selection with one `getitems` call, which
+    fetches them concurrently in one call to the bindings, and writes them
+    with one `setitems` call, written as one batch per transaction.
+
+    Writes, deletes and array creation go into the active transaction of
+    `fs`.  Outside a transaction each call is committed on its own with
+    `commit_message`, so wrap many writes in `with store.fs.transaction:` to
+    commit them together.  Writes become visible when their transaction
+    commits, so create arrays and groups before starting a transaction that
+    writes to them.
+    """
+
+    def __init__(self, url, fs=None, commit_message=None):
+        url_path = parse_url(url, fs.endpoint if fs is not None else None, expect_branch=True)
+        if fs is None:
+            fs = XetFS(url_path.endpoint)
+        self.fs = fs
+        self.url_path = url_path
+        self.root = url_path.url().rstrip('/')
+        self.commit_message = commit_message
+
+    def _url(self, key):
+        return f"{self.root}/{key}" if key else self.root
+
+    def _repo_path(self, key):
+        return posixpath.join(self.url_path.path, key) if self.url_path.path else key
+
+    @contextlib.contextmanager
+    def _write_transaction(self):
+        if self.fs.intrans:
+            yield
+        else:
+            self.fs.start_transaction(self.commit_message)
+            try:
+                yield
+            except BaseException:
+                self.fs.cancel_transaction()
+                raise
+            self.fs.end_transaction()
+
+    def getitems(self, keys, *, contexts=None):
+        """
+        Returns a dict of the values of those of `keys` which are present.
+        """
+        keys = list(keys)
+        u = self.url_path
+        results = self.fs._manager.cat_many([(u.remote(), u.branch, self._repo_path(k)) for k in keys])
+        ret = {}
+        errors = {}
+        for key, res in zip(keys, results):
+            if not isinstance(res, Exception):
+                ret[key] = res
+            elif not isinstance(res, FileNotFoundError):
+                errors[key] = res
+
+        # Missing keys are common in sparse arrays; any error on a key which
+        # exists is a failed read.
+        for key in self._existing(errors):
+            raise errors[key]
+        return ret
+
+    def __getitem__(self, key):
+        try:
+            return self.getitems([key])[key]
+        except KeyError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return self.fs.exists(self._url(key))
+
+    def setitems(self, values):
+        """
+        Writes many keys as one batch.
+        """
+        if not values:
+            return
+        with self._write_transaction():
+            self.fs.pipe({self._url(k): ensure_bytes(v) for k, v in values.items()})
+
+    def __setitem__(self, key, value):
+        self.setitems({key: value})
+
+    def _existing(self, keys):
+        """
+        Returns those of `keys` which are present, listing each directory once.
+        """
+        by_dir = {}
+        for key in keys:
+            by_dir.setdefault(posixpath.dirname(key), []).append(key)
+
+        ret = []
+        for dirname, dir_keys in by_dir.items():
+            names = {posixpath.basename(name) for name in self.listdir(dirname)}
+            ret.extend(k for k in dir_keys if posixpath.basename(k) in names)
+        return ret
+
+    def delitems(self, keys):
+        """
+        Deletes many keys as one batch, ignoring keys which are not present.
+        """
+        keys = self._existing(keys)
+        if not keys:
+            return
+        with self._write_transaction():
+            self.fs.rm([self._url(k) for k in keys])
+
+    def __delitem__(self, key):
+        if not self._existing([key]):
+            raise KeyError(key)
+        self.delitems([key])
+
+    def keys(self):
+        prefix = self.url_path.path
+        for path in self.fs.find(self.root):
+            path = parse_url(path, self.fs.endpoint, expect_branch=True).path
+            yield path[len(prefix):].lstrip('/') if prefix else path
+
+    def __iter__(self):
+        return self.keys()
+
+    def __len__(self):
+        return sum(1 for _ in self.keys())
+
+    def listdir(self, path=""):
+        try:
+            return sorted(posixpath.basename(name) for name in self.fs.ls(self._url(path), detail=False))
+        except (FileNotFoundError, RuntimeError):
+            return []
+
+    def rmdir(self, path=""):
+        keys = [k for k in self.keys() if not path or k.startswith(path.rstrip('/') + '/')]
+        if keys:
+            with self._write_transaction():
+                self.fs.rm([self._url(k) for k in keys])
@@ -0,0 +1,39 @@
+use std::fs::File;
+use std::io::BufReader;
+
+use anyhow::Result;
+use libxet::merkledb::chunk_iterator::low_variance_chunk_target;
+use libxet::merkledb::constants::{N_LOW_VARIANCE_CDC_CHUNKERS, TARGET_CDC_CHUNK_SIZE};
+use libxet::merkledb::MerkleMemDB;
+use libxet::xetblob::DirEntry;
+use pyo3::prelude::*;
+
+/// The xet merkle hash of a directory entry, or an empty string if the entry
+/// is not a file tracked by xet.
+pub fn entry_content_hash(ent: &DirEntry) -> String {
+    ent.hash.clone().unwrap_or_default()
+}
+
+/// Computes the xet merkle hash of the local file at `path`.  This chunks the
+/// file exactly as xet does when it is added to a repository, so the result can
+/// be compared against the content hash of a file in a repository.
+pub fn merkle_hash_of_path(path: &str) -> Result<String> {
+    let reader = BufReader::new(File::open(path)?);
+    let chunks: Vec<_> = low_variance_chunk_target(
+        reader,
+        TARGET_CDC_CHUNK_SIZE,
+        N_LOW_VARIANCE_CDC_CHUNKERS,
+    )
+    .collect::<std::io::Result<_>>()?;
+
+    let mut db = MerkleMemDB::default();
+    let node = db.add_file(&chunks);
+    Ok(node.hash().hex())
+}
+
+/// Computes the xet merkle hash of a local file.  Releases the GIL while hashing.
+#[pyfunction]
+pub fn compute_file_hash(path: &str, py: Python<'_>) -> PyResult<String> {
+    py.allow_threads(|| merkle_hash_of_path(path))
+        .map_err(|e| pyo3::exceptions::PyRuntimeError::new_err(format!("{e:?}")))
+}
@@ -9,13 +9,25 @@ use libxet::environment::log::initialize_tracing_subscriber;
 use libxet::progress_reporting::DataProgressReporter;
 use pyo3::exceptions::*;
 use pyo3::prelude::*;
+use futures::{StreamExt, TryStreamExt};
 use pyo3::types::{PyByteArray, PyBytes, PyList};
+use std::collections::HashMap;
+use std::sync::atomic::{AtomicBool, Ordering};
 use std::sync::Arc;
+use tokio::io::AsyncReadExt;
 use tokio::sync::{RwLock, RwLockReadGuard, RwLockWriteGuard};
-use tracing::{error, info};
+use tracing::{error, info, Instrument};
 use libxet::xetblob::*;
 
+mod hashing;
+mod metrics;
+mod progress;
+mod repo_cache;
+mod runtime;
 mod transactions;
+use hashing::*;
+use metrics::*;
+use repo_cache::RepoCache;
 use transactions::*;
 
 #[pyclass]
@@ -26,10 +38,13 @@ pub struct FileAttributes {
     pub size: usize,
     #[pyo3(get)]
     pub last_modified: String,
+    #[pyo3(get)]
+    pub content_hash: String, // xet merkle hash; empty if not known
 }
 
 impl From<DirEntry> for FileAttributes {
     fn from(ent: DirEntry) -> Self {
+        let content_hash = entry_content_hash(&ent);
         let ftype = match ent.object_type.as_str() {
             "dir" => "directory",
             "blob" => "file",
@@ -43,6 +58,7 @@ impl From<DirEntry> for FileAttributes {
             ftype: ftype.to_string(),
             size: ent.size as usize,
             last_modified: ent.last_modified,
+            content_hash,
         }
     }
 }
@@ -57,7 +73,7 @@ macro_rules! rust_async {
         let mut res = Option::<Result<_, _>>::None;
         let mut err_res = Option::<anyhow::Error>::None;
         $py.allow_threads(|| {
-            if let Err(e) = pyo3_asyncio::tokio::get_runtime().block_on(async {
+            if let Err(e) = runtime::get_runtime().block_on(async {
                 let r: Result<_, _> = { $xp };
                 res = Some(r.map_err(|e| PyRuntimeError::new_err(format!("{e:?}"))));
 
@@ -81,9 +97,107 @@ macro_rules! rust_async {
     }};
 }
 
+// Number of files read or written at once by the batched calls.
+const BATCH_CONCURRENCY: usize = 64;
+
+// Size of the reads from local files uploaded by write_many_from_paths.
+const UPLOAD_BUFFER_SIZE: usize = 1024 * 1024;
+
+/// Gets the repo of each distinct remote once, rather than once per file.
+async fn resolve_repos<'a>(
+    manager: &RwLock<XetRepoManager>,
+    repo_cache: &RepoCache,
+    remotes: impl Iterator<Item = &'a str>,
+) -> anyhow::Result<HashMap<&'a str, Arc<XetRepo>>> {
+    let mut repos = HashMap::new();
+    for remote in remotes {
+        if !repos.contains_key(remote) {
+            let repo = repo_cache.get_or_open(manager, remote).await?;
+            repos.insert(remote, repo);
+        }
+    }
+    Ok(repos)
+}
+
+/// Converts the error reading `path` to FileNotFoundError if the path does
+/// not exist, as `stat` reports it, and to RuntimeError otherwise.
+async fn read_error_to_py(
+    manager: &RwLock<XetRepoManager>,
+    remote: &str,
+    branch: &str,
+    path: &str,
+    e: anyhow::Error,
+) -> PyErr {
+    match manager.read().await.stat(remote, branch, path).await {
+        Ok(None) => PyFileNotFoundError::new_err(format!("File not found {remote}/{branch}/{path}")),
+        _ => anyhow_to_runtime_error(e),
+    }
+}
+
+/// Reads a whole file.
+async fn read_all(reader: &XetRFileObject) -> anyhow::Result<Vec<u8>> {
+    read_range(reader, 0, reader.len() as u64).await
+}
+
+/// Reads up to `size` bytes at `offset`, independent of any file position.
+async fn read_range(reader: &XetRFileObject, offset: u64, size: u64) -> anyhow::Result<Vec<u8>> {
+    let end = std::cmp::min(offset.saturating_add(size), reader.len() as u64);
+    let mut ret = Vec::with_capacity(end.saturating_sub(offset) as usize);
+    let mut pos = offset;
+    while pos < end {
+        let read_size = std::cmp::min(end - pos, MAX_READ_SIZE);
+        let (buf, eof) = reader.read(pos, read_size as u32).await?;
+        pos += buf.len() as u64;
+        let done = eof || buf.is_empty();
+        ret.extend(buf);
+        if done {
+            break;
+        }
+    }
+    Ok(ret)
+}
+
 #[pyclass]
 struct PyRepoManager {
-    manager: RwLock<XetRepoManager>,
+    manager: Arc<RwLock<XetRepoManager>>,
+    repo_cache: Arc<RepoCache>,
+}
+
+fn bytes_to_py(v: &[u8]) -> PyObject {
+    Python::with_gil(|py| PyBytes::new(py, v).into())
+}
+
+async fn listdir_impl(
+    manager: &RwLock<XetRepoManager>,
+    remote: &str,
+    branch: &str,
+    path: &str,
+) -> anyhow::Result<(Vec<String>, Vec<FileAttributes>)> {
+    // strip trailing slashes
+    #![allow(clippy::manual_strip)]
+    let path = if path.ends_with('/') {
+        &path[..path.len() - 1]
+    } else {
+        path
+    };
+    let path = if path.starts_with('/') {
+        &path[1..]
+    } else {
+        path
+    };
+    let listing = manager.read().await.listdir(remote, branch, path).await?;
+    let mut ret_names = vec![];
+    let mut ret_attrs = vec![];
+    for i in listing {
+        if path.is_empty() {
+            ret_names.push(i.name.clone());
+        } else {
+            ret_names.push(format!("{path}/{}", i.name).to_string());
+        }
+        ret_attrs.push(i.into());
+    }
+
+    Ok((ret_names, ret_attrs))
 }
 
 #[pyfunction]
@@ -201,7 +315,8 @@ impl PyRepoManager {
         std::env::set_var("XET_ENDPOINT", endpoint); 
         let manager = XetRepoManager::new(None, None).map_err(anyhow_to_runtime_error)?;
         Ok(PyRepoManager {
-            manager: RwLock::new(manager),
+            manager: Arc::new(RwLock::new(manager)),
+            repo_cache: Arc::new(RepoCache::default()),
         })
     }
 
@@ -217,7 +332,8 @@ impl PyRepoManager {
         )
     }
 
-    /// Performs a file listing.
+    /// Performs a file listing.  The attributes of each entry include its type,
+    /// size and last modified time, so callers don't need a stat per entry.
     pub fn listdir(
         &self,
         remote: &str,
@@ -225,41 +341,28 @@ impl PyRepoManager {
         path: &str,
         py: Python<'_>,
     ) -> PyResult<(Vec<String>, Vec<FileAttributes>)> {
-        // strip trailing slashes
-        rust_async!(
-            py,
-            {
-                #![allow(clippy::manual_strip)]
-                let path = if path.ends_with('/') {
-                    &path[..path.len() - 1]
-                } else {
-                    path
-                };
-                let path = if path.starts_with('/') {
-                    &path[1..]
-                } else {
-                    path
-                };
-                let listing = self
-                    .manager
-                    .read()
-                    .await
-                    .listdir(remote, branch, path)
-                    .await?;
-                let mut ret_names = vec![];
-                let mut ret_attrs = vec![];
-                for i in listing {
-                    if path.is_empty() {
-                        ret_names.push(i.name.clone());
-                    } else {
-                        ret_names.push(format!("{path}/{}", i.name).to_string());
-                    }
-                    ret_attrs.push(i.into());
-                }
+        let timer = OpTimer::start(Op::Listdir);
+        let ret = rust_async!(py, listdir_impl(&self.manager, remote, branch, path).await);
+        timer.finish(&ret, |_| 0);
+        ret
+    }
 
-                anyhow::Ok((ret_names, ret_attrs))
-            }
-        )
+    /// Async listdir; returns an awaitable for use from asyncio.  The call does
+    /// not hold a python thread while it is in flight.
+    pub fn listdir_async<'py>(
+        &self,
+        remote: String,
+        branch: String,
+        path: String,
+        py: Python<'py>,
+    ) -> PyResult<&'py PyAny> {
+        let manager = self.manager.clone();
+        runtime::future_into_py(py, async move {
+            let timer = OpTimer::start(Op::Listdir);
+            let ret = listdir_impl(&manager, &remote, &branch, &path).await;
+            timer.finish(&ret, |_| 0);
+            ret.map_err(anyhow_to_runtime_error)
+        })
     }
 
     /// Performs a general api query.
@@ -271,14 +374,47 @@ impl PyRepoManager {
         body: &str,
         py: Python<'_>,
     ) -> PyResult<Vec<u8>> {
-        rust_async!(
+        let timer = OpTimer::start(Op::ApiQuery);
+        let ret = rust_async!(
             py,
             self.manager
                 .read()
                 .await
                 .perform_api_query(remote, op, http_command, body)
                 .await
-        )
+        );
+        timer.finish(&ret, |r| r.len() as u64);
+        if !http_command.eq_ignore_ascii_case("get") {
+            // Repos may have been renamed or deleted.
+            self.repo_cache.clear();
+        }
+        ret
+    }
+
+    /// Async api_query; returns an awaitable resolving to bytes.
+    pub fn api_query_async<'py>(
+        &self,
+        remote: String,
+        op: String,
+        http_command: String,
+        body: String,
+        py: Python<'py>,
+    ) -> PyResult<&'py PyAny> {
+        let manager = self.manager.clone();
+        let repo_cache = self.repo_cache.clone();
+        runtime::future_into_py(py, async move {
+            let timer = OpTimer::start(Op::ApiQuery);
+            let ret = manager
+                .read()
+                .await
+                .perform_api_query(&remote, &op, &http_command, &body)
+                .await;
+            timer.finish(&ret, |r| r.len() as u64);
+            if !http_command.eq_ignore_ascii_case("get") {
+                repo_cache.clear();
+            }
+            Ok(bytes_to_py(&ret.map_err(anyhow_to_runtime_error)?))
+        })
     }
 
     /// Gets status of a path
@@ -290,6 +426,8 @@ impl PyRepoManager {
         host: Option<&str>,
         py: Python<'_>,
     ) -> PyResult<()> {
+        // Handles opened with the previous credentials are dropped.
+        self.repo_cache.clear();
         rust_async!(
             py,
             self.manager
@@ -308,19 +446,146 @@ impl PyRepoManager {
         path: &str,
         py: Python<'_>,
     ) -> PyResult<Option<FileAttributes>> {
-        let ent: Option<DirEntry> = rust_async!(
+        let timer = OpTimer::start(Op::Stat);
+        let ent: PyResult<Option<DirEntry>> = rust_async!(
             py,
             self.manager.read().await.stat(remote, branch, path).await
-        )?;
+        );
+        timer.finish(&ent, |_| 0);
+        let ent = ent?;
 
         Ok(ent.map(|x| x.into()))
     }
 
+    /// Async stat; returns an awaitable.
+    pub fn stat_async<'py>(
+        &self,
+        remote: String,
+        branch: String,
+        path: String,
+        py: Python<'py>,
+    ) -> PyResult<&'py PyAny> {
+        let manager = self.manager.clone();
+        runtime::future_into_py(py, async move {
+            let timer = OpTimer::start(Op::Stat);
+            let ent = manager.read().await.stat(&remote, &branch, &path).await;
+            timer.finish(&ent, |_| 0);
+            let ent = ent.map_err(anyhow_to_runtime_error)?;
+            Ok(ent.map(FileAttributes::from))
+        })
+    }
+
     /// Obtains access to a repo
     pub fn get_repo(&self, remote: &str, py: Python<'_>) -> PyResult<PyRepo> {
-        rust_async!(py, {
-            let repo = self.manager.write().await.get_repo(None, remote).await?;
+        let timer = OpTimer::start(Op::GetRepo);
+        // Fast path: a repo already open is returned without blocking on the runtime.
+        if let Some(repo) = self.repo_cache.get(remote) {
+            let ret: PyResult<PyRepo> = Ok(PyRepo { repo });
+            timer.finish(&ret, |_| 0);
+            return ret;
+        }
+        let ret = rust_async!(py, {
+            let repo = self.repo_cache.get_or_open(&self.manager, remote).await?;
             anyhow::Ok(PyRepo { repo })
+        });
+        timer.finish(&ret, |_| 0);
+        ret
+    }
+
+    /// Reads many whole files concurrently.  `paths` is a list of
+    /// (remote, branch, path); returns, in the same order, the contents of each
+    /// file or the exception raised reading it: FileNotFoundError if the file
+    /// does not exist, otherwise RuntimeError.
+    pub fn cat_many(&self, paths: Vec<(String, String, String)>, py: Python<'_>) -> PyResult<PyObject> {
+        let timer = OpTimer::start(Op::Read);
+        let ret = rust_async!(py, {
+            let repos =
+                resolve_repos(&self.manager, &self.repo_cache, paths.iter().map(|(remote, _, _)| remote.as_str()))
+                    .await?;
+            let manager = &self.manager;
+            let reads = paths.iter().map(|(remote, branch, path)| {
+                let repo = repos[remote.as_str()].clone();
+                async move {
+                    let ret = async {
+                        let reader = repo.open_for_read(branch, path, None).await?;
+                        read_all(&reader).await
+                    }
+                    .await;
+                    match ret {
+                        Ok(b) => Ok(b),
+                        Err(e) => Err(read_error_to_py(manager, remote, branch, path, e).await),
+                    }
+                }
+            });
+            let results: Vec<PyResult<Vec<u8>>> = futures::stream::iter(reads)
+                .buffered(BATCH_CONCURRENCY)
+                .collect()
+                .await;
+            anyhow::Ok(results)
+        });
+        timer.finish(&ret, |r| {
+            r.iter()
+                .map(|b| b.as_ref().map_or(0, |b| b.len() as u64))
+                .sum()
+        });
+
+        let ret_list = PyList::empty(py);
+        for r in ret? {
+            match r {
+                Ok(b) => ret_list.append(PyBytes::new(py, &b))?,
+                Err(e) => ret_list.append(e.value(py))?,
+            }
+        }
+        Ok(ret_list.into())
+    }
+
+    /// Downloads many files concurrently.  `items` is a list of
+    /// (remote, branch, path, local_path); parent directories of the local
+    /// paths must exist.  Stops at the first error.
+    pub fn read_many_to_paths(
+        &self,
+        items: Vec<(String, String, String, String)>,
+        progress_reporting: Option<&PyProgressReporter>,
+        py: Python<'_>,
+    ) -> PyResult<()> {
+        let progress_reporter = progress_reporting.map(|pr| pr.inner());
+        let timer = OpTimer::start(Op::Read);
+        let ret = rust_async!(py, {
+            let repos =
+                resolve_repos(&self.manager, &self.repo_cache, items.iter().map(|(remote, _, _, _)| remote.as_str()))
+                    .await?;
+            let reads = items.iter().map(|(remote, branch, path, local_path)| {
+                let repo = repos[remote.as_str()].clone();
+                let progress_reporter = progress_reporter.clone();
+                async move {
+                    #[allow(unused_mut)]
+                    let mut reader = repo.open_for_read(branch, path, None).await?;
+                    let len = reader.len() as u64;
+                    reader.read_to_path(local_path, progress_reporter).await?;
+                    anyhow::Ok(len)
+                }
+            });
+            let sizes: Vec<u64> = futures::stream::iter(reads)
+                .buffer_unordered(BATCH_CONCURRENCY)
+                .try_collect()
+                .await?;
+            anyhow::Ok(sizes.iter().sum::<u64>())
+        });
+        timer.finish(&ret, |n| *n);
+        ret.map(|_| ())
+    }
+
+    /// Async get_repo; returns an awaitable.
+    pub fn get_repo_async<'py>(&self, remote: String, py: Python<'py>) -> PyResult<&'py PyAny> {
+        let manager = self.manager.clone();
+        let repo_cache = self.repo_cache.clone();
+        runtime::future_into_py(py, async move {
+            let timer = OpTimer::start(Op::GetRepo);
+            let ret = repo_cache.get_or_open(&manager, &remote).await;
+            timer.finish(&ret, |_| 0);
+            Ok(PyRepo {
+                repo: ret.map_err(anyhow_to_runtime_error)?,
+            })
         })
     }
 }
@@ -332,10 +597,13 @@ struct PyRepo {
 #[pymethods]
 impl PyRepo {
     pub fn open_for_read(&self, branch: &str, path: &str, py: Python<'_>) -> PyResult<PyRFile> {
-        rust_async!(
+        let timer = OpTimer::start(Op::OpenForRead);
+        let ret = rust_async!(
             py,
             PyRFile::new(self.repo.open_for_read(branch, path, None).await?)
-        )
+        );
+        timer.finish(&ret, |_| 0);
+        ret
     }
 
     pub fn open_for_read_with_flags(
@@ -345,10 +613,13 @@ impl PyRepo {
         flags: u32,
         py: Python<'_>,
     ) -> PyResult<PyRFile> {
-        rust_async!(
+        let timer = OpTimer::start(Op::OpenForRead);
+        let ret = rust_async!(
             py,
             PyRFile::new(self.repo.open_for_read(branch, path, Some(flags)).await?)
-        )
+        );
+        timer.finish(&ret, |_| 0);
+        ret
     }
 
     pub fn begin_write_transaction(
@@ -363,6 +634,39 @@ impl PyRepo {
         )
     }
 
+    /// Async open_for_read; returns an awaitable resolving to a PyRFile.
+    #[pyo3(signature = (branch, path, flags=None))]
+    pub fn open_for_read_async<'py>(
+        &self,
+        branch: String,
+        path: String,
+        flags: Option<u32>,
+        py: Python<'py>,
+    ) -> PyResult<&'py PyAny> {
+        let repo = self.repo.clone();
+        runtime::future_into_py(py, async move {
+            let timer = OpTimer::start(Op::OpenForRead);
+            let ret = repo.open_for_read(&branch, &path, flags).await;
+            timer.finish(&ret, |_| 0);
+            PyRFile::new(ret.map_err(anyhow_to_runtime_error)?)
+        })
+    }
+
+    /// Async begin_write_transaction; returns an awaitable.
+    pub fn begin_write_transaction_async<'py>(
+        &self,
+        branch: String,
+        commit_message: String,
+        py: Python<'py>,
+    ) -> PyResult<&'py PyAny> {
+        let repo = self.repo.clone();
+        runtime::future_into_py(py, async move {
+            PyWriteTransaction::new(repo, &branch, &commit_message)
+                .await
+                .map_err(anyhow_to_runtime_error)
+        })
+    }
+
     /// Fetch shards that could be useful for dedup, according to the given endpoints.
     ///
     /// Endpoints are given as a list of (branch, path) tuples.  Shard hint fetches may be
@@ -507,12 +811,15 @@ impl PyRFile {
     // why does IOBase have readline? this is not very nice.
     #[pyo3(signature = (size=-1))]
     pub fn readline(&mut self, size: i64, py: Python<'_>) -> PyResult<PyObject> {
-        let ret = rust_async!(py, self.readline_impl(size).await)?;
-        Ok(PyBytes::new(py, &ret).into())
+        let timer = OpTimer::start(Op::Read);
+        let ret = rust_async!(py, self.readline_impl(size).await);
+        timer.finish(&ret, |r| r.len() as u64);
+        Ok(PyBytes::new(py, &ret?).into())
     }
 
     #[pyo3(signature = (num_lines=-1))]
     pub fn readlines(&mut self, num_lines: i64, py: Python<'_>) -> PyResult<PyObject> {
+        let timer = OpTimer::start(Op::Read);
         let v_buf = rust_async!(py, {
             let mut v_buf = Vec::new();
 
@@ -525,7 +832,9 @@ impl PyRFile {
                 }
             }
             anyhow::Ok(v_buf)
-        })?;
+        });
+        timer.finish(&v_buf, |v| v.iter().map(|b| b.len() as u64).sum());
+        let v_buf = v_buf?;
 
         let ret = PyList::empty(py);
 
@@ -541,29 +850,34 @@ impl PyRFile {
         if size <= 0 {
             return self.readall(py);
         }
+        let timer = OpTimer::start(Op::Read);
         let ret = rust_async!(py, {
             let size = std::cmp::min(size as u64, u32::MAX as u64);
             self.read_impl(size as u32).await
-        })?;
-        Ok(PyBytes::new(py, &ret).into())
+        });
+        timer.finish(&ret, |r| r.len() as u64);
+        Ok(PyBytes::new(py, &ret?).into())
     }
 
     pub fn readall(&mut self, py: Python<'_>) -> PyResult<PyObject> {
+        let timer = OpTimer::start(Op::Read);
         let ret = rust_async!(py, {
             let mut ret = Vec::new();
             while self.pos < self.file_len {
                 ret.extend(self.read_impl(MAX_READ_SIZE as u32).await?);
             }
             anyhow::Ok(ret)
-        })?;
-        Ok(PyBytes::new(py, &ret).into())
+        });
+        timer.finish(&ret, |r| r.len() as u64);
+        Ok(PyBytes::new(py, &ret?).into())
     }
     pub fn readinto1(&mut self, b: &PyAny, py: Python<'_>) -> PyResult<u64> {
         let buf = PyByteArray::from(py, b)?;
         let buflen = buf.len();
         let bufbytes = unsafe { buf.as_bytes_mut() };
 
-        rust_async!(py, {
+        let timer = OpTimer::start(Op::Read);
+        let ret = rust_async!(py, {
             let read_size = std::cmp::min(buflen as u64, MAX_READ_SIZE);
             let readres = self.read_impl(read_size as u32).await?;
             let readlen = readres.len();
@@ -572,7 +886,9 @@ impl PyRFile {
                 bufbytes[..readlen].copy_from_slice(&readres);
             }
             anyhow::Ok(readlen as u64)
-        })
+        });
+        timer.finish(&ret, |n| *n);
+        ret
     }
 
     pub fn readinto(&mut self, b: &PyAny, py: Python<'_>) -> PyResult<u64> {
@@ -580,7 +896,8 @@ impl PyRFile {
         let buflen = buf.len();
         let bufbytes = unsafe { buf.as_bytes_mut() };
 
-        rust_async!(py, {
+        let timer = OpTimer::start(Op::Read);
+        let ret = rust_async!(py, {
             let mut curoff: usize = 0;
             while self.pos < self.file_len {
                 let read_size = std::cmp::min(buflen - curoff, MAX_READ_SIZE as usize);
@@ -591,12 +908,64 @@ impl PyRFile {
                 curoff += readlen;
             }
             anyhow::Ok(curoff as u64)
-        })
+        });
+        timer.finish(&ret, |n| *n);
+        ret
     }
     pub fn read_to_path(&mut self, path: &str, progress_reporting : Option<&PyProgressReporter>, py: Python<'_>) -> PyResult<()> {
-        rust_async!(py, {
-            self.reader.read_to_path(path, progress_reporting.map(|pr| pr.inner())).await?;
+        let timer = OpTimer::start(Op::Read);
+        let span = tracing::info_span!("PyRFile::read_to_path", path, bytes = self.file_len);
+        let ret = rust_async!(py, {
+            self.reader
+                .read_to_path(path, progress_reporting.map(|pr| pr.inner()))
+                .instrument(span)
+                .await?;
             anyhow::Ok(())
+        });
+        timer.finish(&ret, |_| self.file_len);
+        ret
+    }
+    /// Reads up to `size` bytes at `offset`, independent of the current
+    /// position.  The GIL is released and the file is not borrowed mutably,
+    /// so reads from several threads run concurrently.
+    pub fn read_at(&self, offset: u64, size: u64, py: Python<'_>) -> PyResult<PyObject> {
+        let timer = OpTimer::start(Op::Read);
+        let ret = rust_async!(py, read_range(&self.reader, offset, size).await);
+        timer.finish(&ret, |r| r.len() as u64);
+        Ok(PyBytes::new(py, &ret?).into())
+    }
+    /// Reads many (offset, size) ranges concurrently, returning a list of
+    /// bytes in the order of `ranges`.  Used to fetch the column chunks of a
+    /// parquet file in one call.
+    pub fn read_ranges(&self, ranges: Vec<(u64, u64)>, py: Python<'_>) -> PyResult<PyObject> {
+        let timer = OpTimer::start(Op::Read);
+        let ret = rust_async!(py, {
+            let reads = ranges
+                .iter()
+                .map(|&(offset, size)| read_range(&self.reader, offset, size));
+            futures::stream::iter(reads)
+                .buffered(BATCH_CONCURRENCY)
+                .try_collect::<Vec<_>>()
+                .await
+        });
+        timer.finish(&ret, |r| r.iter().map(|b| b.len() as u64).sum());
+
+        let ret_list = PyList::empty(py);
+        for b in ret? {
+            ret_list.append(PyBytes::new(py, &b))?;
+        }
+        Ok(ret_list.into())
+    }
+    /// Async read of up to `size` bytes at `offset`, independent of the
+    /// current position; returns an awaitable resolving to bytes.  Many reads
+    /// of the same file may be in flight at once.
+    pub fn read_at_async<'py>(&self, offset: u64, size: u64, py: Python<'py>) -> PyResult<&'py PyAny> {
+        let reader = self.reader.clone();
+        runtime::future_into_py(py, async move {
+            let timer = OpTimer::start(Op::Read);
+            let ret = read_range(&reader, offset, size).await;
+            timer.finish(&ret, |r| r.len() as u64);
+            Ok(bytes_to_py(&ret.map_err(anyhow_to_runtime_error)?))
         })
     }
     pub fn write(&mut self, _b: &PyAny, _py: Python<'_>) -> PyResult<()> {
@@ -657,7 +1026,15 @@ impl PyWriteTransaction {
     }
 
     async fn complete_impl(&mut self, commit: bool, cleanup_immediately: bool) -> Result<()> {
-        let Some(tr) = self.pwt.take() else {
+        Self::complete_handle(self.pwt.take(), commit, cleanup_immediately).await
+    }
+
+    async fn complete_handle(
+        pwt: Option<Arc<RwLock<WriteTransaction>>>,
+        commit: bool,
+        cleanup_immediately: bool,
+    ) -> Result<()> {
+        let Some(tr) = pwt else {
             // This means either we've called close() on the transaction, then tried to use it;
             // or all associated write files complete and close before calling close().
             // Either case this should be a NOP.
@@ -702,7 +1079,7 @@ impl Drop for PyWriteTransaction {
     fn drop(&mut self) {
         // This should only occurs in case of errors elsewhere, but must be cleaned up okay.
         if let Some(handle) = self.pwt.take() {
-            pyo3_asyncio::tokio::get_runtime().block_on(async {
+            runtime::get_runtime().block_on(async {
                 let res = WriteTransaction::release_write_token(handle).await;
                 if let Err(e) = res {
                     error!("Error deregistering write handle in transaction : {e:?}");
@@ -716,11 +1093,32 @@ impl Drop for PyWriteTransaction {
 #[pymethods]
 impl PyWriteTransaction {
     pub fn complete(&mut self, commit: bool, py: Python<'_>) -> PyResult<()> {
-        rust_async!(py, self.complete_impl(commit, true).await)
+        let timer = OpTimer::start(Op::Commit);
+        let ret = rust_async!(py, self.complete_impl(commit, true).await);
+        if commit {
+            timer.finish(&ret, |_| 0);
+        }
+        ret
+    }
+
+    /// Async complete; returns an awaitable.
+    pub fn complete_async<'py>(&mut self, commit: bool, py: Python<'py>) -> PyResult<&'py PyAny> {
+        let pwt = self.pwt.take();
+        runtime::future_into_py(py, async move {
+            let timer = OpTimer::start(Op::Commit);
+            let ret = Self::complete_handle(pwt, commit, true).await;
+            if commit {
+                timer.finish(&ret, |_| 0);
+            }
+            ret.map_err(anyhow_to_runtime_error)
+        })
     }
 
     pub fn commit_and_restart(&mut self, py: Python<'_>) -> PyResult<()> {
-        rust_async!(py, self.commit_and_restart_impl().await)
+        let timer = OpTimer::start(Op::Commit);
+        let ret = rust_async!(py, self.commit_and_restart_impl().await);
+        timer.finish(&ret, |_| 0);
+        ret
     }
 
     pub fn create_access_token(&self) -> PyResult<PyWriteTransactionAccessToken> {
@@ -829,6 +1227,55 @@ impl PyWriteTransactionAccessToken {
         Ok(t.read().await)
     }
 
+    // Opens, writes and closes each file in turn, up to BATCH_CONCURRENCY at
+    // once, returning the total bytes written.  Every writer opened is closed,
+    // and no file is started once one has failed or the transaction has been
+    // canceled.
+    async fn write_files<'a, W, F>(&self, files: impl Iterator<Item = (&'a str, W)>) -> Result<u64>
+    where
+        W: FnOnce(Arc<XetWFileObject>) -> F,
+        F: std::future::Future<Output = Result<u64>>,
+    {
+        let failed = AtomicBool::new(false);
+        let failed = &failed;
+        let writes = files.map(|(path, write)| async move {
+            if failed.load(Ordering::Relaxed) {
+                return Ok(0);
+            }
+            let ret = self.write_file(path, write).await;
+            if ret.is_err() {
+                failed.store(true, Ordering::Relaxed);
+            }
+            ret
+        });
+        // Every write runs to completion, so no writer is dropped while open.
+        let sizes: Vec<Result<u64>> = futures::stream::iter(writes)
+            .buffer_unordered(BATCH_CONCURRENCY)
+            .collect()
+            .await;
+        sizes.into_iter().sum()
+    }
+
+    async fn write_file<W, F>(&self, path: &str, write: W) -> Result<u64>
+    where
+        W: FnOnce(Arc<XetWFileObject>) -> F,
+        F: std::future::Future<Output = Result<u64>>,
+    {
+        if self.access_transaction_for_read().await?.commit_canceled {
+            return Err(anyhow!("Write terminated as transaction was canceled."));
+        }
+        let writer = self
+            .access_transaction_for_write()
+            .await?
+            .open_for_write(path)
+            .await?;
+        let ret = write(writer.clone()).await;
+        let close_ret = writer.close().await;
+        let n = ret?;
+        close_ret?;
+        Ok(n)
+    }
+
     // release the handle.
     async fn release(&mut self) -> Result<()> {
         if let Some(handle) = self.tr.take() {
@@ -842,7 +1289,7 @@ impl Drop for PyWriteTransactionAccessToken {
     fn drop(&mut self) {
         // This should only occurs in case of errors elsewhere, but must be cleaned up okay.
         if let Some(handle) = self.tr.take() {
-            pyo3_asyncio::tokio::get_runtime().block_on(async {
+            runtime::get_runtime().block_on(async {
                 let res = WriteTransaction::release_write_token(handle).await;
                 if let Err(e) = res {
                     error!("Error deregistering transaction write token: {e:?}");
@@ -879,6 +1326,80 @@ impl PyWriteTransactionAccessToken {
         })
     }
 
+    /// Writes many whole files into the transaction in one call, uploading the
+    /// contents concurrently.  `files` is a list of (path, bytes).
+    pub fn write_many(&self, files: Vec<(String, &PyBytes)>, py: Python<'_>) -> PyResult<()> {
+        let files: Vec<(String, &[u8])> = files
+            .into_iter()
+            .map(|(path, data)| (path, data.as_bytes()))
+            .collect();
+        let total_bytes: u64 = files.iter().map(|(_, data)| data.len() as u64).sum();
+        let timer = OpTimer::start(Op::Write);
+        let ret = rust_async!(py, {
+            self.write_files(files.iter().map(|(path, data)| {
+                (path.as_str(), move |writer: Arc<XetWFileObject>| async move {
+                    writer.write(data).await?;
+                    anyhow::Ok(data.len() as u64)
+                })
+            }))
+            .await
+        });
+        timer.finish(&ret, |_| total_bytes);
+        ret.map(|_| ())
+    }
+
+    /// Uploads many local files into the transaction in one call, streaming
+    /// their contents concurrently.  `files` is a list of (path, local_path).
+    pub fn write_many_from_paths(&self, files: Vec<(String, String)>, py: Python<'_>) -> PyResult<()> {
+        let timer = OpTimer::start(Op::Write);
+        let ret = rust_async!(py, {
+            self.write_files(files.iter().map(|(path, local_path)| {
+                (path.as_str(), move |writer: Arc<XetWFileObject>| async move {
+                    let mut f = tokio::fs::File::open(local_path).await?;
+                    let mut buf = vec![0u8; UPLOAD_BUFFER_SIZE];
+                    let mut total = 0u64;
+                    loop {
+                        let n = f.read(&mut buf).await?;
+                        if n == 0 {
+                            break;
+                        }
+                        writer.write(&buf[..n]).await?;
+                        total += n as u64;
+                    }
+                    anyhow::Ok(total)
+                })
+            }))
+            .await
+        });
+        timer.finish(&ret, |n| *n);
+        ret.map(|_| ())
+    }
+
+    /// Async open_for_write; returns an awaitable resolving to a PyWFile.
+    pub fn open_for_write_async<'py>(&self, path: String, py: Python<'py>) -> PyResult<&'py PyAny> {
+        let Some(tr) = self.tr.clone() else {
+            return Err(PyRuntimeError::new_err(
+                "Transaction accessed for write after being closed.",
+            ));
+        };
+        runtime::future_into_py(py, async move {
+            let res = tr.write().await.open_for_write(&path).await;
+            match res {
+                Ok(writer) => Ok(PyWFile {
+                    writer,
+                    transaction_write_handle: PyWriteTransactionAccessToken { tr: Some(tr) },
+                }),
+                Err(e) => {
+                    // Give back the handle here; dropping a token blocks on the runtime.
+                    if let Err(re) = WriteTransaction::release_write_token(tr).await {
+                        error!("Error deregistering transaction write token: {re:?}");
+                    }
+                    Err(anyhow_to_runtime_error(e))
+                }
+            }
+        })
+    }
+
     pub fn delete(&self, path: &str, py: Python<'_>) -> PyResult<()> {
         rust_async!(
             py,
@@ -889,6 +1410,17 @@ impl PyWriteTransactionAccessToken {
         )
     }
 
+    /// Deletes many paths in one call, taking the transaction lock once.
+    pub fn delete_many(&self, paths: Vec<String>, py: Python<'_>) -> PyResult<()> {
+        rust_async!(
+            py,
+            self.access_transaction_for_write()
+                .await?
+                .delete_many(&paths)
+                .await
+        )
+    }
+
     pub fn copy(
         &self,
         src_branch: &str,
@@ -949,7 +1481,8 @@ impl PyWFile {
     pub fn write(&mut self, b: &PyAny, py: Python<'_>) -> PyResult<()> {
         let buf = PyByteArray::from(py, b)?;
         let bufbytes = unsafe { buf.as_bytes() };
-        rust_async!(py, {
+        let timer = OpTimer::start(Op::Write);
+        let ret = rust_async!(py, {
             if self
                 .transaction_write_handle
                 .access_transaction_for_read()
@@ -960,6 +1493,48 @@ impl PyWFile {
             }
 
             self.writer.write(bufbytes).await
+        });
+        timer.finish(&ret, |_| bufbytes.len() as u64);
+        ret
+    }
+
+    /// Async write; returns an awaitable.  The data is copied before the call
+    /// returns, so the buffer may be reused immediately.
+    pub fn write_async<'py>(&self, b: &PyAny, py: Python<'py>) -> PyResult<&'py PyAny> {
+        let data = PyByteArray::from(py, b)?.to_vec();
+        let Some(tr) = self.transaction_write_handle.tr.clone() else {
+            return Err(PyRuntimeError::new_err("Write on closed file."));
+        };
+        let writer = self.writer.clone();
+        runtime::future_into_py(py, async move {
+            let timer = OpTimer::start(Op::Write);
+            let ret = async {
+                if tr.read().await.commit_canceled {
+                    return Err(anyhow!("Write terminated as transaction was canceled."));
+                }
+                writer.write(&data).await
+            }
+            .await;
+            timer.finish(&ret, |_| data.len() as u64);
+            // The file still holds its own handle, so this is never the last reference.
+            drop(tr);
+            ret.map_err(anyhow_to_runtime_error)
+        })
+    }
+
+    /// Async close; returns an awaitable.
+    pub fn close_async<'py>(&mut self, py: Python<'py>) -> PyResult<&'py PyAny> {
+        let writer = self.writer.clone();
+        let tr = self.transaction_write_handle.tr.take();
+        runtime::future_into_py(py, async move {
+            let close_ret = writer.close().await;
+            let release_ret = match tr {
+                Some(tr) => WriteTransaction::release_write_token(tr).await,
+                None => Ok(()),
+            };
+            close_ret
+                .and(release_ret)
+                .map_err(anyhow_to_runtime_error)
         })
     }
     pub fn readable(&self) -> PyResult<bool> {
@@ -985,6 +1560,9 @@ impl PyWFile {
 #[derive(Clone)]
 pub struct PyProgressReporter {
     dpr: Arc<DataProgressReporter>,
+    // Shared by clones, so the counts leave the aggregate progress when the
+    // reporter is finalized or its last clone is dropped.
+    progress: Arc<progress::ReporterProgress>,
 }
 
 #[pymethods]
@@ -997,14 +1575,20 @@ impl PyProgressReporter {
     ) -> Self {
         Self {
             dpr: DataProgressReporter::new(message, total_unit_count, total_byte_count),
+            progress: Arc::new(progress::ReporterProgress::new(
+                total_unit_count,
+                total_byte_count,
+            )),
         }
     }
 
     pub fn register_progress(&self, unit_amount: Option<usize>, bytes: Option<usize>) {
+        self.progress.add_completed(unit_amount, bytes);
         self.dpr.register_progress(unit_amount, bytes)
     }
 
     pub fn update_target(&self, unit_delta_amount: Option<usize>, byte_delta: Option<usize>) {
+        self.progress.add_target(unit_delta_amount, byte_delta);
         self.dpr.update_target(unit_delta_amount, byte_delta)
     }
 
@@ -1013,6 +1597,7 @@ impl PyProgressReporter {
     }
 
     pub fn finalize(&self) {
+        self.progress.retire();
         self.dpr.finalize()
     }
 }
@@ -1038,6 +1623,11 @@ pub fn rpyxet(_py: Python<'_>, m: &PyModule) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(configure_login, m)?)?;
     m.add_function(wrap_pyfunction!(perform_mount, m)?)?;
     m.add_function(wrap_pyfunction!(perform_mount_curdir, m)?)?;
+    m.add_function(wrap_pyfunction!(compute_file_hash, m)?)?;
+    m.add_function(wrap_pyfunction!(get_stats, m)?)?;
+    m.add_function(wrap_pyfunction!(reset_stats, m)?)?;
+    m.add_function(wrap_pyfunction!(progress::set_progress_callback, m)?)?;
+    m.add_function(wrap_pyfunction!(runtime::check_runtime, m)?)?;
 
     Ok(())
 }
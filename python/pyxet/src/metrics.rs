@@ -0,0 +1,173 @@
+// Per-operation counts, bytes and latency histograms for the calls made
+// through the python bindings.  Recording is lock free so it can be done
+// on every call.
+use pyo3::prelude::*;
+use pyo3::types::PyDict;
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::time::{Duration, Instant};
+
+#[derive(Clone, Copy)]
+pub enum Op {
+    Listdir = 0,
+    Stat,
+    ApiQuery,
+    GetRepo,
+    OpenForRead,
+    Read,
+    Write,
+    Commit,
+}
+
+const NUM_OPS: usize = 8;
+const OP_NAMES: [&str; NUM_OPS] = [
+    "listdir",
+    "stat",
+    "api_query",
+    "get_repo",
+    "open_for_read",
+    "read",
+    "write",
+    "commit",
+];
+
+/// Upper bounds, in seconds, of the latency histogram buckets.  One more bucket
+/// counts everything slower than the last bound.
+pub const LATENCY_BUCKETS: [f64; 16] = [
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+    5.0, 10.0,
+];
+const NUM_BUCKETS: usize = LATENCY_BUCKETS.len() + 1;
+
+#[allow(clippy::declare_interior_mutable_const)]
+const ZERO: AtomicU64 = AtomicU64::new(0);
+
+struct OpMetrics {
+    count: AtomicU64,
+    errors: AtomicU64,
+    bytes: AtomicU64,
+    total_nanos: AtomicU64,
+    buckets: [AtomicU64; NUM_BUCKETS],
+}
+
+impl OpMetrics {
+    const fn new() -> Self {
+        OpMetrics {
+            count: ZERO,
+            errors: ZERO,
+            bytes: ZERO,
+            total_nanos: ZERO,
+            buckets: [ZERO; NUM_BUCKETS],
+        }
+    }
+
+    fn reset(&self) {
+        self.count.store(0, Ordering::Relaxed);
+        self.errors.store(0, Ordering::Relaxed);
+        self.bytes.store(0, Ordering::Relaxed);
+        self.total_nanos.store(0, Ordering::Relaxed);
+        for b in self.buckets.iter() {
+            b.store(0, Ordering::Relaxed);
+        }
+    }
+}
+
+#[allow(clippy::declare_interior_mutable_const)]
+const EMPTY_METRICS: OpMetrics = OpMetrics::new();
+static METRICS: [OpMetrics; NUM_OPS] = [EMPTY_METRICS; NUM_OPS];
+
+pub fn record(op: Op, elapsed: Duration, bytes: u64, ok: bool) {
+    let m = &METRICS[op as usize];
+    m.count.fetch_add(1, Ordering::Relaxed);
+    if !ok {
+        m.errors.fetch_add(1, Ordering::Relaxed);
+    }
+    m.bytes.fetch_add(bytes, Ordering::Relaxed);
+    m.total_nanos
+        .fetch_add(elapsed.as_nanos() as u64, Ordering::Relaxed);
+
+    let secs = elapsed.as_secs_f64();
+    let bucket = LATENCY_BUCKETS
+        .iter()
+        .position(|&b| secs <= b)
+        .unwrap_or(LATENCY_BUCKETS.len());
+    m.buckets[bucket].fetch_add(1, Ordering::Relaxed);
+}
+
+/// Number of operations started and not yet finished.
+static IN_FLIGHT: AtomicU64 = AtomicU64::new(0);
+
+pub fn in_flight() -> u64 {
+    IN_FLIGHT.load(Ordering::Relaxed)
+}
+
+/// Total bytes transferred by successful calls of an operation.
+pub fn op_bytes(op: Op) -> u64 {
+    METRICS[op as usize].bytes.load(Ordering::Relaxed)
+}
+
+/// Times one operation from creation until finish() is called with its result.
+pub struct OpTimer {
+    op: Op,
+    start: Instant,
+}
+
+impl OpTimer {
+    pub fn start(op: Op) -> Self {
+        IN_FLIGHT.fetch_add(1, Ordering::Relaxed);
+        OpTimer {
+            op,
+            start: Instant::now(),
+        }
+    }
+
+    /// Records the operation; `bytes` gives the number of bytes transferred
+    /// by a successful call.
+    pub fn finish<T, E>(self, res: &Result<T, E>, bytes: impl FnOnce(&T) -> u64) {
+        let elapsed = self.start.elapsed();
+        match res {
+            Ok(v) => record(self.op, elapsed, bytes(v), true),
+            Err(_) => record(self.op, elapsed, 0, false),
+        }
+    }
+}
+
+impl Drop for OpTimer {
+    fn drop(&mut self) {
+        IN_FLIGHT.fetch_sub(1, Ordering::Relaxed);
+    }
+}
+
+/// Returns a snapshot of the metrics of every operation as a dict of
+/// name -> {count, errors, bytes, total_seconds, latency_buckets}, where
+/// latency_buckets is a list of (upper bound in seconds, count) pairs.
+#[pyfunction]
+pub fn get_stats(py: Python<'_>) -> PyResult<PyObject> {
+    let ret = PyDict::new(py);
+    for (name, m) in OP_NAMES.iter().zip(METRICS.iter()) {
+        let d = PyDict::new(py);
+        d.set_item("count", m.count.load(Ordering::Relaxed))?;
+        d.set_item("errors", m.errors.load(Ordering::Relaxed))?;
+        d.set_item("bytes", m.bytes.load(Ordering::Relaxed))?;
+        d.set_item(
+            "total_seconds",
+            m.total_nanos.load(Ordering::Relaxed) as f64 / 1e9,
+        )?;
+        let buckets: Vec<(f64, u64)> = LATENCY_BUCKETS
+            .iter()
+            .copied()
+            .chain(std::iter::once(f64::INFINITY))
+            .zip(m.buckets.iter().map(|b| b.load(Ordering::Relaxed)))
+            .collect();
+        d.set_item("latency_buckets", buckets)?;
+        ret.set_item(*name, d)?;
+    }
+    Ok(ret.into())
+}
+
+/// Resets all metrics to zero.
+#[pyfunction]
+pub fn reset_stats() {
+    for m in METRICS.iter() {
+        m.reset();
+    }
+}
@@ -0,0 +1,228 @@
+// Aggregate progress of all transfers, delivered to a python callback from a
+// background thread at a fixed interval.  Transfers only update atomic
+// counters; python is never called per chunk.
+use crate::metrics::{in_flight, op_bytes, Op};
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use pyo3::types::PyDict;
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::Mutex;
+use std::time::{Duration, Instant};
+
+// Files and bytes targeted and completed by the progress reporters still in
+// progress.  A reporter's counts are removed once it is finalized or dropped,
+// so finished transfers do not stay in the totals.
+static FILES_TOTAL: AtomicU64 = AtomicU64::new(0);
+static FILES_COMPLETED: AtomicU64 = AtomicU64::new(0);
+static BYTES_TOTAL: AtomicU64 = AtomicU64::new(0);
+static BYTES_COMPLETED: AtomicU64 = AtomicU64::new(0);
+
+// Files and bytes completed by all progress reporters.  These never decrease,
+// so the rates stay correct as reporters finish.
+static FILES_TRANSFERRED: AtomicU64 = AtomicU64::new(0);
+static BYTES_TRANSFERRED: AtomicU64 = AtomicU64::new(0);
+
+// Incremented every time the callback is set or cleared; a callback thread
+// exits once it no longer matches the generation it was started with.
+static CALLBACK_GENERATION: AtomicU64 = AtomicU64::new(0);
+
+#[derive(Default)]
+struct ReporterCounts {
+    files_total: u64,
+    files_completed: u64,
+    bytes_total: u64,
+    bytes_completed: u64,
+    retired: bool,
+}
+
+/// The counts of one progress reporter, which are included in the aggregate
+/// progress from its creation until it is retired.
+#[derive(Default)]
+pub struct ReporterProgress {
+    counts: Mutex<ReporterCounts>,
+}
+
+impl ReporterProgress {
+    pub fn new(files: Option<usize>, bytes: Option<usize>) -> Self {
+        let progress = Self::default();
+        progress.add_target(files, bytes);
+        progress
+    }
+
+    pub fn add_target(&self, files: Option<usize>, bytes: Option<usize>) {
+        let (files, bytes) = (files.unwrap_or(0) as u64, bytes.unwrap_or(0) as u64);
+        let mut counts = self.counts.lock().unwrap();
+        if counts.retired {
+            return;
+        }
+        counts.files_total += files;
+        counts.bytes_total += bytes;
+        FILES_TOTAL.fetch_add(files, Ordering::Relaxed);
+        BYTES_TOTAL.fetch_add(bytes, Ordering::Relaxed);
+    }
+
+    pub fn add_completed(&self, files: Option<usize>, bytes: Option<usize>) {
+        let (files, bytes) = (files.unwrap_or(0) as u64, bytes.unwrap_or(0) as u64);
+        FILES_TRANSFERRED.fetch_add(files, Ordering::Relaxed);
+        BYTES_TRANSFERRED.fetch_add(bytes, Ordering::Relaxed);
+        let mut counts = self.counts.lock().unwrap();
+        if counts.retired {
+            return;
+        }
+        counts.files_completed += files;
+        counts.bytes_completed += bytes;
+        FILES_COMPLETED.fetch_add(files, Ordering::Relaxed);
+        BYTES_COMPLETED.fetch_add(bytes, Ordering::Relaxed);
+    }
+
+    /// Removes this reporter's counts from the aggregate progress.
+    pub fn retire(&self) {
+        let mut counts = self.counts.lock().unwrap();
+        if counts.retired {
+            return;
+        }
+        counts.retired = true;
+        FILES_TOTAL.fetch_sub(counts.files_total, Ordering::Relaxed);
+        FILES_COMPLETED.fetch_sub(counts.files_completed, Ordering::Relaxed);
+        BYTES_TOTAL.fetch_sub(counts.bytes_total, Ordering::Relaxed);
+        BYTES_COMPLETED.fetch_sub(counts.bytes_completed, Ordering::Relaxed);
+    }
+}
+
+impl Drop for ReporterProgress {
+    fn drop(&mut self) {
+        self.retire();
+    }
+}
+
+#[derive(Clone, Copy)]
+struct Sample {
+    at: Instant,
+    bytes_read: u64,
+    bytes_written: u64,
+    files_transferred: u64,
+    bytes_transferred: u64,
+}
+
+impl Sample {
+    fn now() -> Self {
+        Sample {
+            at: Instant::now(),
+            bytes_read: op_bytes(Op::Read),
+            bytes_written: op_bytes(Op::Write),
+            files_transferred: FILES_TRANSFERRED.load(Ordering::Relaxed),
+            bytes_transferred: BYTES_TRANSFERRED.load(Ordering::Relaxed),
+        }
+    }
+
+    fn moved_since(&self, other: &Sample) -> bool {
+        self.bytes_read != other.bytes_read
+            || self.bytes_written != other.bytes_written
+            || self.files_transferred != other.files_transferred
+            || self.bytes_transferred != other.bytes_transferred
+    }
+}
+
+fn rate(now: u64, before: u64, secs: f64) -> f64 {
+    if secs > 0.0 {
+        now.saturating_sub(before) as f64 / secs
+    } else {
+        0.0
+    }
+}
+
+fn progress_dict<'py>(
+    py: Python<'py>,
+    first: &Sample,
+    prev: &Sample,
+    cur: &Sample,
+    last_moved: Instant,
+) -> PyResult<&'py PyDict> {
+    let interval_secs = cur.at.duration_since(prev.at).as_secs_f64();
+    let elapsed_secs = cur.at.duration_since(first.at).as_secs_f64();
+    let files_total = FILES_TOTAL.load(Ordering::Relaxed);
+    let files_completed = FILES_COMPLETED.load(Ordering::Relaxed);
+    let bytes_total = BYTES_TOTAL.load(Ordering::Relaxed);
+    let bytes_completed = BYTES_COMPLETED.load(Ordering::Relaxed);
+
+    // The ETA uses the average rate since the callback was set, which is
+    // steadier than the rate over the last interval.
+    let avg_rate = rate(cur.bytes_transferred, first.bytes_transferred, elapsed_secs);
+    let eta_seconds = if bytes_total > bytes_completed && avg_rate > 0.0 {
+        Some((bytes_total - bytes_completed) as f64 / avg_rate)
+    } else {
+        None
+    };
+
+    let d = PyDict::new(py);
+    d.set_item("elapsed_seconds", elapsed_secs)?;
+    d.set_item("bytes_read", cur.bytes_read)?;
+    d.set_item("bytes_written", cur.bytes_written)?;
+    d.set_item(
+        "read_bytes_per_second",
+        rate(cur.bytes_read, prev.bytes_read, interval_secs),
+    )?;
+    d.set_item(
+        "write_bytes_per_second",
+        rate(cur.bytes_written, prev.bytes_written, interval_secs),
+    )?;
+    d.set_item("files_completed", files_completed)?;
+    d.set_item("files_total", files_total)?;
+    d.set_item("bytes_completed", bytes_completed)?;
+    d.set_item("bytes_total", bytes_total)?;
+    d.set_item("in_flight", in_flight())?;
+    d.set_item("eta_seconds", eta_seconds)?;
+    d.set_item(
+        "seconds_since_progress",
+        cur.at.duration_since(last_moved).as_secs_f64(),
+    )?;
+    Ok(d)
+}
+
+fn run_callback(callback: PyObject, interval: Duration, generation: u64) {
+    let first = Sample::now();
+    let mut prev = first;
+    let mut last_moved = first.at;
+
+    loop {
+        std::thread::sleep(interval);
+        if CALLBACK_GENERATION.load(Ordering::SeqCst) != generation {
+            return;
+        }
+
+        let cur = Sample::now();
+        if cur.moved_since(&prev) {
+            last_moved = cur.at;
+        }
+
+        Python::with_gil(|py| {
+            let res = progress_dict(py, &first, &prev, &cur, last_moved)
+                .and_then(|d| callback.call1(py, (d,)));
+            if let Err(e) = res {
+                // Errors in the callback are reported and otherwise ignored,
+                // so they never interrupt the transfers.
+                e.print(py);
+            }
+        });
+        prev = cur;
+    }
+}
+
+/// Calls `callback` with a dict of aggregate progress every `interval`
+/// seconds from a background thread, replacing any previous callback.
+/// Passing None stops the callbacks.
+#[pyfunction]
+pub fn set_progress_callback(callback: Option<PyObject>, interval: f64) -> PyResult<()> {
+    let generation = CALLBACK_GENERATION.fetch_add(1, Ordering::SeqCst) + 1;
+    let Some(callback) = callback else {
+        return Ok(());
+    };
+    if !(interval > 0.0) {
+        return Err(PyValueError::new_err("interval must be positive"));
+    }
+    let interval = Duration::from_secs_f64(interval);
+    std::thread::Builder::new()
+        .name("pyxet-progress".to_string())
+        .spawn(move || run_callback(callback, interval, generation))?;
+    Ok(())
+}
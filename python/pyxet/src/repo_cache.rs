@@ -0,0 +1,41 @@
+// Handles of the repos opened through a PyRepoManager.  Once a repo is open,
+// further gets of it only take a read lock on this map, instead of the write
+// lock on the manager, and do not need to block on the runtime.
+use anyhow::Result;
+use libxet::xetblob::*;
+use std::collections::HashMap;
+use std::sync::Arc;
+use tokio::sync::RwLock;
+
+#[derive(Default)]
+pub struct RepoCache {
+    repos: std::sync::RwLock<HashMap<String, Arc<XetRepo>>>,
+}
+
+impl RepoCache {
+    pub fn get(&self, remote: &str) -> Option<Arc<XetRepo>> {
+        self.repos.read().unwrap().get(remote).cloned()
+    }
+
+    /// Returns the cached handle of the repo, opening it on first use.
+    pub async fn get_or_open(
+        &self,
+        manager: &RwLock<XetRepoManager>,
+        remote: &str,
+    ) -> Result<Arc<XetRepo>> {
+        if let Some(repo) = self.get(remote) {
+            return Ok(repo);
+        }
+        let repo = manager.write().await.get_repo(None, remote).await?;
+        self.repos
+            .write()
+            .unwrap()
+            .insert(remote.to_string(), repo.clone());
+        Ok(repo)
+    }
+
+    /// Drops all handles, e.g. after the credentials change.
+    pub fn clear(&self) {
+        self.repos.write().unwrap().clear();
+    }
+}
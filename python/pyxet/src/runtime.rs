@@ -0,0 +1,114 @@
+// The tokio runtime used by the bindings.  The worker threads of a runtime do
+// not survive fork(), so a child process blocking on the runtime it inherited
+// would hang forever; instead each process lazily builds its own runtime.
+use pyo3::prelude::*;
+use pyo3_asyncio::generic::{ContextExt, Runtime as AsyncRuntime};
+use pyo3_asyncio::TaskLocals;
+use std::future::Future;
+use std::pin::Pin;
+use std::ptr::null_mut;
+use std::sync::atomic::{AtomicPtr, Ordering};
+use std::sync::Once;
+use tokio::runtime::{Builder, Runtime};
+
+// The runtime of the current process; null until first use and in a forked
+// child until it first uses the bindings.  Read without a lock on every call.
+static RUNTIME: AtomicPtr<Runtime> = AtomicPtr::new(null_mut());
+
+static REGISTER_AT_FORK: Once = Once::new();
+
+// Runs in the child right after fork, so it may only do async-signal-safe work.
+// The parent's runtime is leaked: dropping it would wait on worker threads
+// that only exist in the parent.
+#[cfg(unix)]
+extern "C" fn reset_runtime_in_child() {
+    RUNTIME.store(null_mut(), Ordering::SeqCst);
+}
+
+/// Returns the runtime of the current process, building a new one after a fork.
+pub fn get_runtime() -> &'static Runtime {
+    let rt = RUNTIME.load(Ordering::Acquire);
+    if !rt.is_null() {
+        // Runtimes are never freed, so the pointer stays valid.
+        return unsafe { &*rt };
+    }
+    init_runtime()
+}
+
+#[cold]
+fn init_runtime() -> &'static Runtime {
+    #[cfg(unix)]
+    REGISTER_AT_FORK.call_once(|| unsafe {
+        libc::pthread_atfork(None, None, Some(reset_runtime_in_child));
+    });
+
+    let rt = Box::into_raw(Box::new(
+        Builder::new_multi_thread()
+            .enable_all()
+            .build()
+            .expect("failed to build the tokio runtime"),
+    ));
+    match RUNTIME.compare_exchange(null_mut(), rt, Ordering::AcqRel, Ordering::Acquire) {
+        Ok(_) => unsafe { &*rt },
+        Err(existing) => {
+            // Another thread built one first; shutdown_background is safe to
+            // call from any context, unlike dropping the runtime.
+            unsafe { Box::from_raw(rt) }.shutdown_background();
+            unsafe { &*existing }
+        }
+    }
+}
+
+/// Spawns a task on the runtime and waits for it, failing if the runtime
+/// cannot run tasks, e.g. after a fork.  Used by the tests.
+#[pyfunction]
+pub fn check_runtime(py: Python<'_>) -> PyResult<bool> {
+    py.allow_threads(|| {
+        let rt = get_runtime();
+        rt.block_on(rt.spawn(async { true }))
+    })
+    .map_err(|e| pyo3::exceptions::PyRuntimeError::new_err(format!("{e:?}")))
+}
+
+tokio::task_local! {
+    static TASK_LOCALS: TaskLocals;
+}
+
+/// Runs the futures returned to asyncio on the runtime of the current process.
+/// pyo3_asyncio::tokio spawns on a global runtime which is never rebuilt.
+pub struct ForkSafeRuntime;
+
+impl AsyncRuntime for ForkSafeRuntime {
+    type JoinError = tokio::task::JoinError;
+    type JoinHandle = tokio::task::JoinHandle<()>;
+
+    fn spawn<F>(fut: F) -> Self::JoinHandle
+    where
+        F: Future<Output = ()> + Send + 'static,
+    {
+        get_runtime().spawn(fut)
+    }
+}
+
+impl ContextExt for ForkSafeRuntime {
+    fn scope<F, R>(locals: TaskLocals, fut: F) -> Pin<Box<dyn Future<Output = R> + Send>>
+    where
+        F: Future<Output = R> + Send + 'static,
+    {
+        Box::pin(TASK_LOCALS.scope(locals, fut))
+    }
+
+    fn get_task_locals() -> Option<TaskLocals> {
+        TASK_LOCALS.try_with(|locals| locals.clone()).ok()
+    }
+}
+
+/// Converts a rust future into an asyncio awaitable, like
+/// pyo3_asyncio::tokio::future_into_py.
+pub fn future_into_py<F, T>(py: Python, fut: F) -> PyResult<&PyAny>
+where
+    F: Future<Output = PyResult<T>> + Send + 'static,
+    T: IntoPy<PyObject>,
+{
+    pyo3_asyncio::generic::future_into_py::<ForkSafeRuntime, F, T>(py, fut)
+}
@@ -72,6 +72,13 @@ impl WriteTransaction {
     }
 
     /// Complete the transaction by either cancelling it or committing it, depending on flags.
+    #[tracing::instrument(name = "WriteTransaction::complete", skip(self), fields(
+        branch = %self.branch,
+        new_files = self.new_files.len(),
+        copies = self.copies.len(),
+        deletes = self.deletes.len(),
+        moves = self.moves.len(),
+    ))]
     pub async fn complete(&mut self) -> Result<()> {
         if let Some(transaction) = self.transaction.take() {
             if self.error_on_commit {
@@ -161,6 +168,28 @@ impl WriteTransaction {
         }
     }
 
+    /// Deletes a batch of paths, holding the transaction for the whole batch.
+    pub async fn delete_many(&mut self, paths: &[String]) -> Result<()> {
+        if self.commit_canceled {
+            error!("delete_many failed: Transaction has been canceled.");
+            // No point doing anything more.
+            return Err(anyhow!("delete failed: Transaction has been canceled."));
+        }
+
+        if let Some(transaction) = &mut self.transaction {
+            for path in paths {
+                debug!("Deleting {path}");
+                transaction.delete(path).await?;
+
+                self.deletes
+                    .push(format!("{}/{path}", self.branch).to_string());
+            }
+            Ok(())
+        } else {
+            Err(anyhow!("delete called after transaction completed."))
+        }
+    }
+
     pub async fn copy(
         &mut self,
         src_branch: &str,
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from pyxet.aio import XetClient
+from pyxet.local_backend import LOCAL_BACKEND_ROOT_ENV
+from pyxet.url_parsing import parse_url
+
+
+@pytest.fixture
+def local_repo(local_backend, local_repo_url):
+    return local_backend, local_repo_url[len("xet://"):-len("/main")]
+
+
+def test_aio_write_and_read(local_repo):
+    fs, repo = local_repo
+    client = XetClient("localhost-fs")
+
+    async def write(i):
+        async with await client.open(f"{repo}/main/data/{i}.txt", "wb") as f:
+            await f.write(f"file {i}")
+
+    async def run():
+        async with client.transaction("add files"):
+            await asyncio.gather(*[write(i) for i in range(10)])
+
+        entries = await client.ls(f"{repo}/main/data")
+        assert sorted(e['name'] for e in entries) == sorted(f"{repo}/main/data/{i}.txt" for i in range(10))
+        assert (await client.info(f"{repo}/main/data/3.txt"))['size'] == 6
+        contents = await asyncio.gather(*[client.cat(f"{repo}/main/data/{i}.txt") for i in range(10)])
+        assert contents == [f"file {i}".encode() for i in range(10)]
+
+        async with await client.open(f"{repo}/main/data/3.txt") as f:
+            f.seek(2)
+            assert await f.read(2) == b"le"
+            assert await f.read_at(0, 4) == b"file"
+            assert await f.read() == b" 3"
+
+    asyncio.run(run())
+    assert fs.cat(f"{repo}/main/data/7.txt") == b"file 7"
+
+
+def test_aio_transaction_commits_at_file_limit(local_repo, monkeypatch):
+    from pyxet import aio
+    fs, repo = local_repo
+    client = XetClient("localhost-fs")
+    monkeypatch.setattr(aio, "TRANSACTION_FILE_LIMIT", 4)
+
+    async def run():
+        async with client.transaction("add files"):
+            for i in range(10):
+                async with await client.open(f"{repo}/main/data/{i}.txt", "wb") as f:
+                    await f.write(f"file {i}")
+
+    asyncio.run(run())
+    assert sorted(fs.ls(f"{repo}/main/data", detail=False)) == sorted(f"{repo}/main/data/{i}.txt" for i in range(10))
+    user, name = repo.split(":", 1)[1].split("/")
+    with open(os.path.join(os.environ[LOCAL_BACKEND_ROOT_ENV], user, name, "commits", "main.jsonl")) as f:
+        commits = [json.loads(line) for line in f]
+    # the repository's initial commit, then one commit per TRANSACTION_FILE_LIMIT files
+    assert [c["message"] for c in commits[1:]] == ["add files"] * 3
+
+
+def test_aio_transaction_canceled_on_error(local_repo):
+    fs, repo = local_repo
+    client = XetClient("localhost-fs")
+
+    async def run():
+        async with client.transaction("discarded"):
+            async with await client.open(f"{repo}/main/a.txt", "wb") as f:
+                await f.write(b"a")
+            raise ValueError("discard")
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+    assert not fs.exists(f"{repo}/main/a.txt")
+    with pytest.raises(RuntimeError):
+        asyncio.run(client.open(f"{repo}/main/b.txt", "wb"))
+
+
+def test_async_xet_fs(local_repo, tmp_path):
+    from pyxet.aio import AsyncXetFS
+    fs, repo = local_repo
+    afs = AsyncXetFS("localhost-fs")
+
+    afs.pipe({f"{repo}/main/data/{i}.json": f'{{"i": {i}}}'.encode() for i in range(20)})
+    assert len(fs.ls(f"{repo}/main/data")) == 20
+
+    paths = [f"{repo}/main/data/{i}.json" for i in range(20)]
+    contents = afs.cat(paths)
+    assert contents[paths[3]] == b'{"i": 3}'
+    assert afs.cat_file(paths[12], start=1, end=-1) == b'"i": 12'
+    assert afs.info(paths[0])['type'] == 'file'
+    assert afs.isdir(f"{repo}/main/data")
+
+    afs.get(f"{repo}/main/data", str(tmp_path / "out"), recursive=True)
+    assert (tmp_path / "out" / "5.json").read_bytes() == b'{"i": 5}'
+
+    (tmp_path / "up").mkdir()
+    (tmp_path / "up" / "a.txt").write_bytes(b"a")
+    (tmp_path / "up" / "b.txt").write_bytes(b"b")
+    afs.put(str(tmp_path / "up"), f"{repo}/main/up", recursive=True)
+    assert sorted(afs.ls(f"{repo}/main/up", detail=False)) == [f"{repo}/main/up/a.txt", f"{repo}/main/up/b.txt"]
+    with afs.open(f"{repo}/main/up/b.txt") as f:
+        assert f.read() == b"b"
+
+
+def test_async_xet_fs_concurrent_writes(local_repo):
+    from pyxet.aio import AsyncXetFS
+    fs, repo = local_repo
+    afs = AsyncXetFS("localhost-fs")
+    transactions = []
+
+    async def write(name, fail):
+        async with afs._write_transaction(f"write {name}") as tr:
+            transactions.append(tr)
+            await asyncio.sleep(0.01)
+            async with await tr.open_for_write(parse_url(f"{repo}/main/{name}", afs.endpoint)) as f:
+                await f.write(name.encode())
+            if fail:
+                raise ValueError(name)
+
+    async def run():
+        return await asyncio.gather(write("a.txt", False), write("b.txt", True), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert results[0] is None and isinstance(results[1], ValueError)
+    assert transactions[0] is not transactions[1]
+    assert fs.cat(f"{repo}/main/a.txt") == b"a.txt"
+    assert not fs.exists(f"{repo}/main/b.txt")
+
+    async def pipe_both():
+        await asyncio.gather(afs._pipe_file(f"{repo}/main/c.txt", b"c"),
+                             afs._pipe_file(f"{repo}/main/d.txt", b"d"))
+
+    asyncio.run(pipe_both())
+    assert fs.cat(f"{repo}/main/c.txt") == b"c"
+    assert fs.cat(f"{repo}/main/d.txt") == b"d"
+    assert afs.client._transaction is None
@@ -1,10 +1,16 @@
 import io
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
 import pyxet
+from pyxet.local_backend import LOCAL_BACKEND_ROOT_ENV
 from utils import skip_if_no, CONSTANTS
 
+os.environ.setdefault(LOCAL_BACKEND_ROOT_ENV, tempfile.mkdtemp())
+
 
 @pytest.mark.skip("Not sure if pyxet will implement read_arrow - TODO")
 def test_read_arrow():
@@ -59,3 +65,52 @@ def test_pyarrow_fsspec():
     local = fs.LocalFileSystem()
     local_fsspec = ArrowFSWrapper(local)
     local_fsspec.ls('pyxet')
+
+
+@pytest.fixture
+def local_parquet_repo():
+    fs = pyxet.XetFS("localhost-fs")
+    user = fs.get_username()
+    name = f"repo_{os.urandom(4).hex()}"
+    fs.make_repo(f"xet://localhost-fs:{user}/{name}")
+    return fs, f"localhost-fs:{user}/{name}/main"
+
+
+@skip_if_no("pyarrow")
+def test_arrow_handler_dataset(local_parquet_repo):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    import pyxet.arrow
+    from pyarrow.fs import FileSelector, FileType
+
+    fs, branch = local_parquet_repo
+    pa_fs = pyxet.arrow.filesystem("localhost-fs")
+    table = pa.table({"x": list(range(1000)), "y": [str(i) for i in range(1000)]})
+    fs.start_transaction("add parquet")
+    for part in range(3):
+        with pa_fs.open_output_stream(f"{branch}/data/part={part}/0.parquet") as f:
+            pq.write_table(table, f, row_group_size=100)
+    fs.end_transaction()
+
+    infos = pa_fs.get_file_info(FileSelector(f"{branch}/data", recursive=True))
+    assert sorted(i.path for i in infos if i.type == FileType.File) == \
+        [f"{branch}/data/part={p}/0.parquet" for p in range(3)]
+    assert sorted(i.path for i in infos if i.type == FileType.Directory) == \
+        [f"{branch}/data/part={p}" for p in range(3)]
+    assert pa_fs.get_file_info(f"{branch}/missing").type == FileType.NotFound
+
+    dataset = ds.dataset(f"{branch}/data", filesystem=pa_fs, partitioning="hive")
+    assert dataset.to_table(columns=["x"], filter=ds.field("part") == 1).num_rows == 1000
+
+    with pytest.raises(pa.ArrowNotImplementedError):
+        pa_fs.open_append_stream(f"{branch}/data/part=0/0.parquet")
+    with pytest.raises(pa.ArrowNotImplementedError):
+        pa_fs.delete_dir_contents("/", accept_root_dir=True)
+
+    with pa_fs.open_input_file(f"{branch}/data/part=0/0.parquet") as f:
+        size = f.size()
+        expected = f.read()
+        assert len(expected) == size
+        chunks = list(ThreadPoolExecutor(4).map(lambda off: f.read_at(100, off), range(0, size, 100)))
+        assert b"".join(chunks) == expected
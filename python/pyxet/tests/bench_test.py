@@ -0,0 +1,35 @@
+import os
+import tempfile
+
+import pyxet
+from pyxet.bench import XetBench
+from pyxet.local_backend import LOCAL_BACKEND_ROOT_ENV
+
+os.environ.setdefault(LOCAL_BACKEND_ROOT_ENV, tempfile.mkdtemp())
+
+
+def test_bench_local_backend():
+    fs = pyxet.XetFS("localhost-fs")
+    repo = f"localhost-fs:{fs.get_username()}/bench_{os.urandom(4).hex()}"
+    fs.make_repo(f"xet://{repo}")
+    with fs.transaction:
+        with fs.open(f"{repo}/main/data/file.bin", "wb") as f:
+            f.write(os.urandom(3 * 1024 * 1024))
+
+    bench = XetBench(f"xet://{repo}/main/data", samples=3, streams=[1, 2],
+                     upload_bytes=1024 * 1024, upload_mode='dry-run')
+    rows = bench.run()
+    tests = [(r['test'], r['streams']) for r in rows]
+    assert ("stat latency (median)", None) in tests
+    assert ("listdir latency (p90)", None) in tests
+    assert ("read throughput", 1) in tests
+    assert ("read throughput", 2) in tests
+    assert ("upload throughput", 2) in tests
+
+    # dry-run uploads are not committed
+    assert fs.ls(f"{repo}/main", detail=False) == [f"{repo}/main/data"]
+
+    bench = XetBench(f"xet://{repo}/main", samples=1, streams=[1],
+                     upload_bytes=1024 * 1024, upload_mode='scratch-branch')
+    bench.run()
+    assert [b['name'] for b in fs.list_branches(repo)] == ["main"]
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks"))
+
+import run_benchmarks
+from harness import compare_results, load_results
+
+
+def test_run_benchmarks_local_backend(local_backend, tmp_path):
+    output = str(tmp_path / "results.json")
+    assert run_benchmarks.main(["--cases", "sync_upload,sync_noop", "--repeat", "1", "--warmup", "0",
+                                "--output", output]) == 0
+
+    results = load_results(output)
+    assert sorted(results["results"]) == ["sync_noop", "sync_upload"]
+    assert results["results"]["sync_upload"]["ops_per_s"] > 0
+    rows = compare_results(results, results)
+    assert [row[4] for row in rows] == ["ok", "ok"]
+
+
+def test_run_benchmarks_parquet_reads(local_backend, tmp_path):
+    pytest.importorskip("pyarrow.parquet")
+    output = str(tmp_path / "results.json")
+    assert run_benchmarks.main(["--cases", "arrow_read_parquet,parquet_read_batched", "--repeat", "1",
+                                "--warmup", "0", "--output", output]) == 0
+
+    results = load_results(output)["results"]
+    assert sorted(results) == ["arrow_read_parquet", "parquet_read_batched"]
+    assert results["arrow_read_parquet"]["mb_per_s"] > 0
@@ -382,4 +382,136 @@ def test_size_hint():
         assert cplist[1].size == 471
 
     finally:
-        shutil.rmtree(dir)
\ No newline at end of file
+        shutil.rmtree(dir)
+
+def test_s3_part_ranges():
+    from pyxet.file_operations import _s3_part_ranges, S3_MIN_PART_SIZE, S3_MAX_PARTS
+
+    mb = 1024 * 1024
+    parts = _s3_part_ranges(100 * mb, 32 * mb)
+    assert [p[0] for p in parts] == [1, 2, 3, 4]
+    assert [p[1] for p in parts] == [0, 32 * mb, 64 * mb, 96 * mb]
+    assert [p[2] for p in parts] == [32 * mb, 32 * mb, 32 * mb, 4 * mb]
+
+    # part sizes below the S3 minimum are raised to it
+    parts = _s3_part_ranges(12 * mb, mb)
+    assert all(p[2] == S3_MIN_PART_SIZE for p in parts[:-1])
+    assert sum(p[2] for p in parts) == 12 * mb
+
+    # very large files grow the part size to stay within the part limit
+    size = S3_MAX_PARTS * 8 * mb + 1
+    parts = _s3_part_ranges(size, 8 * mb)
+    assert len(parts) <= S3_MAX_PARTS
+    assert sum(p[2] for p in parts) == size
+
+
+class _MockS3FS:
+    """
+    Records the multipart upload calls of _xet_to_s3_multipart_copy.
+    """
+    protocol = "s3"
+
+    def __init__(self, slow_part=None, failing_part=None):
+        import threading
+        self.calls = []
+        self.parts = {}
+        self.slow_part = slow_part
+        self.failing_part = failing_part
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def split_path(self, path):
+        bucket, key = path.split("/", 1)
+        return bucket, key, None
+
+    def call_s3(self, method, **kwargs):
+        import time
+        self.calls.append(method)
+        if method == "create_multipart_upload":
+            return {"UploadId": "upload-1"}
+        if method == "upload_part":
+            n = kwargs["PartNumber"]
+            with self._lock:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                time.sleep(0.05 if n == self.slow_part else 0.01)
+                if n == self.failing_part:
+                    raise IOError(f"part {n} failed")
+                self.parts[n] = kwargs["Body"]
+                return {"ETag": f"etag-{n}"}
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+        if method == "complete_multipart_upload":
+            self.completed = kwargs["MultipartUpload"]["Parts"]
+        return {}
+
+    def invalidate_cache(self, path):
+        pass
+
+
+class _NullProgress:
+    def register_progress(self, files, size):
+        pass
+
+
+def _mock_s3_upload(local_repo_url, local_backend, s3, data, monkeypatch, **kwargs):
+    import threading
+    from pyxet import file_operations
+    from pyxet.file_operations import _single_file_copy_impl, CopyUnit
+
+    with local_backend.transaction:
+        local_backend.pipe(f"{local_repo_url}/big.bin", data)
+    monkeypatch.setattr(file_operations, "S3_MIN_PART_SIZE", 4)
+    monkeypatch.setattr(file_operations, "S3_MULTIPART_BUFFERED_PARTS", threading.Semaphore(2))
+    cp = CopyUnit(f"{local_repo_url}/big.bin", "bucket/big.bin", None, len(data))
+    _single_file_copy_impl(cp, local_backend, s3, _NullProgress(), s3_part_size=4, **kwargs)
+
+
+def test_xet_to_s3_multipart_copy(local_backend, local_repo_url, monkeypatch):
+    data = bytes(range(30))
+    s3 = _MockS3FS(slow_part=1)
+    _mock_s3_upload(local_repo_url, local_backend, s3, data, monkeypatch, s3_concurrency=8)
+
+    # parts are completed in part order although part 1 finished last, and
+    # no more than the shared limit of parts were buffered at once
+    assert s3.calls[0] == "create_multipart_upload"
+    assert s3.calls[-1] == "complete_multipart_upload"
+    assert [p["PartNumber"] for p in s3.completed] == list(range(1, 9))
+    assert [p["ETag"] for p in s3.completed] == [f"etag-{n}" for n in range(1, 9)]
+    assert b"".join(s3.parts[n] for n in range(1, 9)) == data
+    assert s3.max_in_flight == 2
+
+
+def test_xet_to_s3_multipart_copy_aborts(local_backend, local_repo_url, monkeypatch):
+    s3 = _MockS3FS(failing_part=2)
+    with pytest.raises(IOError):
+        _mock_s3_upload(local_repo_url, local_backend, s3, bytes(range(30)), monkeypatch, s3_concurrency=1)
+
+    assert s3.calls[-1] == "abort_multipart_upload"
+    assert "complete_multipart_upload" not in s3.calls
+    # the parts queued behind the failed one were cancelled; the one part
+    # already started when it failed may still have been uploaded
+    assert 1 in s3.parts and len(s3.parts) <= 2
+
+
+def test_parallel_find():
+    import fsspec
+    from pyxet.util import _parallel_find
+
+    local_dir = tempfile.mkdtemp()
+    for p in ["a", "x/b", "x/y/c", "x/y/z/d", "e/f", "g/h/i/j"]:
+        path = os.path.join(local_dir, p)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(p)
+
+    fs = fsspec.filesystem("file")
+    root = fs._strip_protocol(local_dir)
+    expected = sorted(fs.find(root))
+    assert sorted(name for name, _ in _parallel_find(fs, root)) == expected
+    assert sorted(name for name, _ in _parallel_find(fs, root, max_workers=1)) == expected
+
+    shutil.rmtree(local_dir)
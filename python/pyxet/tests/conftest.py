@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+import pyxet
+from pyxet import file_system
+from pyxet.local_backend import LOCAL_BACKEND_ENDPOINT, LOCAL_BACKEND_ROOT_ENV, LocalRepoManager
+
+
+@pytest.fixture
+def local_backend(tmp_path, monkeypatch):
+    """
+    Returns a localhost-fs XetFS over a backend root private to the test.
+    The environment and the cached repo manager are restored afterwards.
+    """
+    root = str(tmp_path / "backend")
+    monkeypatch.setenv(LOCAL_BACKEND_ROOT_ENV, root)
+    monkeypatch.setitem(vars(file_system)['__repo_managers'], LOCAL_BACKEND_ENDPOINT, LocalRepoManager(root))
+    return pyxet.XetFS(LOCAL_BACKEND_ENDPOINT)
+
+
+@pytest.fixture
+def local_repo_url(local_backend):
+    """
+    Returns the xet:// url of the main branch of a new repository on `local_backend`.
+    """
+    repo = f"{LOCAL_BACKEND_ENDPOINT}:{local_backend.get_username()}/repo_{os.urandom(4).hex()}"
+    local_backend.make_repo(f"xet://{repo}")
+    return f"xet://{repo}/main"
@@ -51,7 +51,8 @@ def test_open_file_direct():
 def test_ls():
     fs = pyxet.XetFS()
     assert len(fs.ls(CONSTANTS.TITANIC_MAIN)) == 6
-    assert len(fs.ls(CONSTANTS.TITANIC_MAIN, detail=True)[0]) == 3
+    assert len(fs.ls(CONSTANTS.TITANIC_MAIN, detail=True)[0]) == 5
+    assert "last_modified" in fs.ls(CONSTANTS.TITANIC_MAIN, detail=True)[0]
     assert len(fs.ls(CONSTANTS.TITANIC_MAIN + '/data')) == 2
     print(fs.ls(CONSTANTS.TITANIC_MAIN + '/data'))
 
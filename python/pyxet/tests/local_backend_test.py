@@ -0,0 +1,234 @@
+import json
+import multiprocessing
+import os
+import pickle
+import sys
+import tempfile
+
+import pytest
+
+import pyxet
+from pyxet.local_backend import LOCAL_BACKEND_ROOT_ENV
+from pyxet.sync import SyncCommand
+
+
+@pytest.fixture
+def local_repo(local_backend, local_repo_url):
+    return local_backend, local_repo_url[len("xet://"):-len("/main")]
+
+
+def _commit_messages(repo, branch="main"):
+    user, name = repo.split(":", 1)[1].split("/")
+    with open(os.path.join(os.environ[LOCAL_BACKEND_ROOT_ENV], user, name, "commits", branch + ".jsonl")) as f:
+        return [json.loads(line)["message"] for line in f]
+
+
+def test_local_backend_write_and_read(local_repo):
+    fs, repo = local_repo
+    with fs.transaction as tr:
+        tr.set_commit_message("add files")
+        with fs.open(f"{repo}/main/data/a.txt", "wb") as f:
+            f.write(b"hello\nworld\n")
+        with fs.open(f"{repo}/main/b.txt", "wb") as f:
+            f.write(b"b")
+
+    assert sorted(fs.ls(f"{repo}/main", detail=False)) == [f"{repo}/main/b.txt", f"{repo}/main/data"]
+    assert fs.info(f"{repo}/main/data/a.txt")["size"] == 12
+    assert fs.info(f"{repo}/main")["type"] == "branch"
+    with fs.open(f"{repo}/main/data/a.txt") as f:
+        assert f.readline() == b"hello\n"
+        assert f.read() == b"world\n"
+
+    # changes are not visible until the transaction commits
+    fs.start_transaction("discarded")
+    with fs.open(f"{repo}/main/c.txt", "wb") as f:
+        f.write(b"c")
+    fs.cancel_transaction()
+    assert not fs.exists(f"{repo}/main/c.txt")
+
+
+def test_local_backend_branches(local_repo):
+    fs, repo = local_repo
+    with fs.transaction:
+        with fs.open(f"{repo}/main/a.txt", "wb") as f:
+            f.write(b"a")
+
+    fs.make_branch(repo, "main", "dev")
+    assert sorted(b["name"] for b in fs.list_branches(repo)) == ["dev", "main"]
+
+    with fs.transaction:
+        fs.mv(f"{repo}/dev/a.txt", f"{repo}/dev/moved.txt")
+        fs.cp_file(f"{repo}/main/a.txt", f"{repo}/dev/copied.txt")
+
+    assert sorted(fs.ls(f"{repo}/dev", detail=False)) == [f"{repo}/dev/copied.txt", f"{repo}/dev/moved.txt"]
+    assert fs.ls(f"{repo}/main", detail=False) == [f"{repo}/main/a.txt"]
+    assert "sha" in fs.find_ref(repo, "heads/dev")["object"]
+
+    fs.delete_branch(repo, "dev")
+    assert not fs.branch_exists(f"{repo}/dev")
+
+
+def test_local_backend_sync(local_repo):
+    fs, repo = local_repo
+    local_dir = tempfile.mkdtemp()
+    for p in ["a.txt", "sub/b.txt", "sub/deeper/c.txt"]:
+        path = os.path.join(local_dir, p)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(p)
+
+    cmd = SyncCommand(local_dir, f"xet://{repo}/main", False, "sync", False, False)
+    cmd.validate()
+    stats = cmd.run()
+    assert stats.copied == 3
+    assert fs.cat_file(f"{repo}/main/sub/deeper/c.txt") == b"sub/deeper/c.txt"
+
+    stats = cmd.run()
+    assert stats.copied == 0
+    assert stats.ignored == 3
+
+
+def test_local_backend_cat_and_pipe_many(local_repo):
+    fs, repo = local_repo
+    files = {f"{repo}/main/labels/{i}.json": f'{{"label": {i}}}'.encode() for i in range(50)}
+    with fs.transaction:
+        fs.pipe(files)
+
+    out = fs.cat(sorted(files) + [f"{repo}/main/labels/missing.json"], on_error="omit")
+    assert out == files
+    out = fs.cat([f"{repo}/main/labels/missing.json"], on_error="return")
+    assert isinstance(out[f"{repo}/main/labels/missing.json"], FileNotFoundError)
+    with pytest.raises(FileNotFoundError):
+        fs.cat([f"{repo}/main/labels/missing.json"])
+    assert fs.cat(f"{repo}/main/labels/7.json") == b'{"label": 7}'
+
+    with pytest.raises(RuntimeError):
+        fs.pipe(f"{repo}/main/x.json", b"{}")
+
+
+def test_local_backend_batched_rm(local_repo, monkeypatch):
+    from pyxet import commit_transaction
+    from pyxet.local_backend import LocalWriteTransactionAccessToken
+    fs, repo = local_repo
+    monkeypatch.setattr(commit_transaction, "TRANSACTION_FILE_LIMIT", 4)
+    files = {f"{repo}/main/data/{i}.txt": b"%d" % i for i in range(10)}
+    with fs.transaction as tr:
+        tr.set_commit_message("add")
+        fs.pipe(files)
+
+    closed = []
+    close = LocalWriteTransactionAccessToken.close
+    monkeypatch.setattr(LocalWriteTransactionAccessToken, "close", lambda self: closed.append(self) or close(self))
+    with fs.transaction as tr:
+        tr.set_commit_message("remove")
+        fs.rm(sorted(files)[:9])
+
+    assert fs.ls(f"{repo}/main/data", detail=False) == [f"{repo}/main/data/9.txt"]
+    # deletes are batched like writes, one access token per batch, and each
+    # full batch is committed before the next
+    assert len(closed) == 3
+    assert _commit_messages(repo)[1:] == ["add"] * 3 + ["remove"] * 3
+
+
+def test_local_backend_ranged_cat(local_repo, monkeypatch):
+    fs, repo = local_repo
+    with fs.transaction:
+        fs.pipe(f"{repo}/main/a.txt", b"0123456789")
+
+    expand_path = fs.expand_path
+    calls = []
+
+    def counting_expand_path(*args, **kwargs):
+        calls.append(args)
+        return expand_path(*args, **kwargs)
+
+    # the path is listed once, by the fsspec fallback
+    monkeypatch.setattr(fs, "expand_path", counting_expand_path)
+    assert fs.cat([f"{repo}/main/a.txt"], start=2, end=5) == {f"{repo}/main/a.txt": b"234"}
+    assert len(calls) == 1
+
+
+def test_local_backend_get_and_put(local_repo, tmp_path):
+    fs, repo = local_repo
+    src = tmp_path / "src"
+    for rel in ["a.txt", "sub/b.txt", "sub/deeper/c.txt"]:
+        (src / rel).parent.mkdir(parents=True, exist_ok=True)
+        (src / rel).write_bytes(rel.encode())
+
+    with pytest.raises(RuntimeError):
+        fs.put(str(src), f"{repo}/main/data", recursive=True)
+
+    with fs.transaction:
+        fs.put(str(src), f"{repo}/main/data", recursive=True)
+        fs.put(str(src / "a.txt"), f"{repo}/main/single.txt")
+    assert sorted(fs.find(f"{repo}/main/data")) == sorted(
+        f"{repo}/main/data/{rel}" for rel in ["a.txt", "sub/b.txt", "sub/deeper/c.txt"])
+    assert fs.cat(f"{repo}/main/single.txt") == b"a.txt"
+
+    fs.get(f"{repo}/main/data", str(tmp_path / "out"), recursive=True)
+    assert (tmp_path / "out" / "sub" / "deeper" / "c.txt").read_bytes() == b"sub/deeper/c.txt"
+
+    # into an existing directory, the source directory keeps its name
+    fs.get(f"{repo}/main/data/sub", str(tmp_path / "out"), recursive=True)
+    assert (tmp_path / "out" / "sub" / "b.txt").read_bytes() == b"sub/b.txt"
+
+    fs.get(f"{repo}/main/single.txt", str(tmp_path / "out") + "/")
+    assert (tmp_path / "out" / "single.txt").read_bytes() == b"a.txt"
+
+
+def _read_pickled(payload):
+    with pickle.loads(payload) as f:
+        return f.read()
+
+
+def test_local_backend_pickling(local_repo):
+    fs, repo = local_repo
+    with fs.transaction:
+        with fs.open(f"{repo}/main/a.txt", "wb") as f:
+            f.write(b"hello world")
+
+    assert pickle.loads(pickle.dumps(fs)).endpoint == fs.endpoint
+
+    with fs.open(f"{repo}/main/a.txt") as f:
+        f.read(6)
+        payload = pickle.dumps(f)
+    assert len(payload) < 512
+    assert _read_pickled(payload) == b"world"
+
+    fs.start_transaction("writing")
+    with fs.open(f"{repo}/main/b.txt", "wb") as f:
+        with pytest.raises(TypeError):
+            pickle.dumps(f)
+    fs.cancel_transaction()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="requires fork")
+def test_local_backend_forked_workers(local_repo):
+    fs, repo = local_repo
+    with fs.transaction:
+        for i in range(4):
+            with fs.open(f"{repo}/main/{i}.txt", "wb") as f:
+                f.write(str(i).encode())
+
+    # Use the repo manager in the parent before forking.
+    assert fs.cat(f"{repo}/main/0.txt") == b"0"
+    with fs.open(f"{repo}/main/3.txt") as f:
+        payloads = [pickle.dumps(f)]
+
+    with multiprocessing.get_context("fork").Pool(2) as pool:
+        assert pool.map(fs.cat, [f"{repo}/main/{i}.txt" for i in range(4)]) == [b"0", b"1", b"2", b"3"]
+        assert pool.map(_read_pickled, payloads) == [b"3"]
+
+
+def _check_runtime():
+    from pyxet.rpyxet import rpyxet
+    return rpyxet.check_runtime()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="requires fork")
+def test_bindings_runtime_after_fork():
+    pytest.importorskip("pyxet.rpyxet.rpyxet")
+    # Start the runtime in the parent, so the child inherits it.
+    assert _check_runtime()
+    with multiprocessing.get_context("fork").Pool(1) as pool:
+        assert pool.apply_async(_check_runtime).get(timeout=60)
@@ -0,0 +1,96 @@
+import os
+import tempfile
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import pyxet
+import pyxet.parquet
+from pyxet.local_backend import LOCAL_BACKEND_ROOT_ENV
+from pyxet.parquet import (FooterCache, XetParquetFile, _file_version, coalesce_ranges, plan_ranges,
+                           read_metadata)
+from pyxet.url_parsing import parse_url
+
+os.environ.setdefault(LOCAL_BACKEND_ROOT_ENV, tempfile.mkdtemp())
+
+
+@pytest.fixture
+def parquet_url():
+    fs = pyxet.XetFS("localhost-fs")
+    user = fs.get_username()
+    name = f"repo_{os.urandom(4).hex()}"
+    fs.make_repo(f"xet://localhost-fs:{user}/{name}")
+    url = f"xet://localhost-fs:{user}/{name}/main/t.parquet"
+    table = pa.table({"a": list(range(1000)), "b": [str(i) for i in range(1000)], "c": [1.5] * 1000})
+    with fs.transaction:
+        with fs.open(url, "wb") as f:
+            pq.write_table(table, f, row_group_size=100)
+    return fs, url, table
+
+
+def test_coalesce_ranges():
+    assert coalesce_ranges([(0, 10), (15, 10), (100, 10)], gap=5) == [(0, 25), (100, 10)]
+    assert coalesce_ranges([(0, 10), (5, 2)], gap=0) == [(0, 10)]
+    assert coalesce_ranges([(0, 10), (10, 10)], gap=0, max_size=15) == [(0, 10), (10, 10)]
+
+
+def test_read_with_projection(parquet_url):
+    fs, url, table = parquet_url
+    with XetParquetFile(url, fs) as pf:
+        assert pf.metadata.num_row_groups == 10
+        ranges = plan_ranges(pf.metadata, columns=["b"], row_groups=[2, 3])
+        assert len(ranges) == 2
+        result = pf.read(columns=["b"], row_groups=[2, 3])
+        assert result.column("b").to_pylist() == table.column("b").to_pylist()[200:400]
+        assert pf.read(row_groups=lambda rg: False).num_rows == 0
+        assert pf.read().equals(table)
+
+
+def test_footer_cache(parquet_url):
+    fs, url, table = parquet_url
+    cache = FooterCache()
+    md = XetParquetFile(url, fs, footer_cache=cache).metadata
+    assert len(cache) == 1
+    assert XetParquetFile(url, fs, footer_cache=cache).metadata is md
+    assert read_metadata(url).num_rows == 1000
+
+    # a new commit changes the version of the file
+    with fs.transaction:
+        with fs.open(url, "wb") as f:
+            pq.write_table(table.slice(0, 10), f)
+    assert XetParquetFile(url, fs, footer_cache=cache).metadata.num_rows == 10
+    assert len(cache) == 2
+
+
+def test_footer_cache_commit_during_read(parquet_url, monkeypatch):
+    fs, url, table = parquet_url
+    cache = FooterCache()
+    read_footer = pyxet.parquet._read_footer
+
+    def commit_then_read(handle, size):
+        with fs.transaction:
+            with fs.open(url, "wb") as f:
+                pq.write_table(table.slice(0, 10), f)
+        return read_footer(handle, size)
+
+    # the footer read may be of either commit, so it is not cached under the old one
+    monkeypatch.setattr(pyxet.parquet, "_read_footer", commit_then_read)
+    XetParquetFile(url, fs, footer_cache=cache)
+    assert len(cache) == 0
+
+    monkeypatch.setattr(pyxet.parquet, "_read_footer", read_footer)
+    assert XetParquetFile(url, fs, footer_cache=cache).metadata.num_rows == 10
+    assert len(cache) == 1
+
+
+def test_file_version_of_refs(parquet_url):
+    fs, url, _ = parquet_url
+    commit = "0123456789abcdef0123456789abcdef01234567"
+    pinned = parse_url(url.replace("/main/", f"/{commit}/"), fs.endpoint)
+    assert _file_version(fs, pinned, {}) == commit
+    tagged = parse_url(url.replace("/main/", "/v1.0/"), fs.endpoint)
+    assert _file_version(fs, tagged, {}) is None
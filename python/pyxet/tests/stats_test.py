@@ -0,0 +1,111 @@
+import time
+
+import pytest
+
+import pyxet
+from pyxet.stats import prometheus_text
+from utils import CONSTANTS
+
+
+def test_stats_records_reads():
+    pyxet.reset_stats()
+    with pyxet.open(CONSTANTS.TITANIC_CSV) as f:
+        data = f.readall()
+
+    stats = pyxet.stats()
+    assert stats['open_for_read']['count'] == 1
+    assert stats['read']['count'] >= 1
+    assert stats['read']['bytes'] == len(data)
+    assert sum(c for _, c in stats['read']['latency_buckets']) == stats['read']['count']
+
+    pyxet.reset_stats()
+    assert pyxet.stats()['read']['count'] == 0
+
+
+def test_prometheus_text():
+    snapshot = {'read': {'count': 3, 'errors': 1, 'bytes': 300, 'total_seconds': 0.5,
+                         'latency_buckets': [(0.1, 1), (1.0, 2), (float('inf'), 0)]}}
+    text = prometheus_text(snapshot)
+    assert 'pyxet_operations_total{op="read"} 3' in text
+    assert 'pyxet_operation_errors_total{op="read"} 1' in text
+    assert 'pyxet_operation_bytes_total{op="read"} 300' in text
+    assert 'pyxet_operation_duration_seconds_bucket{op="read",le="0.1"} 1' in text
+    assert 'pyxet_operation_duration_seconds_bucket{op="read",le="1.0"} 3' in text
+    assert 'pyxet_operation_duration_seconds_bucket{op="read",le="+Inf"} 3' in text
+    assert 'pyxet_operation_duration_seconds_count{op="read"} 3' in text
+
+
+def test_progress_callback():
+    import threading
+    updates = []
+    called = threading.Event()
+
+    def on_progress(p):
+        updates.append(p)
+        called.set()
+
+    pyxet.set_progress_callback(on_progress, 0.05)
+    try:
+        with pyxet.open(CONSTANTS.TITANIC_CSV) as f:
+            f.readall()
+        assert called.wait(5)
+    finally:
+        pyxet.set_progress_callback(None)
+
+    p = updates[-1]
+    assert p['bytes_read'] > 0
+    assert p['in_flight'] >= 0
+    assert p['seconds_since_progress'] >= 0
+
+
+def test_progress_callback_registers_atexit_on_first_use(monkeypatch):
+    import atexit
+    import sys
+    # pyxet.stats is the re-exported function; the module is only in sys.modules
+    stats = sys.modules["pyxet.stats"]
+
+    calls = []
+    registered = []
+
+    class Bindings:
+        @staticmethod
+        def set_progress_callback(fn, interval):
+            calls.append(fn)
+
+    monkeypatch.setattr(stats, "rpyxet", Bindings, raising=False)
+    monkeypatch.setattr(stats, "_progress_atexit_registered", False)
+    monkeypatch.setattr(atexit, "register", registered.append)
+
+    stats.set_progress_callback(None)
+    assert registered == []
+    stats.set_progress_callback(print)
+    stats.set_progress_callback(print, 2.0)
+    assert registered == [stats._clear_progress_callback]
+
+    stats._clear_progress_callback()
+    assert calls == [None, print, print, None]
+
+
+def _wait_for(updates, pred, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if updates and pred(updates[-1]):
+            return updates[-1]
+        time.sleep(0.01)
+    raise AssertionError(f"no progress update matched; last was {updates[-1] if updates else None}")
+
+
+def test_progress_totals_cover_reporters_in_progress():
+    rpyxet = pytest.importorskip("pyxet.rpyxet.rpyxet")
+    updates = []
+    pyxet.set_progress_callback(updates.append, 0.02)
+    try:
+        reporter = rpyxet.PyProgressReporter("progress test", 2, 100)
+        reporter.register_progress(1, 50)
+        _wait_for(updates, lambda p: (p['files_total'], p['files_completed'], p['bytes_completed']) == (2, 1, 50))
+
+        # a finished reporter no longer counts towards the totals
+        reporter.finalize()
+        _wait_for(updates, lambda p: (p['files_total'], p['bytes_total'], p['bytes_completed']) == (0, 0, 0))
+    finally:
+        pyxet.set_progress_callback(None)
@@ -1,4 +1,7 @@
 import os
+import sys
+
+import pytest
 
 import pyxet
 from pyxet.sync import _get_normalized_fs_protocol_and_path, SyncCommand
@@ -56,6 +59,83 @@ def test_sync_command_validate_local():
     check_sync_validate('.', f'xet://{CONSTANTS.TESTING_SYNCREPO}/main/foo*', False)
 
 
+def test_sync_command_validate_download(tmp_path):
+    pyxet.login(CONSTANTS.TESTING_USERNAME, CONSTANTS.TESTING_TOKEN, email="a@a.com")
+
+    check_sync_validate(CONSTANTS.TITANIC_MAIN, str(tmp_path), True)
+    check_sync_validate(CONSTANTS.TITANIC_MAIN, str(tmp_path / "new-dir"), True)
+    check_sync_validate(CONSTANTS.TITANIC_MAIN, f'xet://{CONSTANTS.TESTING_SYNCREPO}/main', False)
+
+
+def test_sync_command_download(tmp_path):
+    # TODO: fix for windows paths
+    import sys
+    if sys.platform.startswith('win'):
+        return
+
+    pyxet.login(CONSTANTS.TESTING_USERNAME, CONSTANTS.TESTING_TOKEN, email="a@a.com")
+    dest = tmp_path / "titanic"
+
+    cmd = SyncCommand(CONSTANTS.TITANIC_MAIN, str(dest), False, '', False, False)
+    cmd.validate()
+    stats = cmd.run()
+    assert stats.copied > 0
+    assert stats.failed == 0
+    assert (dest / "titanic.csv").exists()
+    assert (dest / "data" / "titanic_0.parquet").exists()
+    copied = stats.copied
+
+    # no files should be copied
+    stats = cmd.run()
+    assert stats.copied == 0
+    assert stats.ignored == copied
+
+    # local extras are only removed with delete
+    (dest / "extra.txt").write_text("extra")
+    cmd.run()
+    assert (dest / "extra.txt").exists()
+
+    cmd = SyncCommand(CONSTANTS.TITANIC_MAIN, str(dest), False, '', False, False, delete=True)
+    cmd.validate()
+    stats = cmd.run()
+    assert stats.copied == 0
+    assert not (dest / "extra.txt").exists()
+
+
+@pytest.mark.skipif(sys.platform.startswith('win'), reason="local paths are compared as posix paths")
+@pytest.mark.parametrize("streaming", [False, True])
+def test_sync_command_download_local_backend(tmp_path, local_backend, local_repo_url, streaming):
+    files = {"a.txt": b"a", "data/b.bin": b"b" * 100, "data/deeper/c.txt": b"c"}
+    with local_backend.transaction:
+        local_backend.pipe({f"{local_repo_url}/{rel}": data for rel, data in files.items()})
+    dest = tmp_path / "download"
+
+    def sync(delete=False, dryrun=False):
+        cmd = SyncCommand(local_repo_url, str(dest), False, '', dryrun, False, streaming=streaming, delete=delete)
+        cmd.validate()
+        return cmd.run()
+
+    stats = sync()
+    assert (stats.copied, stats.failed) == (3, 0)
+    assert {rel: (dest / rel).read_bytes() for rel in files} == files
+
+    # no files should be copied
+    stats = sync()
+    assert (stats.copied, stats.ignored) == (0, 3)
+
+    # local extras are only removed with delete, and not on a dry run
+    (dest / "extra.txt").write_text("extra")
+    (dest / "data" / "deeper" / "extra.txt").write_text("extra")
+    assert sync().deleted == 0
+    assert sync(delete=True, dryrun=True).deleted == 2
+    assert (dest / "extra.txt").exists()
+
+    stats = sync(delete=True)
+    assert (stats.copied, stats.deleted) == (0, 2)
+    assert not (dest / "extra.txt").exists()
+    assert not (dest / "data" / "deeper" / "extra.txt").exists()
+    assert (dest / "data" / "deeper" / "c.txt").read_bytes() == b"c"
+
 @require_s3_creds()
 def test_sync_command_validate_s3():
     pyxet.login(CONSTANTS.TESTING_USERNAME, CONSTANTS.TESTING_TOKEN, email="a@a.com")
@@ -104,3 +184,469 @@ def test_sync_command_s3():
     assert stats.failed == 0
 
     fs.delete_branch(CONSTANTS.TESTING_SYNCREPO, branch)
+
+
+def test_sync_manifest(tmp_path):
+    from pyxet.sync_manifest import SyncManifest
+
+    path = str(tmp_path / "manifest.db")
+    manifest = SyncManifest(path, "file:///src", "xet://user/repo/main")
+    assert manifest.is_empty()
+
+    manifest.record("a.txt", (10, 1.5, None))
+    manifest.record("dir/b.txt", (20, 2.5, '"etag"'))
+    # nothing is visible until commit
+    assert manifest.is_empty()
+    manifest.commit()
+
+    assert not manifest.is_empty()
+    assert manifest.is_unchanged("a.txt", (10, 1.5, None))
+    assert not manifest.is_unchanged("a.txt", (11, 1.5, None))
+    assert manifest.is_unchanged("dir/b.txt", (20, 2.5, '"etag"'))
+    assert not manifest.is_unchanged("c.txt", (10, 1.5, None))
+
+    # entries are keyed by source and destination
+    other = SyncManifest(path, "file:///other", "xet://user/repo/main")
+    assert other.is_empty()
+
+    manifest.remove("a.txt")
+    manifest.commit()
+    assert manifest.get("a.txt") is None
+
+    manifest.clear()
+    manifest.record("c.txt", (1, 1.0, None))
+    manifest.commit()
+    assert manifest.get("dir/b.txt") is None
+    assert manifest.get("c.txt") == (1, 1.0, None)
+
+
+def test_sync_manifest_bulk_reads_and_staged_writes(tmp_path, monkeypatch):
+    from pyxet import sync_manifest
+    from pyxet.sync_manifest import SyncManifest
+
+    monkeypatch.setattr(sync_manifest, "MANIFEST_FLUSH_SIZE", 3)
+    manifest = SyncManifest(str(tmp_path / "manifest.db"), "file:///src", "xet://user/repo/main")
+    paths = [f"f{i:02d}" for i in range(10)]
+    for i, p in enumerate(reversed(paths)):
+        manifest.record(p, (i, 1.0, None))
+    # staged records are not visible until commit, and are dropped by discard
+    assert manifest.is_empty()
+    manifest.discard()
+    manifest.commit()
+    assert manifest.is_empty()
+
+    for i, p in enumerate(paths):
+        manifest.record(p, (i, 1.0, None))
+    manifest.remove("f03")
+    manifest.commit()
+    expected = {p: (i, 1.0, None) for i, p in enumerate(paths) if p != "f03"}
+    assert manifest.entries() == expected
+    assert list(manifest.sorted_entries(batch_size=4)) == sorted(expected.items())
+    assert list(manifest.sorted_entries(batch_size=3)) == sorted(expected.items())
+
+
+def _repo_files(fs, url):
+    return {p.split("/main/", 1)[1]: fs.cat(p) for p in fs.find(url)
+            if not p.endswith(".gitattributes")}
+
+
+@pytest.mark.parametrize("delete", [False, True])
+def test_sync_streaming_matches_listing(tmp_path, local_backend, delete):
+    from pyxet.local_backend import LOCAL_BACKEND_ENDPOINT
+
+    src = tmp_path / "src"
+
+    def write(rel, text):
+        (src / rel).parent.mkdir(parents=True, exist_ok=True)
+        (src / rel).write_text(text)
+        os.utime(src / rel, (1e9, 1e9))
+
+    # 'a.txt' sorts before the contents of 'a/', which sort before 'a0.txt'
+    for rel in ["a.txt", "a/b.txt", "a/c/d.txt", "z.txt"]:
+        write(rel, rel)
+
+    results = {}
+    for streaming in [False, True]:
+        repo = f"{LOCAL_BACKEND_ENDPOINT}:{local_backend.get_username()}/streaming_{streaming}"
+        local_backend.make_repo(f"xet://{repo}")
+        url = f"xet://{repo}/main"
+        assert SyncCommand(str(src), url, use_mtime=False, message="sync", dryrun=False,
+                           update_size=False, streaming=streaming).run().copied == 4
+        with local_backend.transaction:
+            local_backend.pipe({f"{url}/a/0.txt": b"dest only", f"{url}/b.txt": b"dest only"})
+        results[streaming] = url
+
+    write("a/b.txt", "a/b.txt changed")
+    write("a0.txt", "added")
+    write("a/c/e.txt", "added")
+
+    for streaming, url in results.items():
+        stats = SyncCommand(str(src), url, use_mtime=False, message="sync", dryrun=False,
+                            update_size=False, streaming=streaming, delete=delete).run()
+        assert (stats.copied, stats.ignored, stats.failed, stats.deleted) == (3, 3, 0, 2 if delete else 0)
+
+    expected = {rel: (src / rel).read_bytes()
+                for rel in ["a.txt", "a/b.txt", "a/c/d.txt", "a/c/e.txt", "a0.txt", "z.txt"]}
+    if not delete:
+        expected.update({"a/0.txt": b"dest only", "b.txt": b"dest only"})
+    assert _repo_files(local_backend, results[False]) == expected
+    assert _repo_files(local_backend, results[True]) == expected
+
+
+def test_sorted_walk(tmp_path):
+    import fsspec
+    from pyxet.sync import _sorted_walk
+
+    for p in ["a-c", "a/b", "a/z/y", "a0", "b/c", "B"]:
+        f = tmp_path / p
+        f.parent.mkdir(parents=True, exist_ok=True)
+        f.write_text(p)
+
+    fs = fsspec.filesystem("file")
+    relpaths = [relpath for relpath, _, _ in _sorted_walk(fs, str(tmp_path))]
+    assert relpaths == sorted(relpaths)
+    assert relpaths == ["B", "a-c", "a/b", "a/z/y", "a0", "b/c"]
+
+    assert list(_sorted_walk(fs, str(tmp_path / "does-not-exist"))) == []
+
+
+def test_sync_command_delete(tmp_path):
+    # TODO: fix for windows paths
+    import sys
+    if sys.platform.startswith('win'):
+        return
+
+    pyxet.login(CONSTANTS.TESTING_USERNAME, CONSTANTS.TESTING_TOKEN, email="a@a.com")
+    fs = pyxet.XetFS()
+    branch = get_rand_name('sync_test_delete')
+    fs.make_branch(CONSTANTS.TESTING_SYNCREPO, 'main', branch)
+    dest_path = f'{CONSTANTS.TESTING_SYNCREPO}/{branch}'
+
+    try:
+        (tmp_path / "a.txt").write_text("a")
+        (tmp_path / "b.txt").write_text("bb")
+
+        cmd = SyncCommand(str(tmp_path), f'xet://{dest_path}', False, 'test sync', False, False, delete=True)
+        cmd.validate()
+        stats = cmd.run()
+        assert stats.copied == 2
+        assert stats.deleted == 0
+
+        os.remove(tmp_path / "b.txt")
+        stats = cmd.run()
+        assert stats.copied == 0
+        assert stats.ignored == 1
+        assert stats.deleted == 1
+
+        files = fs.find(dest_path, detail=True)
+        assert files.get(f'{dest_path}/a.txt')
+        assert not files.get(f'{dest_path}/b.txt')
+        assert files.get(f'{dest_path}/.gitattributes')
+    finally:
+        fs.delete_branch(CONSTANTS.TESTING_SYNCREPO, branch)
+
+
+def test_polling_watcher(tmp_path):
+    from pyxet.sync_watch import PollingWatcher
+
+    (tmp_path / "a").write_text("a")
+    (tmp_path / "b").write_text("b")
+    watcher = PollingWatcher(str(tmp_path), interval=0)
+    assert not watcher.poll(0)
+
+    (tmp_path / "a").write_text("aa")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "c").write_text("c")
+    os.remove(tmp_path / "b")
+
+    changes = watcher.poll(0)
+    assert changes.changed == {str(tmp_path / "a"), str(tmp_path / "sub" / "c")}
+    assert changes.deleted == {str(tmp_path / "b")}
+    assert not watcher.poll(0)
+
+
+def test_polling_watcher_timeout(tmp_path):
+    import time
+    from pyxet.sync_watch import PollingWatcher
+
+    watcher = PollingWatcher(str(tmp_path), interval=60)
+    (tmp_path / "a").write_text("a")
+    start = time.monotonic()
+    # returns after the timeout, before the next scan is due
+    assert not watcher.poll(0.1)
+    assert time.monotonic() - start < 10
+
+
+def test_sync_manifest_discarded_on_failure(tmp_path, local_repo_url, monkeypatch):
+    from pyxet.sync_manifest import SyncManifest
+
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.txt").write_text("a")
+    manifest = str(tmp_path / "manifest.db")
+
+    cmd = SyncCommand(str(src), local_repo_url, use_mtime=False, message="sync", dryrun=False,
+                      update_size=False, manifest=manifest)
+    cmd.validate()
+
+    def fail():
+        raise RuntimeError("commit failed")
+
+    with monkeypatch.context() as m:
+        m.setattr(cmd._dest_fs, "end_transaction", fail)
+        with pytest.raises(RuntimeError):
+            cmd.run()
+    assert not cmd._dest_fs.intrans
+    assert SyncManifest(manifest, cmd._manifest._source, cmd._manifest._destination).is_empty()
+
+    # the next run copies the file again rather than trusting the manifest
+    assert cmd.run().copied == 1
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_sync_manifest_skips_unchanged(tmp_path, local_backend, local_repo_url, monkeypatch, streaming):
+    from pyxet import sync_manifest
+
+    src = tmp_path / "src"
+    for rel in ["a.txt", "a/b.txt", "a/c/d.txt", "e.txt"]:
+        (src / rel).parent.mkdir(parents=True, exist_ok=True)
+        (src / rel).write_text(rel)
+    manifest = str(tmp_path / "manifest.db")
+    # small batches exercise the chunked reads and writes of the manifest
+    monkeypatch.setattr(sync_manifest, "MANIFEST_FLUSH_SIZE", 2)
+    monkeypatch.setattr(sync_manifest, "MANIFEST_READ_BATCH", 2)
+
+    def sync():
+        return SyncCommand(str(src), local_repo_url, use_mtime=False, message="sync", dryrun=False,
+                           update_size=False, manifest=manifest, streaming=streaming).run()
+
+    assert sync().copied == 4
+
+    # the destination is neither listed nor queried for unchanged entries
+    calls = []
+    for name in ["find", "ls", "info"]:
+        monkeypatch.setattr(type(local_backend), name, _recording(calls, name, getattr(type(local_backend), name)))
+    stats = sync()
+    assert (stats.copied, stats.ignored) == (0, 4)
+    assert calls == []
+
+    (src / "a" / "b.txt").write_text("changed content")
+    (src / "f.txt").write_text("new")
+    stats = sync()
+    assert (stats.copied, stats.ignored) == (2, 3)
+    assert local_backend.cat(f"{local_repo_url}/a/b.txt") == b"changed content"
+
+
+def _recording(calls, name, fn):
+    def wrapper(self, path, *args, **kwargs):
+        if '/repo_' in str(path):
+            calls.append((name, path))
+        return fn(self, path, *args, **kwargs)
+    return wrapper
+
+
+def test_checksum_comparator_falls_back_to_mtime():
+    from datetime import datetime, timezone
+    from pyxet.sync import ChecksumSyncComparator
+
+    cmp = ChecksumSyncComparator('s3', 'xet')
+    dest = {'size': 10, 'last_modified': '2023-06-01T00:00:00Z', 'content_hash': 'abc'}
+    older = {'size': 10, 'LastModified': datetime(2023, 1, 1, tzinfo=timezone.utc)}
+    newer = {'size': 10, 'LastModified': datetime(2023, 12, 1, tzinfo=timezone.utc)}
+    # s3 entries have no content hash, so unchanged ones are not recopied
+    assert not cmp.should_sync(older, dest)
+    assert cmp.should_sync(newer, dest)
+    assert cmp.should_sync({'size': 11, 'LastModified': older['LastModified']}, dest)
+
+
+def test_checksum_sync_warns_without_content_hash(tmp_path, local_repo_url, capsys):
+    src = tmp_path / "src"
+    src.mkdir()
+    for name in ["a.txt", "b.txt"]:
+        (src / name).write_text(name)
+        os.utime(src / name, (1e9, 1e9))
+    assert SyncCommand(str(src), local_repo_url, use_mtime=False, message="sync", dryrun=False,
+                       update_size=False, checksum=True).run().copied == 2
+    capsys.readouterr()
+
+    # localhost-fs entries have no content hash, so the files are compared by
+    # size and mtime and the fallback is reported once
+    (src / "b.txt").write_text("b.txt changed")
+    stats = SyncCommand(str(src), local_repo_url, use_mtime=False, message="sync", dryrun=False,
+                        update_size=False, checksum=True).run()
+    assert (stats.copied, stats.ignored) == (1, 1)
+    assert capsys.readouterr().out.count("has no content hash") == 1
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="inotify is only available on Linux")
+def test_inotify_watcher(tmp_path):
+    from pyxet.sync_watch import InotifyWatcher
+
+    (tmp_path / "a").write_text("a")
+    watcher = InotifyWatcher(str(tmp_path))
+    try:
+        assert not watcher.poll(0)
+
+        (tmp_path / "a").write_text("aa")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "b").write_text("b")
+        changes = watcher.poll(1)
+        # a new directory is watched and its files are reported
+        (tmp_path / "sub" / "c").write_text("c")
+        changes_after = watcher.poll(1)
+        assert str(tmp_path / "a") in changes.changed
+        assert str(tmp_path / "sub" / "c") in changes.changed | changes_after.changed
+
+        os.remove(tmp_path / "a")
+        os.remove(tmp_path / "sub" / "b")
+        os.remove(tmp_path / "sub" / "c")
+        os.rmdir(tmp_path / "sub")
+        changes = watcher.poll(1)
+        assert changes.deleted == {str(tmp_path / "a"), str(tmp_path / "sub" / "b"), str(tmp_path / "sub" / "c")}
+        assert changes.deleted_dirs == {str(tmp_path / "sub")}
+    finally:
+        watcher.close()
+
+
+class _ScriptedWatcher:
+    """
+    Reports a fixed list of changed files per poll, then stops the watch.
+    """
+
+    def __init__(self, polls, stop_event):
+        self._polls = list(polls)
+        self._stop_event = stop_event
+
+    def poll(self, timeout):
+        from pyxet.sync_watch import WatchChanges
+        changes = WatchChanges()
+        if self._polls:
+            changes.changed.update(self._polls.pop(0))
+        else:
+            self._stop_event.set()
+        return changes
+
+    def close(self):
+        pass
+
+
+def _watch_sync(tmp_path, url, polls, monkeypatch, **kwargs):
+    """
+    Runs a WatchSync from tmp_path/src to url over the scripted polls, returning
+    the sizes of the committed batches.
+    """
+    import threading
+    from pyxet.sync_watch import WatchSync
+
+    src = tmp_path / "src"
+    src.mkdir(exist_ok=True)
+    cmd = SyncCommand(str(src), url, use_mtime=False, message="watch", dryrun=False, update_size=False)
+    watch = WatchSync(cmd, **kwargs)
+    watch.validate()
+
+    stop_event = threading.Event()
+    batches = []
+    commit_batch = watch._commit_batch
+
+    def record_batch(changes):
+        batches.append(len(changes.changed))
+        commit_batch(changes)
+
+    monkeypatch.setattr(watch, "_make_watcher", lambda: _ScriptedWatcher(polls, stop_event))
+    monkeypatch.setattr(watch, "_commit_batch", record_batch)
+    watch.run(stop_event)
+    return batches
+
+
+def test_watch_sync_batches(tmp_path, local_repo_url, monkeypatch):
+    paths = [str(tmp_path / "src" / f"f{i}") for i in range(6)]
+
+    # with no debounce every poll is committed on its own
+    assert _watch_sync(tmp_path, local_repo_url, [paths[:2], paths[2:5]], monkeypatch, debounce=0) == [2, 3]
+
+    # otherwise changes accumulate until the watch stops
+    assert _watch_sync(tmp_path, local_repo_url, [paths[:2], paths[2:5], paths[4:]], monkeypatch,
+                       debounce=1000) == [6]
+
+    # a batch reaching max_batch_files is committed without waiting for the debounce
+    assert _watch_sync(tmp_path, local_repo_url, [paths[:2], paths[2:5], paths[5:]], monkeypatch,
+                       debounce=1000, max_batch_files=4) == [5, 1]
+
+
+def test_watch_sync_batch_cap():
+    from pyxet.commit_transaction import TRANSACTION_FILE_LIMIT
+    from pyxet.sync_watch import WATCH_MAX_BATCH_FILES
+
+    # a default batch lands as one commit
+    assert WATCH_MAX_BATCH_FILES <= TRANSACTION_FILE_LIMIT
+
+
+def test_watch_sync_commit_batch(tmp_path, local_backend, local_repo_url, monkeypatch):
+    import pyxet.sync_watch
+    from pyxet.sync_manifest import SyncManifest
+    from pyxet.sync_watch import WatchChanges, WatchSync
+
+    src = tmp_path / "src"
+    src.mkdir()
+    manifest = str(tmp_path / "manifest.db")
+    cmd = SyncCommand(str(src), local_repo_url, use_mtime=False, message="watch", dryrun=False,
+                      update_size=False, manifest=manifest, delete=True)
+    watch = WatchSync(cmd)
+
+    (src / "a.txt").write_text("a")
+    (src / "b.txt").write_text("b")
+    changes = WatchChanges()
+    changes.changed = {str(src / "a.txt"), str(src / "b.txt")}
+    watch._commit_batch(changes)
+    assert local_backend.cat(f"{local_repo_url}/a.txt") == b"a"
+    recorded = SyncManifest(manifest, cmd._manifest._source, cmd._manifest._destination)
+    assert recorded.get("a.txt") is not None and recorded.get("b.txt") is not None
+
+    os.remove(src / "b.txt")
+    changes = WatchChanges()
+    changes.deleted = {str(src / "b.txt")}
+    watch._commit_batch(changes)
+    assert not local_backend.exists(f"{local_repo_url}/b.txt")
+    assert recorded.get("b.txt") is None
+
+    (src / "sub").mkdir()
+    (src / "sub" / "c.txt").write_text("c")
+    changes = WatchChanges()
+    changes.changed = {str(src / "sub" / "c.txt")}
+    watch._commit_batch(changes)
+    assert recorded.get("sub/c.txt") is not None
+    os.remove(src / "sub" / "c.txt")
+    os.rmdir(src / "sub")
+    changes = WatchChanges()
+    changes.deleted_dirs = {str(src / "sub")}
+    watch._commit_batch(changes)
+    assert not local_backend.exists(f"{local_repo_url}/sub/c.txt")
+    assert recorded.get("sub/c.txt") is None
+
+    # an interrupted batch is not committed, even in part, and not recorded in the manifest
+    copy = pyxet.sync_watch._single_file_copy_impl
+
+    def copy_or_interrupt(cp, src_fs, dest_fs):
+        if cp.src_path.endswith("e.txt"):
+            raise KeyboardInterrupt()
+        copy(cp, src_fs, dest_fs)
+
+    monkeypatch.setattr(pyxet.sync_watch, "_single_file_copy_impl", copy_or_interrupt)
+    (src / "d.txt").write_text("d")
+    (src / "e.txt").write_text("e")
+    changes = WatchChanges()
+    changes.changed = {str(src / "d.txt"), str(src / "e.txt")}
+    with pytest.raises(KeyboardInterrupt):
+        watch._commit_batch(changes)
+    assert not local_backend.intrans
+    assert not local_backend.exists(f"{local_repo_url}/d.txt")
+    assert recorded.get("d.txt") is None
+
+
+def test_watch_sync_rejects_dryrun(tmp_path, local_repo_url):
+    from pyxet.sync_watch import WatchSync
+
+    cmd = SyncCommand(str(tmp_path), local_repo_url, use_mtime=False, message="watch", dryrun=True,
+                      update_size=False)
+    with pytest.raises(ValueError):
+        WatchSync(cmd).validate()
@@ -0,0 +1,55 @@
+import os
+import tempfile
+
+import pytest
+
+pytest.importorskip("torch")
+
+import pyxet
+from pyxet.local_backend import LOCAL_BACKEND_ROOT_ENV
+from pyxet.torch import XetDataset, XetIterableDataset
+
+os.environ.setdefault(LOCAL_BACKEND_ROOT_ENV, tempfile.mkdtemp())
+
+
+@pytest.fixture
+def local_files():
+    fs = pyxet.XetFS("localhost-fs")
+    user = fs.get_username()
+    name = f"repo_{os.urandom(4).hex()}"
+    fs.make_repo(f"xet://localhost-fs:{user}/{name}")
+    repo = f"localhost-fs:{user}/{name}"
+    with fs.transaction:
+        fs.pipe({f"{repo}/main/data/{i:02}.bin": bytes([i]) * (i + 1) for i in range(20)})
+        fs.pipe_file(f"{repo}/main/README.md", b"readme")
+    return f"xet://{repo}/main"
+
+
+def test_iterable_dataset_shards(local_files):
+    shards = [XetIterableDataset(f"{local_files}/data/*.bin", rank=rank, world_size=3, read_ahead=4)
+              for rank in range(3)]
+    items = [item for ds in shards for item in ds]
+    assert len(items) == 20
+    assert sorted(data for _, data in items) == sorted(bytes([i]) * (i + 1) for i in range(20))
+
+
+def test_iterable_dataset_shuffle(local_files):
+    ds = XetIterableDataset(f"{local_files}/data", transform=lambda path, data: data[0],
+                            shuffle_buffer=5, seed=1)
+    first = list(ds)
+    assert sorted(first) == list(range(20))
+    assert first != list(range(20))
+    assert list(ds) == first
+    ds.set_epoch(1)
+    assert list(ds) != first
+
+
+def test_map_dataset_cache(local_files):
+    ds = XetDataset(f"{local_files}/data/*.bin", cache_size=40)
+    assert len(ds) == 20
+    path, data = ds[3]
+    assert path.endswith("03.bin") and data == bytes([3]) * 4
+    ds[19]
+    ds[18]
+    assert ds._cached_bytes <= 40
+    assert ds[19][1] == bytes([19]) * 20
@@ -0,0 +1,36 @@
+import json
+
+from pyxet.tracing import span, is_tracing, start_tracing, stop_tracing
+
+
+def test_span_noop_when_not_tracing():
+    assert not is_tracing()
+    with span("noop", a=1) as s:
+        s.set_attribute("b", 2)
+    assert stop_tracing() == []
+
+
+def test_chrome_trace(tmp_path):
+    path = tmp_path / "trace.json"
+    start_tracing(str(path))
+    with span("outer", files=2) as s:
+        with span("inner", path="a/b"):
+            pass
+        s.set_attribute("copied", 2)
+    try:
+        with span("failing"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    events = stop_tracing()
+    assert not is_tracing()
+
+    with open(path) as f:
+        trace = json.load(f)
+    assert trace['traceEvents'] == events
+    by_name = {e['name']: e for e in events}
+    assert set(by_name) == {'outer', 'inner', 'failing'}
+    assert all(e['ph'] == 'X' and e['dur'] >= 0 for e in events)
+    assert by_name['outer']['args'] == {'files': 2, 'copied': 2}
+    assert by_name['inner']['args'] == {'path': 'a/b'}
+    assert 'boom' in by_name['failing']['args']['error']
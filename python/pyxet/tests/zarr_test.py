@@ -0,0 +1,52 @@
+import os
+import tempfile
+
+import pytest
+
+pytest.importorskip("zarr")
+
+import numpy as np
+import zarr
+
+import pyxet
+from pyxet.local_backend import LOCAL_BACKEND_ROOT_ENV
+from pyxet.zarr import XetStore
+
+os.environ.setdefault(LOCAL_BACKEND_ROOT_ENV, tempfile.mkdtemp())
+
+
+@pytest.fixture
+def store():
+    fs = pyxet.XetFS("localhost-fs")
+    user = fs.get_username()
+    name = f"repo_{os.urandom(4).hex()}"
+    fs.make_repo(f"xet://localhost-fs:{user}/{name}")
+    return XetStore(f"xet://localhost-fs:{user}/{name}/main/data.zarr", fs, commit_message="write array")
+
+
+def test_zarr_array_roundtrip(store):
+    data = np.arange(10000, dtype="int32").reshape(100, 100)
+    z = zarr.open_array(store, mode="w", shape=data.shape, chunks=(10, 10), dtype="int32")
+    with store.fs.transaction:
+        z[:] = data
+    assert len([k for k in store if not k.startswith(".")]) == 100
+
+    z = zarr.open_array(store, mode="r")
+    assert (z[:] == data).all()
+    assert (z[15:35, 5:95] == data[15:35, 5:95]).all()
+
+
+def test_zarr_store_batches(store):
+    store.setitems({"a/0": b"0", "a/1": b"1", "b": b"b"})
+    assert store.getitems(["a/0", "a/1", "missing"], contexts={}) == {"a/0": b"0", "a/1": b"1"}
+    assert store["b"] == b"b"
+    with pytest.raises(KeyError):
+        store["missing"]
+    assert store.listdir("a") == ["0", "1"]
+
+    store.delitems(["a/0", "missing"])
+    assert sorted(store) == ["a/1", "b"]
+    with pytest.raises(KeyError):
+        del store["a/0"]
+    store.rmdir("a")
+    assert list(store) == ["b"]